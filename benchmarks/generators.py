@@ -0,0 +1,96 @@
+import numpy as np
+import pygplates
+
+
+def _destination(center: tuple[float, float], bearings: np.ndarray, distances: np.ndarray) -> list[tuple[float, float]]:
+    # Points at the given bearings (radians) and angular distances (degrees) from a (lat, lon) centre
+    lat1 = np.radians(center[0])
+    lon1 = np.radians(center[1])
+    d = np.radians(distances)
+
+    lat2 = np.arcsin(np.sin(lat1) * np.cos(d) + np.cos(lat1) * np.sin(d) * np.cos(bearings))
+    lon2 = lon1 + np.arctan2(np.sin(bearings) * np.sin(d) * np.cos(lat1), np.cos(d) - np.sin(lat1) * np.sin(lat2))
+    return list(zip(np.degrees(lat2).tolist(), np.degrees((lon2 + np.pi) % (2 * np.pi) - np.pi).tolist()))
+
+def make_plate(rng: np.random.Generator, vertex_count: int, center: tuple[float, float] = (0.0, 0.0), radius: float = 10.0) -> pygplates.PolygonOnSphere:
+    """Creates a plate polygon with `vertex_count` vertices around a centre.
+
+    The vertices are ordered by bearing and their distance varies smoothly with it (a few random harmonics),
+    so the polygon is star shaped around the centre (never self-intersecting) with an irregular outline that
+    does not get more jagged with more vertices.
+    """
+    bearings = np.sort(rng.uniform(0.0, 2 * np.pi, vertex_count))
+    distances = np.full(vertex_count, radius)
+    for harmonic in range(2, 7):
+        distances += radius * rng.uniform(0.0, 0.04) * np.sin(harmonic * bearings + rng.uniform(0.0, 2 * np.pi))
+    return pygplates.PolygonOnSphere(_destination(center, bearings, distances))
+
+def make_rift(rng: np.random.Generator, crossings: int, vertex_count: int = 50, center: tuple[float, float] = (0.0, 0.0), radius: float = 10.0) -> pygplates.PolylineOnSphere:
+    """Creates a rift line that crosses a plate made by `make_plate` (with the same centre and radius) about
+    `crossings` times.
+
+    The line zigzags between stations alternately well outside and well inside the plate, starting outside,
+    so an even number of crossings gives a rift that cuts through the plate. `vertex_count` is the total
+    number of vertices of the line.
+    """
+    stations = crossings + 1
+    bearings = np.linspace(0.0, np.pi, stations) + rng.uniform(-0.1, 0.1, stations)
+    distances = np.where(np.arange(stations) % 2 == 0, 1.6 * radius, 0.4 * radius)
+
+    # Fill in the vertices between the stations along straight lines in bearing/distance space
+    steps = max(vertex_count - 1, stations - 1)
+    t = np.linspace(0.0, stations - 1, steps + 1)
+    return pygplates.PolylineOnSphere(_destination(center, np.interp(t, np.arange(stations), bearings), np.interp(t, np.arange(stations), distances)))
+
+def make_arcs(rng: np.random.Generator, count: int, length: float = 5.0) -> tuple[np.ndarray, np.ndarray]:
+    """Creates `count` random arcs of about `length` degrees as (count, 3) start and end unit vector arrays."""
+    starts = rng.normal(size=(count, 3))
+    starts /= np.linalg.norm(starts, axis=1)[:, None]
+
+    # Move along a random direction perpendicular to the start
+    directions = np.cross(starts, rng.normal(size=(count, 3)))
+    directions /= np.linalg.norm(directions, axis=1)[:, None]
+    angle = np.radians(length)
+    ends = np.cos(angle) * starts + np.sin(angle) * directions
+    return starts, ends
+
+def make_feature_collection(rng: np.random.Generator, feature_count: int, vertex_count: int = 100, rifts: int = 1) -> pygplates.FeatureCollection:
+    """Creates a feature collection of plates (spread over the globe) with a few rifts, like a small plate model."""
+    features = []
+    for i in range(feature_count):
+        center = (float(rng.uniform(-60, 60)), float(rng.uniform(-180, 180)))
+        features.append(pygplates.Feature.create_reconstructable_feature(
+            pygplates.FeatureType.gpml_continental_crust if i % 2 else pygplates.FeatureType.gpml_oceanic_crust,
+            make_plate(rng, vertex_count, center, float(rng.uniform(2, 10))),
+            f"Plate {i}",
+            reconstruction_plate_id=int(101 + i % 50),
+            valid_time=(float(rng.choice([200.0, 300.0, 600.0])), float(rng.choice([0.0, -np.inf]))),
+        ))
+
+    for i in range(rifts):
+        features.append(pygplates.Feature.create_reconstructable_feature(
+            pygplates.FeatureType.gpml_continental_rift,
+            make_rift(rng, 2, 50),
+            f"Rift {i}",
+            reconstruction_plate_id=101,
+            valid_time=(600.0, -np.inf),
+        ))
+
+    return pygplates.FeatureCollection(features)
+
+def make_table_rows(rng: np.random.Generator, row_count: int, collections: int = 4) -> list[tuple]:
+    """Creates feature table rows (see `feature_row`) without any pygplates features behind them."""
+    feature_types = ["OceanicCrust", "ContinentalCrust", "ContinentalRift", "SubductionZone"]
+    geometry_types = ["PolygonOnSphere", "PolygonOnSphere", "PolylineOnSphere", "PolylineOnSphere"]
+
+    kinds = rng.integers(0, 4, row_count).tolist()
+    plate_ids = rng.integers(101, 901, row_count).tolist()
+    start_times = rng.choice([100.0, 200.0, 600.0, np.inf], row_count).tolist()
+    end_times = rng.choice([0.0, 50.0, -np.inf], row_count).tolist()
+
+    per_collection = max(1, row_count // collections)
+    return [
+        (f"Feature {i}", feature_types[kinds[i]], geometry_types[kinds[i]], plate_ids[i], start_times[i], end_times[i],
+         f"GPlates-benchmark-{i}", f"collection{min(i // per_collection, collections - 1)}.gpml", "")
+        for i in range(row_count)
+    ]
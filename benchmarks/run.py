@@ -0,0 +1,354 @@
+"""Benchmarks of the splitting and feature handling code.
+
+Run from the repository root with `python -m benchmarks.run`. Every benchmark is run at several sizes with
+seeded synthetic data (see `benchmarks.generators`), so results are reproducible on the same machine. The
+report lists the best time of each size and the scaling exponent between sizes (1 is linear, 2 quadratic).
+"""
+import argparse
+import itertools
+import json
+import math
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+from typing import Callable
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import numpy as np
+import pygplates
+from PySide6.QtWidgets import QApplication
+
+from benchmarks.generators import make_arcs, make_feature_collection, make_plate, make_rift, make_table_rows
+from core.arc_geometry import get_arc_intersection, get_arc_pair_intersections
+from core.feature_table_model import FeatureTableModel
+from core.parallel_splitting import split_line_batches, split_plates_by_polygon
+from core.plate_splitter import split_plate_by_line
+from core.plate_statistics import PlateStatistics
+from core.simplification import LevelsOfDetail
+from core.polygon_boolean import polygon_union
+from core.session import Session
+from ui.feature_splitting_window import FeatureFilterModel, RiftFilterModel
+
+
+SEED = 20240601
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+
+# Runs faster than this are timed in loops (like timeit does), single runs of a few milliseconds are too noisy
+MIN_BATCH_TIME = 0.1
+
+def measure(run: Callable[[], object], repeat: int, setup: Callable[[], object] | None = None) -> float:
+    """Returns the best wall time of a run out of `repeat` batches.
+
+    Without `setup`, a batch loops the run until it takes at least `MIN_BATCH_TIME`. With `setup` (which is run
+    untimed before every run) each batch is a single run.
+    """
+    loops = 1
+    if setup is None:
+        while True:
+            start = time.perf_counter()
+            for _ in range(loops):
+                run()
+            if time.perf_counter() - start >= MIN_BATCH_TIME:
+                break
+            loops *= 2
+
+    best = math.inf
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        for _ in range(loops):
+            run()
+        best = min(best, (time.perf_counter() - start) / loops)
+    return best
+
+
+# --- Benchmarks, each returning {size: seconds} ---
+
+def bench_arc_intersection(sizes: list[int], repeat: int) -> dict[int, float]:
+    """`get_arc_intersection` on `size` random arc pairs, one call per pair."""
+    results = {}
+    for size in sizes:
+        rng = np.random.default_rng(SEED)
+        a_starts, a_ends = make_arcs(rng, size)
+        b_starts, b_ends = make_arcs(rng, size)
+        pairs = [
+            tuple(pygplates.PointOnSphere(*xyz).to_lat_lon_point() for xyz in arcs)
+            for arcs in zip(a_starts, a_ends, b_starts, b_ends)
+        ]
+        results[size] = measure(lambda: [get_arc_intersection(*pair) for pair in pairs], repeat)
+    return results
+
+def bench_arc_pair_intersections(sizes: list[int], repeat: int) -> dict[int, float]:
+    """The vectorized `get_arc_pair_intersections` on `size` random arc pairs."""
+    results = {}
+    for size in sizes:
+        rng = np.random.default_rng(SEED)
+        a_starts, a_ends = make_arcs(rng, size)
+        b_starts, b_ends = make_arcs(rng, size)
+        results[size] = measure(lambda: get_arc_pair_intersections(a_starts, a_ends, b_starts, b_ends), repeat)
+    return results
+
+def bench_split_plate(sizes: list[int], repeat: int, crossings: int = 4) -> dict[int, float]:
+    """`split_plate_by_line` on a plate with `size` vertices and a 50 vertex rift crossing it `crossings` times."""
+    results = {}
+    for size in sizes:
+        rng = np.random.default_rng(SEED)
+        plate = make_plate(rng, size)
+        rift = make_rift(rng, crossings, 50)
+        results[size] = measure(lambda: split_plate_by_line(plate, rift), repeat)
+    return results
+
+def bench_split_rift_vertices(sizes: list[int], repeat: int) -> dict[int, float]:
+    """`split_plate_by_line` on a 1000 vertex plate with a rift of `size` vertices."""
+    results = {}
+    for size in sizes:
+        rng = np.random.default_rng(SEED)
+        plate = make_plate(rng, 1000)
+        rift = make_rift(rng, 4, size)
+        results[size] = measure(lambda: split_plate_by_line(plate, rift), repeat)
+    return results
+
+def bench_polygon_union(sizes: list[int], repeat: int) -> dict[int, float]:
+    """`polygon_union` of two overlapping plates with `size` vertices each."""
+    results = {}
+    for size in sizes:
+        rng = np.random.default_rng(SEED)
+        a = make_plate(rng, size)
+        b = make_plate(rng, size, center=(2.0, 3.0))
+        results[size] = measure(lambda: polygon_union(a, b), repeat)
+    return results
+
+def bench_split_lines(sizes: list[int], repeat: int) -> dict[int, float]:
+    """`split_line_batches` of `size` 100 vertex lines by three 50 vertex rifts running across all of them."""
+    results = {}
+    for size in sizes:
+        rng = np.random.default_rng(SEED)
+        lines = [make_rift(rng, 4, 100, center=(float(lat), float(lon)), radius=5.0) for lat, lon in zip(rng.uniform(-30, 30, size), rng.uniform(-30, 30, size))]
+        rifts = [make_rift(rng, 6, 50, radius=30.0) for _ in range(3)]
+        results[size] = measure(lambda: split_line_batches([(lines, rifts)]), repeat)
+    return results
+
+def bench_polygon_cutter(sizes: list[int], repeat: int) -> dict[int, float]:
+    """`split_plates_by_polygon` of `size` 200 vertex plates around the edge of a 20000 vertex cutter."""
+    results = {}
+    for size in sizes:
+        rng = np.random.default_rng(SEED)
+        cutter = make_plate(rng, 20000, radius=20.0)
+        plates = [make_plate(rng, 200, center=(float(lat), float(lon)), radius=3.0) for lat, lon in zip(rng.uniform(-25, 25, size), rng.uniform(-25, 25, size))]
+        results[size] = measure(lambda: split_plates_by_polygon(plates, cutter), repeat)
+    return results
+
+def bench_simplify(sizes: list[int], repeat: int) -> dict[int, float]:
+    """`LevelsOfDetail` of a plate with `size` vertices, simplified to the preview's 500 vertices."""
+    results = {}
+    for size in sizes:
+        plate = make_plate(np.random.default_rng(SEED), size)
+        results[size] = measure(lambda: LevelsOfDetail(plate).with_vertex_budget(500), repeat)
+    return results
+
+def _write_collections(directory: str, sizes: list[int]) -> dict[int, str]:
+    paths = {}
+    for size in sizes:
+        paths[size] = os.path.join(directory, f"plates_{size}.gpml")
+        make_feature_collection(np.random.default_rng(SEED), size).write(paths[size])
+    return paths
+
+def bench_session_load(sizes: list[int], repeat: int, cached: bool = False) -> dict[int, float]:
+    """`Session.load_feature_collections` of a file with `size` plates (without or with a warm feature cache)."""
+    directory = tempfile.mkdtemp(prefix="gplates-utilities-benchmark-")
+    try:
+        paths = _write_collections(directory, sizes)
+        results = {}
+        for size in sizes:
+            session = Session()
+            if cached:
+                session.feature_cache.directory = os.path.join(directory, "cache")  # type: ignore | Sessions start with a cache
+                session.load_feature_collections([paths[size]])
+            else:
+                session.feature_cache = None
+
+            def unload():
+                for lfc in list(session.loaded_feature_collections):
+                    session.unload_feature_collection(lfc.shortname)
+
+            results[size] = measure(lambda: session.load_feature_collections([paths[size]]), repeat, unload)
+        return results
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+def bench_session_reload(sizes: list[int], repeat: int) -> dict[int, float]:
+    """`Session.reload_features` after one plate of a `size` plate file was renamed."""
+    directory = tempfile.mkdtemp(prefix="gplates-utilities-benchmark-")
+    try:
+        paths = _write_collections(directory, sizes)
+        results = {}
+        for size in sizes:
+            session = Session()
+            session.feature_cache = None
+            session.load_feature_collections([paths[size]])
+
+            original = pygplates.FeatureCollection(paths[size])
+            renamed = [0]
+
+            def change_file():
+                renamed[0] += 1
+                fc = original.clone()
+                next(iter(fc)).set_name(f"Renamed {renamed[0]}")
+                fc.write(paths[size])
+
+            results[size] = measure(session.reload_features, repeat, change_file)
+        return results
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+def bench_plate_statistics(sizes: list[int], repeat: int) -> dict[int, float]:
+    """Area by plate ID of a loaded `size` plate file, measured from its feature cache entry."""
+    directory = tempfile.mkdtemp(prefix="gplates-utilities-benchmark-")
+    try:
+        paths = _write_collections(directory, sizes)
+        results = {}
+        for size in sizes:
+            session = Session()
+            session.feature_cache.directory = os.path.join(directory, "cache")  # type: ignore | Sessions start with a cache
+            session.load_feature_collections([paths[size]])
+
+            def forget():
+                session.statistics = PlateStatistics(session)
+
+            results[size] = measure(lambda: session.statistics.aggregate(("plate_id",)), repeat, forget)
+        return results
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+def bench_filters(sizes: list[int], repeat: int) -> dict[int, float]:
+    """Changing the time filter of both splitting window proxies, then the plate ID filter, over `size` rows."""
+    results = {}
+    for size in sizes:
+        model = FeatureTableModel()
+        model.append_rows(make_table_rows(np.random.default_rng(SEED), size))
+
+        rifts = RiftFilterModel()
+        rifts.setSourceModel(model)
+        plates = FeatureFilterModel()
+        plates.setSourceModel(model)
+
+        times = itertools.cycle(np.random.default_rng(SEED).uniform(0, 600, 1000).tolist())
+
+        def change_filters():
+            time = next(times)
+            rifts.setTimeFilter(time)
+            plates.setTimeFilter(time)
+            plates.setPlateIdFilter(["101", "102", "550"])
+            plates.setPlateIdFilter([])
+
+        results[size] = measure(change_filters, repeat)
+    return results
+
+
+BENCHMARKS: dict[str, tuple[Callable[..., dict[int, float]], list[int], list[int]]] = {
+    # name: (benchmark, sizes, quick sizes)
+    "arc_intersection": (bench_arc_intersection, [1000, 5000, 25000], [1000, 5000]),
+    "arc_pair_intersections": (bench_arc_pair_intersections, [10000, 100000, 1000000], [10000, 100000]),
+    "split_plate_by_line": (bench_split_plate, [100, 1000, 10000, 100000], [100, 1000, 10000]),
+    "split_plate_by_line_rift_vertices": (bench_split_rift_vertices, [50, 500, 5000], [50, 500]),
+    "split_lines": (bench_split_lines, [100, 1000, 5000], [100, 1000]),
+    "polygon_union": (bench_polygon_union, [1000, 10000, 50000], [1000, 10000]),
+    "polygon_cutter": (bench_polygon_cutter, [10, 100, 500], [10, 100]),
+    "simplify": (bench_simplify, [1000, 10000, 100000], [1000, 10000]),
+    "session_load": (bench_session_load, [100, 1000, 5000], [100, 1000]),
+    "session_load_cached": (lambda sizes, repeat: bench_session_load(sizes, repeat, cached=True), [100, 1000, 5000], [100, 1000]),
+    "session_reload": (bench_session_reload, [100, 1000, 5000], [100, 1000]),
+    "plate_statistics": (bench_plate_statistics, [100, 1000, 5000], [100, 1000]),
+    "filters": (bench_filters, [10000, 100000, 1000000], [10000, 100000]),
+}
+
+
+# --- Reporting ---
+
+def scaling(results: dict[int, float]) -> list[float]:
+    """Returns the scaling exponents between consecutive sizes (time ~ size^exponent)."""
+    sizes = sorted(results)
+    return [
+        math.log(results[b] / results[a]) / math.log(b / a) if results[a] > 0 and results[b] > 0 else math.nan
+        for a, b in zip(sizes, sizes[1:])
+    ]
+
+def print_report(all_results: dict[str, dict[int, float]], baseline: dict[str, dict[int, float]] | None, threshold: float) -> list[str]:
+    """Prints the results (compared to the baseline if given) and returns the regressed benchmark sizes."""
+    regressions = []
+    for name, results in all_results.items():
+        exponents = scaling(results)
+        print(f"{name}  (scaling: {', '.join(f'{e:.2f}' for e in exponents) or '-'})")
+        for size in sorted(results):
+            line = f"  {size:>10}  {results[size] * 1000:12.3f} ms"
+            reference = (baseline or {}).get(name, {}).get(size)
+            if reference:
+                ratio = results[size] / reference
+                line += f"  {ratio:6.2f}x baseline"
+                if ratio > threshold:
+                    line += "  REGRESSION"
+                    regressions.append(f"{name}@{size}")
+            print(line)
+    return regressions
+
+def load_baseline(path: str) -> dict[str, dict[int, float]]:
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    return {name: {int(size): seconds for size, seconds in results.items()} for name, results in data["results"].items()}
+
+def save_baseline(path: str, all_results: dict[str, dict[int, float]]) -> None:
+    data = {
+        "machine": {"platform": platform.platform(), "python": platform.python_version(), "processor": platform.processor(), "cpus": os.cpu_count()},
+        "results": {name: {str(size): seconds for size, seconds in results.items()} for name, results in all_results.items()},
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+        f.write("\n")
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmarks - GPlates Utilities")
+    parser.add_argument("names", nargs="*", help=f"benchmarks to run (default: all of {', '.join(BENCHMARKS)})")
+    parser.add_argument("--quick", action="store_true", help="only run the smaller sizes")
+    parser.add_argument("-n", "--repeat", type=int, default=3, help="runs per size, the best one counts (default: 3)")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="baseline results to compare with (default: benchmarks/baseline.json)")
+    parser.add_argument("--save-baseline", action="store_true", help="store the results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=1.25, help="slowdown against the baseline reported as a regression (default: 1.25)")
+    args = parser.parse_args(argv)
+
+    unknown = [name for name in args.names if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmark(s): {', '.join(unknown)}")
+
+    # Sessions and the filter models need a running Qt application
+    app = QApplication.instance() or QApplication([])  # noqa: F841
+
+    all_results = {}
+    for name in args.names or BENCHMARKS:
+        benchmark, sizes, quick_sizes = BENCHMARKS[name]
+        all_results[name] = benchmark(quick_sizes if args.quick else sizes, args.repeat)
+
+    baseline = load_baseline(args.baseline) if os.path.exists(args.baseline) and not args.save_baseline else None
+    regressions = print_report(all_results, baseline, args.threshold)
+
+    if args.save_baseline:
+        if os.path.exists(args.baseline):
+            # Keeps the results of benchmarks that were not run this time
+            all_results = {**load_baseline(args.baseline), **all_results}
+        save_baseline(args.baseline, all_results)
+        print(f"Saved baseline: {os.path.realpath(args.baseline)}")
+
+    if regressions:
+        print(f"Slower than the baseline: {', '.join(regressions)}", file=sys.stderr)
+        return 1
+
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1 @@
+# Lets the tests import the `core` and `ui` packages from the repository root
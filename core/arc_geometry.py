@@ -2,7 +2,7 @@
 
 
 import numpy as np
-from pygplates.pygplates import LatLonPoint
+from pygplates.pygplates import LatLonPoint, PolygonOnSphere, PolylineOnSphere
 
 
 def is_point_on_arc(point, arc_start, arc_end, epsilon=0.001) -> bool:
@@ -69,4 +69,112 @@ def get_arc_intersection(a1: LatLonPoint, a2: LatLonPoint, b1: LatLonPoint, b2:
         lon = np.atan2(I2[1], I2[0])
         return LatLonPoint(np.degrees(lat), np.degrees(lon))
     else:
-        return None
\ No newline at end of file
+        return None
+
+
+# --- Batched versions of the functions above ---
+#
+# These work on N×3 arrays of unit vectors instead of single LatLonPoints, so that a whole polyline can be
+# tested against a whole polygon in a handful of NumPy calls instead of one Python call per pair of arcs.
+
+def to_unit_vectors(points) -> np.ndarray:
+    """Converts a geometry (or a sequence of PointOnSphere, or an N×3 array) into an N×3 array of unit vectors."""
+    if isinstance(points, np.ndarray):
+        return points.reshape(-1, 3).astype(np.float64, copy=False)
+    if hasattr(points, "to_xyz_array"):
+        return np.asarray(points.to_xyz_array(), dtype=np.float64).reshape(-1, 3)
+    return np.array([p.to_xyz() for p in points], dtype=np.float64).reshape(-1, 3)
+
+def ring_sizes(geometry) -> list[int] | None:
+    """Returns the sizes of the point sequences (rings) of a polygon or polyline in `to_xyz_array` order: the
+    exterior ring first, then the interior rings. None for geometries without any (points, multi-points)."""
+    if isinstance(geometry, PolygonOnSphere):
+        return [len(geometry.get_exterior_ring_points())] + [len(geometry.get_interior_ring_points(i)) for i in range(geometry.get_number_of_interior_rings())]
+    if isinstance(geometry, PolylineOnSphere):
+        return [len(geometry)]
+    return None
+
+def unit_vectors_to_lat_lon(xyz: np.ndarray) -> np.ndarray:
+    """Converts an N×3 array of unit vectors into an N×2 array of (latitude, longitude) in degrees."""
+    xyz = np.asarray(xyz, dtype=np.float64).reshape(-1, 3)
+    lat = np.arcsin(np.clip(xyz[:, 2], -1.0, 1.0))
+    lon = np.atan2(xyz[:, 1], xyz[:, 0])
+    return np.degrees(np.column_stack((lat, lon)))
+
+def normalized(vectors: np.ndarray) -> np.ndarray:
+    """Scales vectors (along the last axis) to unit length, leaving zero vectors as they are."""
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms > 0.0, norms, 1.0)
+
+def angular_distances(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Row-wise angles (in radians) between two arrays of unit vectors.
+
+    Computed via the chord length, which unlike the arc cosine of the dot product stays accurate for tiny angles.
+    """
+    return 2 * np.arcsin(np.clip(np.linalg.norm(a - b, axis=-1) / 2, 0.0, 1.0))
+
+def left_areas(coordinates: np.ndarray, offsets: np.ndarray) -> np.ndarray:
+    """Returns the area (in steradians) of the region to the left of many closed rings of unit vectors at once.
+
+    Ring `i` is `coordinates[offsets[i]:offsets[i + 1]]`. Sums the signed areas of the triangles between every
+    edge and the ring's centroid, so the area depends on the direction of the ring: going counter-clockwise
+    around a region gives that region's area, going clockwise the area of the rest of the sphere. Spikes (edges
+    going back the way they came) add nothing. Empty rings get 0.
+    """
+    sizes = np.diff(offsets)
+    areas = np.zeros(len(sizes))
+    nonempty = sizes > 0
+    if not nonempty.any():
+        return areas
+
+    starts = offsets[:-1][nonempty]
+    ring = np.repeat(np.arange(len(sizes)), sizes)
+    following = np.arange(1, len(coordinates) + 1)
+    following[offsets[1:][nonempty] - 1] = starts
+
+    centers = np.zeros((len(sizes), 3))
+    centers[nonempty] = np.add.reduceat(coordinates, starts, axis=0)
+    center = normalized(centers)[ring]
+    nxt = coordinates[following]
+    triple = np.einsum("ij,ij->i", np.cross(coordinates, nxt), center)
+    denominator = 1.0 + np.einsum("ij,ij->i", coordinates, center) + np.einsum("ij,ij->i", nxt, center) + np.einsum("ij,ij->i", coordinates, nxt)
+    areas[nonempty] = np.add.reduceat(2 * np.arctan2(triple, denominator), starts) % (4 * np.pi)
+    return areas
+
+def left_area(ring: np.ndarray) -> float:
+    """Returns the area (in steradians) of the region to the left of one closed ring, see `left_areas`."""
+    return float(left_areas(ring, np.array([0, len(ring)]))[0])
+
+def _angle_between(u: np.ndarray, v: np.ndarray) -> np.ndarray:
+    # Row-wise angle between two arrays of unit vectors
+    return np.arccos(np.clip(np.einsum("ij,ij->i", u, v), -1.0, 1.0))
+
+def are_points_on_arcs(points: np.ndarray, arc_starts: np.ndarray, arc_ends: np.ndarray, epsilon=0.001) -> np.ndarray:
+    """Row-wise version of `is_point_on_arc` for unit vectors."""
+    theta_start_point = _angle_between(arc_starts, points)
+    theta_end_point = _angle_between(arc_ends, points)
+    theta_start_end = _angle_between(arc_starts, arc_ends)
+
+    return np.abs(theta_start_point + theta_end_point - theta_start_end) < epsilon
+
+def get_arc_pair_intersections(a_starts: np.ndarray, a_ends: np.ndarray, b_starts: np.ndarray, b_ends: np.ndarray, epsilon=0.001) -> tuple[np.ndarray, np.ndarray]:
+    """Row-wise version of `get_arc_intersection` for K pairs of arcs given as K×3 arrays of unit vectors.
+
+    Returns a boolean mask of the pairs that intersect and a K×3 array with the intersection points
+    (rows of non-intersecting pairs are undefined).
+    """
+    # Calculate the Cross-Product of the Cross-Products
+    L = np.cross(np.cross(a_starts, a_ends), np.cross(b_starts, b_ends))
+    norm = np.linalg.norm(L, axis=1)
+
+    # Parallel great circles (or degenerate arcs) have no defined intersection
+    valid = norm > 0.0
+    I1 = np.zeros_like(L)
+    I1[valid] = L[valid] / norm[valid, None]
+    I2 = -I1
+
+    I1_hit = valid & are_points_on_arcs(I1, a_starts, a_ends, epsilon) & are_points_on_arcs(I1, b_starts, b_ends, epsilon)
+    I2_hit = valid & ~I1_hit & are_points_on_arcs(I2, a_starts, a_ends, epsilon) & are_points_on_arcs(I2, b_starts, b_ends, epsilon)
+
+    points = np.where(I2_hit[:, None], I2, I1)
+    return I1_hit | I2_hit, points
@@ -0,0 +1,125 @@
+import numpy as np
+import pygplates
+
+from core.arc_geometry import angular_distances, ring_sizes
+
+
+# Consecutive vertices closer than this (in radians, about 6 m on Earth) count as duplicates by default
+DEFAULT_TOLERANCE = 1e-6
+
+
+def duplicate_point_mask(coordinates: np.ndarray, offsets: np.ndarray, closed: np.ndarray, tolerance: float = DEFAULT_TOLERANCE, minimum_points: np.ndarray | None = None) -> np.ndarray:
+    """Returns which vertices to keep of many point sequences at once.
+
+    `coordinates` holds the (n, 3) unit vectors of all sequences one after another, sequence `i` being
+    `coordinates[offsets[i]:offsets[i + 1]]`. A vertex is dropped if it lies within `tolerance` (radians) of both
+    the vertex before it and the first vertex of its run of near-duplicates, so a run of closely spaced vertices
+    cannot shrink to one vertex further than `tolerance` from the rest. In `closed` sequences (polygon rings)
+    vertices at the end that repeat the first vertex are dropped as well. Sequences that would be left with
+    fewer than `minimum_points` vertices (default: 3 if closed, else 2) keep all of theirs.
+    """
+    count = len(coordinates)
+    keep = np.ones(count, dtype=bool)
+    sizes = np.diff(offsets)
+    starts = offsets[:-1]
+    nonempty = sizes > 0
+    if count == 0 or not nonempty.any():
+        return keep
+
+    index = np.arange(count)
+    sequence = np.repeat(np.arange(len(sizes)), sizes)
+    is_start = np.zeros(count, dtype=bool)
+    is_start[starts[nonempty]] = True
+
+    # Runs of near-duplicates start wherever a vertex is not close to the one before it
+    near_previous = np.zeros(count, dtype=bool)
+    near_previous[1:] = angular_distances(coordinates[1:], coordinates[:-1]) <= tolerance
+    near_previous &= ~is_start
+    run_start = np.maximum.accumulate(np.where(near_previous, 0, index))
+    keep &= ~(near_previous & (angular_distances(coordinates, coordinates[run_start]) <= tolerance))
+
+    # The closing vertices of rings: everything after the last vertex that is not close to the first one
+    near_first = angular_distances(coordinates, coordinates[starts[sequence]]) <= tolerance
+    last_far = np.maximum.reduceat(np.where(~near_first | is_start, index, -1), starts[nonempty])
+    keep &= ~(closed[sequence] & (index > np.repeat(last_far, sizes[nonempty])))
+
+    # Sequences that would become degenerate are left alone
+    if minimum_points is None:
+        minimum_points = np.where(closed, 3, 2)
+    kept = np.add.reduceat(keep.astype(np.intp), starts[nonempty])
+    too_few = np.zeros(len(sizes), dtype=bool)
+    too_few[nonempty] = kept < minimum_points[nonempty]
+    keep |= too_few[sequence]
+
+    return keep
+
+
+def remove_duplicate_points(features, tolerance: float = DEFAULT_TOLERANCE) -> dict[str, int]:
+    """Removes duplicate consecutive vertices from the polygons and polylines of the features (see
+    `duplicate_point_mask`), in place.
+
+    The vertices of all geometries are checked in one vectorized pass, then only the geometries that lose
+    vertices are rebuilt. Returns the number of removed vertices by feature ID of every changed feature.
+    """
+    # Every geometry property of every feature, with its geometries and their rings
+    properties: list[tuple[pygplates.Feature, pygplates.PropertyName, list]] = []
+    arrays: list[np.ndarray] = []
+    sizes: list[int] = []
+    closed: list[bool] = []
+    for feature in features:
+        names = []
+        for prop in feature:
+            name = prop.get_name()
+            if name not in names:
+                names.append(name)
+
+        for name in names:
+            geometries = feature.get_geometries(name)
+            if len(geometries) == 0 or any(ring_sizes(geometry) is None for geometry in geometries):
+                # Points and multi-points have no consecutive vertices to merge
+                continue
+
+            properties.append((feature, name, geometries))
+            for geometry in geometries:
+                arrays.append(np.asarray(geometry.to_xyz_array(), dtype=np.float64))
+                # Never None here, points and multi-points were skipped above
+                rings = ring_sizes(geometry)
+                sizes.extend(rings)
+                closed.extend([isinstance(geometry, pygplates.PolygonOnSphere)] * len(rings))
+
+    if len(arrays) == 0:
+        return {}
+
+    coordinates = np.concatenate(arrays)
+    offsets = np.concatenate([[0], np.cumsum(sizes)])
+    keep = duplicate_point_mask(coordinates, offsets, np.array(closed), tolerance)
+
+    # Geometries always have points, so no sequence is empty here
+    removed_per_sequence = np.diff(offsets) - np.add.reduceat(keep.astype(np.intp), offsets[:-1])
+    removed_by_feature_id: dict[str, int] = {}
+
+    sequence = 0
+    for feature, name, geometries in properties:
+        new_geometries = []
+        changed = 0
+        for geometry in geometries:
+            # Only geometries with rings were collected
+            ring_count = len(ring_sizes(geometry))
+            removed = int(removed_per_sequence[sequence:sequence + ring_count].sum())
+            if removed == 0:
+                new_geometries.append(geometry)
+            else:
+                ring_points = [coordinates[offsets[s]:offsets[s + 1]][keep[offsets[s]:offsets[s + 1]]] for s in range(sequence, sequence + ring_count)]
+                if isinstance(geometry, pygplates.PolygonOnSphere):
+                    new_geometries.append(pygplates.PolygonOnSphere(ring_points[0], ring_points[1:]) if ring_count > 1 else pygplates.PolygonOnSphere(ring_points[0]))
+                else:
+                    new_geometries.append(pygplates.PolylineOnSphere(ring_points[0]))
+                changed += removed
+            sequence += ring_count
+
+        if changed != 0:
+            feature.set_geometry(new_geometries, name)
+            feature_id = feature.get_feature_id().get_string()
+            removed_by_feature_id[feature_id] = removed_by_feature_id.get(feature_id, 0) + changed
+
+    return removed_by_feature_id
@@ -0,0 +1,165 @@
+import numpy as np
+from pygplates.pygplates import PolygonOnSphere
+
+from core.arc_geometry import get_arc_pair_intersections, to_unit_vectors
+
+
+def _normalize(vectors: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    norms = np.linalg.norm(vectors, axis=1)
+    safe = np.where(norms > 0.0, norms, 1.0)
+    return vectors / safe[:, None], norms
+
+def get_arc_caps(starts: np.ndarray, ends: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Returns the centres and angular radii of the smallest spherical caps containing each arc."""
+    centers, norms = _normalize(starts + ends)
+    radii = np.arccos(np.clip(np.einsum("ij,ij->i", starts, ends), -1.0, 1.0)) / 2
+
+    # Antipodal endpoints do not define an arc, so such a cap has to cover the whole sphere
+    degenerate = norms <= 1e-12
+    centers[degenerate] = starts[degenerate]
+    radii[degenerate] = np.pi
+
+    return centers, radii
+
+def _merge_caps(centers: np.ndarray, radii: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    # Merges caps 2i and 2i+1 into one cap that contains both (an odd last cap is carried over as is)
+    pairs = len(centers) // 2
+    c1 = centers[0:2 * pairs:2]; r1 = radii[0:2 * pairs:2]
+    c2 = centers[1:2 * pairs:2]; r2 = radii[1:2 * pairs:2]
+
+    merged, norms = _normalize(c1 + c2)
+    merged_radii = np.maximum(
+        np.arccos(np.clip(np.einsum("ij,ij->i", merged, c1), -1.0, 1.0)) + r1,
+        np.arccos(np.clip(np.einsum("ij,ij->i", merged, c2), -1.0, 1.0)) + r2
+    )
+    degenerate = norms <= 1e-12
+    merged[degenerate] = c1[degenerate]
+    merged_radii[degenerate] = np.pi
+    merged_radii = np.minimum(merged_radii, np.pi)
+
+    if len(centers) % 2 == 1:
+        merged = np.vstack((merged, centers[-1:]))
+        merged_radii = np.append(merged_radii, radii[-1])
+
+    return merged, merged_radii
+
+
+class EdgeIndex:
+    """Bounding-cap hierarchy over the edges of a polygon (or the segments of a polyline).
+
+    Level 0 holds one cap per edge, every level above merges two neighbouring caps of the level below until a
+    single cap is left. As consecutive edges lie next to each other, the caps stay tight and a query only has
+    to descend into the few branches it actually overlaps.
+
+    The index only depends on the geometry, so it can be built once per (reconstructed) polygon and reused for
+    every line that is tested against it.
+    """
+
+    def __init__(self, points, closed=True) -> None:
+        self.points = to_unit_vectors(points)
+        self.closed = closed
+
+        edge_count = len(self.points) if closed else len(self.points) - 1
+        edges = np.arange(max(edge_count, 0))
+        self.edge_starts = self.points[edges]
+        self.edge_ends = self.points[(edges + 1) % max(len(self.points), 1)]
+
+        self._levels: list[tuple[np.ndarray, np.ndarray]] = []
+        if edge_count > 0:
+            self._levels.append(get_arc_caps(self.edge_starts, self.edge_ends))
+            while len(self._levels[-1][0]) > 1:
+                self._levels.append(_merge_caps(*self._levels[-1]))
+
+    @classmethod
+    def from_polygon(cls, polygon: PolygonOnSphere) -> "EdgeIndex":
+        return cls(polygon, closed=True)
+
+    def __len__(self) -> int:
+        return len(self.edge_starts)
+
+    def bounding_cap(self) -> tuple[np.ndarray, float]:
+        """Returns the centre and angular radius of a cap containing the whole geometry."""
+        if len(self._levels) == 0:
+            return np.array([0.0, 0.0, 1.0]), np.pi
+        centers, radii = self._levels[-1]
+        return centers[0], float(radii[0])
+
+    def may_overlap(self, other: "EdgeIndex", tolerance=0.0) -> bool:
+        """Cheap test whether the edges of two indexes can come closer than `tolerance` (False means they cannot)."""
+        c1, r1 = self.bounding_cap()
+        c2, r2 = other.bounding_cap()
+        return float(np.dot(c1, c2)) >= np.cos(min(r1 + r2 + tolerance, np.pi))
+
+    def query_caps(self, centers: np.ndarray, radii: np.ndarray, tolerance=0.0) -> tuple[np.ndarray, np.ndarray]:
+        """Finds every edge whose bounding cap overlaps one of the given caps.
+
+        Returns the indices of the query caps and the edge indices of all overlapping pairs, ordered by query
+        index first and edge index second.
+        """
+        centers = to_unit_vectors(centers)
+        radii = np.asarray(radii, dtype=np.float64).reshape(-1)
+
+        if len(self._levels) == 0 or len(centers) == 0:
+            return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.intp)
+
+        queries = np.arange(len(centers))
+        nodes = np.zeros(len(centers), dtype=np.intp)
+
+        for level in reversed(range(len(self._levels))):
+            node_centers, node_radii = self._levels[level]
+
+            if level != len(self._levels) - 1:
+                # Descend into both children of every node that is still a candidate
+                queries = np.repeat(queries, 2)
+                nodes = np.column_stack((2 * nodes, 2 * nodes + 1)).reshape(-1)
+                exists = nodes < len(node_centers)
+                queries = queries[exists]; nodes = nodes[exists]
+
+            limit = np.minimum(radii[queries] + node_radii[nodes] + tolerance, np.pi)
+            overlaps = np.einsum("ij,ij->i", centers[queries], node_centers[nodes]) >= np.cos(limit)
+            queries = queries[overlaps]; nodes = nodes[overlaps]
+
+        order = np.lexsort((nodes, queries))
+        return queries[order], nodes[order]
+
+    def query_arcs(self, starts: np.ndarray, ends: np.ndarray, tolerance=0.0) -> tuple[np.ndarray, np.ndarray]:
+        """Finds the candidate edges for every arc, see `query_caps`."""
+        centers, radii = get_arc_caps(to_unit_vectors(starts), to_unit_vectors(ends))
+        return self.query_caps(centers, radii, tolerance)
+
+    def intersect(self, a_points, a_segments=None, a_closed=False, epsilon=0.001) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Finds every intersection between the arcs of `a_points` and the indexed edges.
+
+        `a_points` is an N×3 array of unit vectors (or anything `to_unit_vectors` accepts), arc i going from vertex
+        i to vertex i+1 (and from the last vertex back to the first one if `a_closed`). If given, `a_segments`
+        restricts the test to those arcs. Only arcs whose bounding caps overlap are handed to the intersection
+        kernel (`get_arc_pair_intersections`).
+
+        Returns the arc indices into `a_points`, the indexed edges and a K×3 array with the intersection points.
+        """
+        a_points = to_unit_vectors(a_points)
+        a_count = len(a_points) if a_closed else len(a_points) - 1
+
+        if a_segments is None:
+            a_segments = np.arange(max(a_count, 0))
+        else:
+            a_segments = np.asarray(a_segments, dtype=np.intp)
+
+        if len(a_segments) == 0 or len(self) == 0:
+            return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.intp), np.empty((0, 3))
+
+        a_starts = a_points[a_segments]
+        a_ends = a_points[(a_segments + 1) % len(a_points)]
+
+        # The kernel accepts points slightly past the arc ends, so the caps have to be grown by the same amount
+        queries, edges = self.query_arcs(a_starts, a_ends, tolerance=epsilon)
+
+        hit, points = get_arc_pair_intersections(
+            a_starts[queries],
+            a_ends[queries],
+            self.edge_starts[edges],
+            self.edge_ends[edges],
+            epsilon
+        )
+
+        return a_segments[queries[hit]], edges[hit], points[hit]
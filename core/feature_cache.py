@@ -0,0 +1,221 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pygplates
+
+from core.arc_geometry import ring_sizes
+from core.feature_loading import FileSignature
+
+
+# Bump when the layout of cache entries changes, older entries are then ignored (and eventually evicted)
+CACHE_VERSION = 2
+
+DEFAULT_MAX_BYTES = 1 << 30
+
+
+def default_cache_directory() -> str:
+    if os.name == "nt":
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~")
+    else:
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "gplates-utilities", "feature-cache")
+
+
+class FeatureCacheEntry:
+    """Cached table rows and geometry coordinates of one feature collection file.
+
+    The coordinates serve the plate statistics (see `PlateStatistics`); features themselves are always parsed
+    from the file, as the cache does not keep their properties. The columns are stored as .npy files, which are
+    memory-mapped when read, so opening an entry costs next to nothing and only the data that is used is read
+    from disk.
+    """
+
+    HEADER = "header.json"
+
+    def __init__(self, directory: str, header: dict) -> None:
+        self.directory = directory
+        self.signature = FileSignature(**header["signature"])
+        self.feature_types: list[str] = header["feature_types"]
+        self.geometry_types: list[str] = header["geometry_types"]
+        self.count: int = header["count"]
+
+    def __len__(self) -> int:
+        return self.count
+
+    def array(self, name: str) -> np.ndarray:
+        return np.load(os.path.join(self.directory, name + ".npy"), mmap_mode="r")
+
+    def rows(self, shortname: str) -> list[tuple]:
+        """Returns the feature table rows (see `feature_row`) of the cached collection."""
+        feature_types = [self.feature_types[code] for code in self.array("feature_type_codes").tolist()]
+        geometry_types = [self.geometry_types[code] for code in self.array("geometry_type_codes").tolist()]
+        return list(zip(
+            self.array("names").tolist(),
+            feature_types,
+            geometry_types,
+            self.array("plate_ids").tolist(),
+            self.array("start_times").tolist(),
+            self.array("end_times").tolist(),
+            self.array("feature_ids").tolist(),
+            [shortname] * self.count,
+            self.array("revisions").tolist(),
+        ))
+
+
+class FeatureCache:
+    """On-disk cache of parsed feature collection files.
+
+    Parsing GPML takes a long time for large files, so the table rows and geometry coordinates of every file
+    read are stored in a cache directory (one subdirectory per file). An entry is used as long as the file has
+    the same size and modification time, or failing that, the same content hash. The least recently used
+    entries are deleted once the cache grows beyond `max_bytes`.
+    """
+
+    def __init__(self, directory: str | None = None, max_bytes: int = DEFAULT_MAX_BYTES) -> None:
+        self.directory = directory or default_cache_directory()
+        self.max_bytes = max_bytes
+
+    def _entry_directory(self, path: str) -> str:
+        return os.path.join(self.directory, hashlib.blake2b(os.path.abspath(path).encode(), digest_size=16).hexdigest())
+
+    def lookup(self, path: str, signature: FileSignature | None = None) -> FeatureCacheEntry | None:
+        """Returns the cache entry of a file, or None if there is none or it is out of date. `signature` is the
+        file's current signature if the caller already has it."""
+        directory = self._entry_directory(path)
+        header_path = os.path.join(directory, FeatureCacheEntry.HEADER)
+
+        try:
+            with open(header_path, "r", encoding="utf-8") as f:
+                header = json.load(f)
+            if header["version"] != CACHE_VERSION or header["path"] != os.path.abspath(path):
+                return None
+
+            entry = FeatureCacheEntry(directory, header)
+            if not entry.signature.stat_matches(path):
+                # Touched or copied, but possibly still the same content
+                signature = signature or FileSignature.of(path)
+                if signature.size != entry.signature.size or signature.content_hash != entry.signature.content_hash:
+                    return None
+
+                entry.signature = signature
+                header["signature"] = vars(signature)
+                self._write_header(directory, header)
+
+            # Marks the entry as recently used
+            os.utime(header_path)
+        except (OSError, ValueError, KeyError, TypeError):
+            # Missing or damaged entries are simply rebuilt
+            return None
+
+        return entry
+
+    def store(self, path: str, signature: FileSignature, feature_collection: pygplates.FeatureCollection, rows: list[tuple]) -> None:
+        """Writes the cache entry of a parsed file (`rows` as returned by `feature_row`), replacing any old one."""
+        os.makedirs(self.directory, exist_ok=True)
+
+        feature_types: dict[str, int] = {}
+        geometry_types: dict[str, int] = {}
+
+        coordinates = []
+        geometry_rows = []
+        geometry_kinds = []
+        geometry_offsets = [0]
+        # Polygons with holes have several rings, other geometries are one sequence of points
+        ring_geometries = []
+        ring_offsets = [0]
+        for row, feature in enumerate(feature_collection):
+            for geometry in feature.get_all_geometries():
+                xyz = np.asarray(geometry.to_xyz_array(), dtype=np.float64).reshape(-1, 3)
+                for size in ring_sizes(geometry) or [len(xyz)]:
+                    ring_geometries.append(len(geometry_rows))
+                    ring_offsets.append(ring_offsets[-1] + size)
+                coordinates.append(xyz)
+                geometry_rows.append(row)
+                geometry_kinds.append(geometry_types.setdefault(type(geometry).__name__, len(geometry_types)))
+                geometry_offsets.append(geometry_offsets[-1] + len(xyz))
+
+        columns = list(zip(*rows)) if len(rows) != 0 else [()] * 9
+        arrays = {
+            "names": np.array(columns[0], dtype=np.str_),
+            "feature_type_codes": np.array([feature_types.setdefault(n, len(feature_types)) for n in columns[1]], dtype=np.uint16),
+            "geometry_type_codes": np.array([geometry_types.setdefault(n, len(geometry_types)) for n in columns[2]], dtype=np.uint16),
+            "plate_ids": np.array(columns[3], dtype=np.int64),
+            "start_times": np.array(columns[4], dtype=np.float64),
+            "end_times": np.array(columns[5], dtype=np.float64),
+            "feature_ids": np.array(columns[6], dtype=np.str_),
+            "revisions": np.array(columns[8], dtype=np.str_),
+            "coordinates": np.concatenate(coordinates) if len(coordinates) != 0 else np.empty((0, 3)),
+            "geometry_rows": np.array(geometry_rows, dtype=np.int64),
+            "geometry_kinds": np.array(geometry_kinds, dtype=np.uint16),
+            "geometry_offsets": np.array(geometry_offsets, dtype=np.int64),
+            "ring_geometries": np.array(ring_geometries, dtype=np.int64),
+            "ring_offsets": np.array(ring_offsets, dtype=np.int64),
+        }
+        header = {
+            "version": CACHE_VERSION,
+            "path": os.path.abspath(path),
+            "signature": vars(signature),
+            "count": len(rows),
+            "feature_types": list(feature_types),
+            "geometry_types": list(geometry_types),
+        }
+
+        # Written to a temporary directory first, so an interrupted write never leaves a broken entry behind
+        directory = self._entry_directory(path)
+        temporary = tempfile.mkdtemp(prefix=".tmp-", dir=self.directory)
+        try:
+            for name, array in arrays.items():
+                np.save(os.path.join(temporary, name + ".npy"), array)
+            self._write_header(temporary, header)
+
+            shutil.rmtree(directory, ignore_errors=True)
+            os.replace(temporary, directory)
+        except OSError:
+            shutil.rmtree(temporary, ignore_errors=True)
+            raise
+
+        self.evict()
+
+    def _write_header(self, directory: str, header: dict) -> None:
+        with open(os.path.join(directory, FeatureCacheEntry.HEADER), "w", encoding="utf-8") as f:
+            json.dump(header, f)
+
+    def _entries(self) -> list[tuple[float, int, str]]:
+        # (last use, size in bytes, directory) of every entry
+        entries = []
+        if not os.path.isdir(self.directory):
+            return entries
+
+        for name in os.listdir(self.directory):
+            directory = os.path.join(self.directory, name)
+            if name.startswith(".") or not os.path.isdir(directory):
+                continue
+            try:
+                size = sum(e.stat().st_size for e in os.scandir(directory))
+                last_use = os.stat(os.path.join(directory, FeatureCacheEntry.HEADER)).st_mtime
+            except OSError:
+                last_use = 0.0
+                size = 0
+            entries.append((last_use, size, directory))
+        return entries
+
+    def size(self) -> int:
+        return sum(size for _, size, _ in self._entries())
+
+    def evict(self) -> None:
+        """Deletes the least recently used entries until the cache is no larger than `max_bytes`."""
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, directory in entries:
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(directory, ignore_errors=True)
+            total -= size
+
+    def clear(self) -> None:
+        for _, _, directory in self._entries():
+            shutil.rmtree(directory, ignore_errors=True)
@@ -0,0 +1,115 @@
+import hashlib
+import os
+from typing import TYPE_CHECKING
+
+import numpy as np
+import pygplates
+
+if TYPE_CHECKING:
+    from core.feature_cache import FeatureCache
+
+
+class FileSignature:
+    """Size, modification time and content hash of a file, used to tell whether it changed since it was read."""
+
+    def __init__(self, size: int, mtime_ns: int, content_hash: str) -> None:
+        self.size = size
+        self.mtime_ns = mtime_ns
+        self.content_hash = content_hash
+
+    @classmethod
+    def of(cls, path: str) -> "FileSignature":
+        stat = os.stat(path)
+        digest = hashlib.blake2b(digest_size=16)
+        with open(path, "rb") as f:
+            while chunk := f.read(1 << 20):
+                digest.update(chunk)
+        return cls(stat.st_size, stat.st_mtime_ns, digest.hexdigest())
+
+    def stat_matches(self, path: str) -> bool:
+        """Cheap check (no reading) whether the file still has the same size and modification time."""
+        stat = os.stat(path)
+        return stat.st_size == self.size and stat.st_mtime_ns == self.mtime_ns
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, FileSignature) and (self.size, self.mtime_ns, self.content_hash) == (other.size, other.mtime_ns, other.content_hash)
+
+
+def feature_revision(feature: pygplates.Feature) -> str:
+    """Returns a fingerprint of a feature's properties and geometries.
+
+    pygplates does not expose GPML revision IDs, so this stands in for them: it changes whenever any property
+    value or geometry of the feature changes.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    for prop in feature:
+        digest.update(prop.get_name().to_qualified_string().encode())
+        digest.update(str(prop.get_value()).encode())
+    for geometry in feature.get_all_geometries():
+        xyz = geometry.to_xyz_array() if hasattr(geometry, "to_xyz_array") else geometry.to_xyz()
+        digest.update(type(geometry).__name__.encode())
+        digest.update(np.ascontiguousarray(xyz, dtype=np.float64).tobytes())
+    return digest.hexdigest()
+
+def feature_row(feature: pygplates.Feature, shortname: str, revision: str | None = None) -> tuple:
+    """Returns the feature table row of a feature (see FeatureTableModel for the column layout).
+
+    The row ends with the feature's revision, which the table itself ignores: `revision` if given, otherwise
+    the feature's own (see `feature_revision`).
+    """
+    start_time, end_time = feature.get_valid_time()
+    if revision is None:
+        revision = feature_revision(feature)
+    return (
+        feature.get_name(),                             # Feature Name
+        feature.get_feature_type().get_name(),          # Feature Type
+        type(feature.get_geometry()).__name__,          # Geometry Type
+        feature.get_reconstruction_plate_id(),          # Plate ID
+        start_time,                                     # Start Time
+        end_time,                                       # End Time
+        feature.get_feature_id().get_string(),          # Feature ID
+        shortname,                                      # Feature Collection (shortname)
+        revision,                                       # Revision
+    )
+
+def read_feature_collection(path: str, shortname: str, cache: "FeatureCache | None" = None, signature: FileSignature | None = None, feature_revisions: bool = False) -> tuple[FileSignature, list[tuple], pygplates.FeatureCollection | None]:
+    """Reads the signature and feature table rows of a feature collection file.
+
+    With a cache, the rows come from the file's cache entry if it is up to date, and the file is only parsed
+    (and its entry rewritten) otherwise. The parsed feature collection is returned as well, or None if the file
+    was not parsed. `signature` is the file's current signature if the caller already has it, so the file is
+    not hashed again.
+
+    Fingerprinting every feature (see `feature_revision`) takes about as long as parsing, so by default all
+    features get the file's content hash as their revision, which changes whenever the file does. With
+    `feature_revisions` (e.g. when reloading a changed file, to tell which of its features changed) every
+    feature gets its own.
+    """
+    if cache is not None:
+        entry = cache.lookup(path, signature)
+        if entry is not None:
+            return entry.signature, entry.rows(shortname), None
+
+    if signature is None:
+        signature = FileSignature.of(path)
+    feature_collection = pygplates.FeatureCollection(path)
+    revision = None if feature_revisions else signature.content_hash
+    rows = [feature_row(feature, shortname, revision) for feature in feature_collection]
+
+    if cache is not None:
+        try:
+            cache.store(path, signature, feature_collection, rows)
+        except OSError:
+            # A cache that cannot be written (full disk, no permission, ...) must not stop the file from loading
+            pass
+
+    return signature, rows, feature_collection
+
+def read_feature_rows(path: str, shortname: str, cache: "FeatureCache | None" = None) -> tuple[FileSignature, list[tuple]]:
+    """Returns the signature and feature table rows of a feature collection file (see `read_feature_collection`).
+
+    This is run in worker processes: it only returns plain values, as sending the parsed pygplates objects
+    back to the main process takes several times longer than parsing the file again.
+    """
+    signature, rows, _ = read_feature_collection(path, shortname, cache)
+    return signature, rows
@@ -0,0 +1,432 @@
+from bisect import bisect_right
+import sys
+from typing import Any
+
+import numpy as np
+from PySide6.QtCore import QAbstractTableModel, QModelIndex, QPersistentModelIndex, Qt
+
+
+class Categories:
+    """Maps a small set of repeated strings (feature types, collection names, ...) to integer codes."""
+
+    def __init__(self) -> None:
+        self.names: list[str] = []
+        self._codes: dict[str, int] = {}
+
+    def code(self, name: str) -> int:
+        code = self._codes.get(name)
+        if code is None:
+            code = len(self.names)
+            self._codes[name] = code
+            self.names.append(sys.intern(name))
+        return code
+
+    def find(self, name: str) -> int | None:
+        return self._codes.get(name)
+
+
+class _Partition:
+    """The rows of one feature collection, stored column by column. `key` identifies the collection (see
+    `FeatureTableModel`), `shortname` is shown in the Collection column."""
+
+    # The typed columns, which all grow and shrink together
+    ARRAYS = ("feature_type_codes", "geometry_type_codes", "plate_ids", "start_times", "end_times")
+
+    def __init__(self, key: str, shortname: str, collection_code: int) -> None:
+        self.key = key
+        self.shortname = shortname
+        self.collection_code = collection_code
+
+        self.count = 0
+        self.names: list[str] = []
+        self.feature_ids: list[str] = []
+        self.feature_type_codes = np.empty(0, dtype=np.uint16)
+        self.geometry_type_codes = np.empty(0, dtype=np.uint16)
+        self.plate_ids = np.empty(0, dtype=np.int64)
+        self.start_times = np.empty(0, dtype=np.float64)
+        self.end_times = np.empty(0, dtype=np.float64)
+
+    def column(self, attribute: str) -> np.ndarray:
+        return getattr(self, attribute)[:self.count]
+
+    def reserve(self, count: int) -> None:
+        capacity = len(self.plate_ids)
+        if count <= capacity:
+            return
+
+        # Grow geometrically so that appending in batches stays amortized O(1) per row
+        capacity = max(count, 2 * capacity, 256)
+        for attribute in self.ARRAYS:
+            old = getattr(self, attribute)
+            new = np.empty(capacity, dtype=old.dtype)
+            new[:self.count] = old[:self.count]
+            setattr(self, attribute, new)
+
+    def insert(self, position: int, rows: list[tuple], feature_types: Categories, geometry_types: Categories) -> None:
+        first = position
+        last = first + len(rows) - 1
+        self.reserve(self.count + len(rows))
+
+        # Make room in the arrays (a no-op when appending)
+        for attribute in self.ARRAYS:
+            array = getattr(self, attribute)
+            array[last + 1:self.count + len(rows)] = array[first:self.count]
+
+        columns = list(zip(*rows))
+        self.names[first:first] = [sys.intern(name) for name in columns[FeatureTableModel.NAME]]
+        self.feature_ids[first:first] = columns[FeatureTableModel.FEATURE_ID]
+        self.feature_type_codes[first:last + 1] = [feature_types.code(n) for n in columns[FeatureTableModel.FEATURE_TYPE]]
+        self.geometry_type_codes[first:last + 1] = [geometry_types.code(n) for n in columns[FeatureTableModel.GEOMETRY_TYPE]]
+        self.plate_ids[first:last + 1] = columns[FeatureTableModel.PLATE_ID]
+        self.start_times[first:last + 1] = columns[FeatureTableModel.START_TIME]
+        self.end_times[first:last + 1] = columns[FeatureTableModel.END_TIME]
+        self.count += len(rows)
+
+    def remove(self, position: int, count: int) -> None:
+        del self.names[position:position + count]
+        del self.feature_ids[position:position + count]
+        for attribute in self.ARRAYS:
+            array = getattr(self, attribute)
+            array[position:self.count - count] = array[position + count:self.count]
+        self.count -= count
+
+    def set_row(self, row: int, values: tuple, feature_types: Categories, geometry_types: Categories) -> None:
+        self.names[row] = sys.intern(values[FeatureTableModel.NAME])
+        self.feature_ids[row] = values[FeatureTableModel.FEATURE_ID]
+        self.feature_type_codes[row] = feature_types.code(values[FeatureTableModel.FEATURE_TYPE])
+        self.geometry_type_codes[row] = geometry_types.code(values[FeatureTableModel.GEOMETRY_TYPE])
+        self.plate_ids[row] = values[FeatureTableModel.PLATE_ID]
+        self.start_times[row] = values[FeatureTableModel.START_TIME]
+        self.end_times[row] = values[FeatureTableModel.END_TIME]
+
+
+class FeatureTableModel(QAbstractTableModel):
+    """Table of all loaded features, stored column by column and partitioned by feature collection.
+
+    Plate IDs and valid times are kept as typed NumPy arrays, feature types, geometry types and collection
+    names as integer codes into `Categories`, and only names and feature IDs as (interned) Python strings.
+    Display text is created in `data()` when a view asks for it, using the same formatting the table always
+    had (so times still show up as "inf"/"-inf" for the time delegates).
+
+    Every collection's rows are a contiguous block with their own arrays, so loading, reloading or unloading
+    a collection only touches that collection's data and unloading is a single row range removal. Collections
+    are identified by a key (the session uses their file path), as files in different directories may have the
+    same shortname; without one, rows go to the collection named in their Collection column.
+    """
+
+    HEADERS = ["Feature Name", "Feature Type", "Geometry Type", "Plate ID", "Start Time", "End Time", "Feature ID", "Feature Collection"]
+
+    NAME, FEATURE_TYPE, GEOMETRY_TYPE, PLATE_ID, START_TIME, END_TIME, FEATURE_ID, COLLECTION = range(8)
+
+    # Array attribute of a partition holding each typed column
+    _COLUMN_ARRAYS = {
+        FEATURE_TYPE: "feature_type_codes",
+        GEOMETRY_TYPE: "geometry_type_codes",
+        PLATE_ID: "plate_ids",
+        START_TIME: "start_times",
+        END_TIME: "end_times",
+    }
+    _COLUMN_TYPES = {
+        FEATURE_TYPE: np.uint16,
+        GEOMETRY_TYPE: np.uint16,
+        PLATE_ID: np.int64,
+        START_TIME: np.float64,
+        END_TIME: np.float64,
+        COLLECTION: np.uint16,
+    }
+
+    def __init__(self, parent=None) -> None:
+        super().__init__(parent)
+
+        self.feature_types = Categories()
+        self.geometry_types = Categories()
+        self.collections = Categories()
+
+        # Incremented on every change of the rows
+        self.revision = 0
+
+        self._partitions: list[_Partition] = []
+        self._offsets: list[int] = []     # First row of every partition
+        self._count = 0
+
+    # --- Partitions ---
+
+    def _update_offsets(self) -> None:
+        self._offsets = []
+        offset = 0
+        for partition in self._partitions:
+            self._offsets.append(offset)
+            offset += partition.count
+        self._count = offset
+
+    def _partition_index(self, key: str) -> int | None:
+        return next((i for i, p in enumerate(self._partitions) if p.key == key), None)
+
+    def _locate(self, row: int) -> tuple[_Partition, int]:
+        # Partition containing a row and the row's position inside it (skips empty partitions)
+        i = bisect_right(self._offsets, row) - 1
+        return self._partitions[i], row - self._offsets[i]
+
+    def collection_range(self, key: str) -> tuple[int, int]:
+        """Returns the first row and the number of rows of a feature collection."""
+        i = self._partition_index(key)
+        if i is None:
+            return self._count, 0
+        return self._offsets[i], self._partitions[i].count
+
+    def collection_rows(self, key: str) -> np.ndarray:
+        """Returns the (ascending) rows of a feature collection."""
+        first, count = self.collection_range(key)
+        return np.arange(first, first + count)
+
+    # --- Typed column access ---
+
+    def column(self, column: int, start: int = 0, stop: int | None = None) -> np.ndarray:
+        """Returns rows [start, stop) of a typed column (category codes for type and collection columns)."""
+        stop = self._count if stop is None else stop
+        parts = []
+        for partition, offset in zip(self._partitions, self._offsets):
+            first = max(start - offset, 0)
+            last = min(stop - offset, partition.count)
+            if first >= last:
+                continue
+            if column == self.COLLECTION:
+                parts.append(np.full(last - first, partition.collection_code, dtype=np.uint16))
+            else:
+                parts.append(partition.column(self._COLUMN_ARRAYS[column])[first:last])
+
+        if len(parts) == 0:
+            return np.empty(0, dtype=self._COLUMN_TYPES[column])
+        return np.concatenate(parts)
+
+    @property
+    def feature_type_codes(self) -> np.ndarray:
+        return self.column(self.FEATURE_TYPE)
+
+    @property
+    def geometry_type_codes(self) -> np.ndarray:
+        return self.column(self.GEOMETRY_TYPE)
+
+    @property
+    def collection_codes(self) -> np.ndarray:
+        return self.column(self.COLLECTION)
+
+    @property
+    def plate_ids(self) -> np.ndarray:
+        return self.column(self.PLATE_ID)
+
+    @property
+    def start_times(self) -> np.ndarray:
+        return self.column(self.START_TIME)
+
+    @property
+    def end_times(self) -> np.ndarray:
+        return self.column(self.END_TIME)
+
+    def category_mask(self, column: int, names: list[str], start: int = 0, stop: int | None = None) -> np.ndarray:
+        """Rows [start, stop) whose category in the given column is one of `names`."""
+        categories = {self.FEATURE_TYPE: self.feature_types, self.GEOMETRY_TYPE: self.geometry_types, self.COLLECTION: self.collections}[column]
+        wanted = [code for code in (categories.find(name) for name in names) if code is not None]
+        return np.isin(self.column(column, start, stop), wanted)
+
+    def time_mask(self, time: float, start: int = 0, stop: int | None = None) -> np.ndarray:
+        """Rows [start, stop) of features that exist at the given time."""
+        return (self.column(self.START_TIME, start, stop) >= time) & (time >= self.column(self.END_TIME, start, stop))
+
+    def feature_id(self, row: int) -> str:
+        partition, i = self._locate(row)
+        return partition.feature_ids[i]
+
+    def collection_name(self, row: int) -> str:
+        return self._locate(row)[0].shortname
+
+    # --- Qt model interface ---
+
+    def rowCount(self, parent: QModelIndex | QPersistentModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else self._count
+
+    def columnCount(self, parent: QModelIndex | QPersistentModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def headerData(self, section: int, orientation: Qt.Orientation, role: int = Qt.ItemDataRole.DisplayRole) -> Any:
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal and 0 <= section < len(self.HEADERS):
+            return self.HEADERS[section]
+        return None
+
+    def data(self, index: QModelIndex | QPersistentModelIndex, role: int = Qt.ItemDataRole.DisplayRole) -> Any:
+        if role != Qt.ItemDataRole.DisplayRole or not index.isValid():
+            return None
+
+        row = index.row()
+        column = index.column()
+        if row >= self._count:
+            return None
+
+        partition, i = self._locate(row)
+
+        if column == self.NAME:
+            return partition.names[i]
+        elif column == self.FEATURE_TYPE:
+            return self.feature_types.names[partition.feature_type_codes[i]]
+        elif column == self.GEOMETRY_TYPE:
+            return self.geometry_types.names[partition.geometry_type_codes[i]]
+        elif column == self.PLATE_ID:
+            return str(int(partition.plate_ids[i]))
+        elif column == self.START_TIME:
+            return str(float(partition.start_times[i]))
+        elif column == self.END_TIME:
+            return str(float(partition.end_times[i]))
+        elif column == self.FEATURE_ID:
+            return partition.feature_ids[i]
+        elif column == self.COLLECTION:
+            return partition.shortname
+        return None
+
+    # --- Editing ---
+
+    def append_rows(self, rows: list[tuple], key: str | None = None) -> None:
+        """Appends rows of (name, feature type, geometry type, plate ID, start time, end time, feature ID, collection).
+
+        Rows may carry further values after these, they are ignored. Rows are added at the end of their
+        collection's block (a new block at the end of the table for collections not seen before). With a `key`
+        all rows belong to that collection.
+        """
+        if key is not None:
+            first, count = self.collection_range(key)
+            self.insert_rows(first + count, rows, key)
+            return
+
+        # Hand every run of rows of the same collection to its partition
+        start = 0
+        for end in range(1, len(rows) + 1):
+            if end == len(rows) or rows[end][self.COLLECTION] != rows[start][self.COLLECTION]:
+                shortname = rows[start][self.COLLECTION]
+                first, count = self.collection_range(shortname)
+                self.insert_rows(first + count, rows[start:end])
+                start = end
+
+    def insert_rows(self, position: int, rows: list[tuple], key: str | None = None) -> None:
+        """Inserts rows (see `append_rows`) of one collection before the given row, which has to be inside (or
+        directly after) that collection's block."""
+        if len(rows) == 0:
+            return
+
+        shortname = rows[0][self.COLLECTION]
+        key = shortname if key is None else key
+        i = self._partition_index(key)
+        if i is None:
+            self._partitions.append(_Partition(key, shortname, self.collections.code(shortname)))
+            self._update_offsets()
+            i = len(self._partitions) - 1
+
+        partition = self._partitions[i]
+        offset = self._offsets[i]
+        if not offset <= position <= offset + partition.count:
+            raise IndexError(f"Row {position} is outside of the rows of '{key}'")
+
+        self.beginInsertRows(QModelIndex(), position, position + len(rows) - 1)
+        partition.insert(position - offset, rows, self.feature_types, self.geometry_types)
+        self._update_offsets()
+        self.revision += 1
+        self.endInsertRows()
+
+    def row_values(self, row: int) -> tuple:
+        """Returns a row in the form `append_rows` takes."""
+        partition, i = self._locate(row)
+        return (
+            partition.names[i],
+            self.feature_types.names[partition.feature_type_codes[i]],
+            self.geometry_types.names[partition.geometry_type_codes[i]],
+            int(partition.plate_ids[i]),
+            float(partition.start_times[i]),
+            float(partition.end_times[i]),
+            partition.feature_ids[i],
+            partition.shortname,
+        )
+
+    def update_collection(self, key: str, rows: list[tuple]) -> tuple[int, int, int]:
+        """Brings the rows of a collection in line with `rows` using row-level changes.
+
+        Rows are matched by feature ID: rows of features that are gone are removed, rows whose values differ
+        are changed in place and rows of new features are inserted after the collection's last row. Rows that
+        did not change are left alone, so views keep their selections and scroll positions.
+
+        Returns the number of removed, changed and inserted rows.
+        """
+        new_rows = {row[self.FEATURE_ID]: row for row in rows}
+
+        # Removed features
+        block = self.collection_rows(key)
+        removed = np.array([row for row in block.tolist() if self.feature_id(row) not in new_rows], dtype=np.intp)
+        self._remove_row_runs(removed)
+
+        # Changed features, signalled once per run of consecutive changed rows
+        block = self.collection_rows(key)
+        changed = []
+        for row in block.tolist():
+            values = tuple(new_rows[self.feature_id(row)][:len(self.HEADERS)])
+            if self.row_values(row) != values:
+                partition, i = self._locate(row)
+                partition.set_row(i, values, self.feature_types, self.geometry_types)
+                changed.append(row)
+
+        if len(changed) != 0:
+            self.revision += 1
+            changed_rows = np.array(changed, dtype=np.intp)
+            for run in np.split(changed_rows, np.flatnonzero(np.diff(changed_rows) != 1) + 1):
+                self.dataChanged.emit(self.index(int(run[0]), 0), self.index(int(run[-1]), len(self.HEADERS) - 1))
+
+        # New features
+        existing = {self.feature_id(row) for row in block.tolist()}
+        added = [row for row in rows if row[self.FEATURE_ID] not in existing]
+        first, count = self.collection_range(key)
+        self.insert_rows(first + count, added, key)
+
+        return len(removed), len(changed), len(added)
+
+    def removeRows(self, row: int, count: int, parent: QModelIndex | QPersistentModelIndex = QModelIndex()) -> bool:
+        """Removes rows, which all have to belong to the same collection."""
+        if parent.isValid() or count <= 0 or row < 0 or row + count > self._count:
+            return False
+
+        partition, i = self._locate(row)
+        if i + count > partition.count:
+            return False
+
+        self.beginRemoveRows(QModelIndex(), row, row + count - 1)
+        partition.remove(i, count)
+        self._update_offsets()
+        self.revision += 1
+        self.endRemoveRows()
+        return True
+
+    def clear(self) -> None:
+        self.beginResetModel()
+        self._partitions = []
+        self._update_offsets()
+        self.revision += 1
+        self.endResetModel()
+
+    def _remove_row_runs(self, rows: np.ndarray) -> None:
+        # Removes the given ascending rows one run of consecutive rows at a time, last run first
+        if len(rows) == 0:
+            return
+
+        breaks = np.flatnonzero(np.diff(rows) != 1) + 1
+        for run in reversed(np.split(rows, breaks)):
+            self.removeRows(int(run[0]), len(run))
+
+    def remove_collection(self, key: str) -> None:
+        """Removes all rows of a feature collection with a single row range removal."""
+        i = self._partition_index(key)
+        if i is None:
+            return
+
+        first, count = self._offsets[i], self._partitions[i].count
+        if count != 0:
+            self.beginRemoveRows(QModelIndex(), first, first + count - 1)
+        del self._partitions[i]
+        self._update_offsets()
+        self.revision += 1
+        if count != 0:
+            self.endRemoveRows()
@@ -0,0 +1,151 @@
+import numpy as np
+from pygplates.pygplates import PolylineOnSphere
+
+from core import profiling
+from core.arc_geometry import angular_distances, normalized, to_unit_vectors
+from core.edge_index import EdgeIndex
+
+
+# Rifts that end this close (in radians, about 6 m on Earth) to a line still cut it, as do crossings this close to
+# a vertex of the line, which cut it at that vertex instead of leaving a tiny piece
+DEFAULT_TOLERANCE = 1e-6
+
+
+def _concatenated(sequences: list[np.ndarray]) -> tuple[np.ndarray, np.ndarray]:
+    # All points one after another and the index of every segment's start point
+    sizes = np.array([len(points) for points in sequences], dtype=np.intp)
+    offsets = np.concatenate([[0], np.cumsum(sizes)])
+    points = np.concatenate(sequences) if len(sequences) != 0 else np.empty((0, 3))
+
+    # Segments are every point but the last of its sequence (the segments joining two sequences do not exist)
+    is_last = np.zeros(len(points), dtype=bool)
+    is_last[offsets[1:][sizes > 0] - 1] = True
+    return points, np.flatnonzero(~is_last)
+
+def line_cuts(lines: list[np.ndarray], rifts: list[np.ndarray], tolerance: float = DEFAULT_TOLERANCE) -> list[np.ndarray]:
+    """Finds where the rifts meet the lines, for many lines at once.
+
+    `lines` and `rifts` are (n, 3) unit vector arrays. All segments of all lines are tested against all segments
+    of all rifts in one batched pass, with the candidate pairs taken from an `EdgeIndex` over the lines. Rifts
+    that cross a line or end on it (within `tolerance`) cut it there, segments running along each other do not.
+
+    Returns for every line the positions of its cuts as an (m, 2) array of segment index and angular distance
+    from the segment's start, sorted along the line. Cuts within `tolerance` of a vertex are moved onto it (as
+    distance 0 on the segment that starts there), cuts at either end of the line are dropped.
+    """
+    cuts = [np.empty((0, 2)) for _ in lines]
+    if len(lines) == 0 or len(rifts) == 0:
+        return cuts
+
+    line_points, line_segments = _concatenated(lines)
+    rift_points, rift_segments = _concatenated(rifts)
+    if len(line_segments) == 0 or len(rift_segments) == 0:
+        return cuts
+
+    # There are far fewer rift segments than line segments, so the lines are indexed (all points as one polyline,
+    # the segments joining two lines are dropped afterwards) and the rift segments are the queries
+    line_index = EdgeIndex(line_points, closed=False)
+    is_line_segment = np.zeros(len(line_index), dtype=bool)
+    is_line_segment[line_segments] = True
+
+    queries, edges = line_index.query_arcs(rift_points[rift_segments], rift_points[rift_segments + 1], tolerance=tolerance)
+    real = is_line_segment[edges]
+    queries = queries[real]; edges = edges[real]
+    profiling.count("line segment pairs", len(queries))
+
+    a_starts = line_index.edge_starts[edges]; a_ends = line_index.edge_ends[edges]
+    b_starts = rift_points[rift_segments[queries]]; b_ends = rift_points[rift_segments[queries] + 1]
+    a_normals = normalized(np.cross(a_starts, a_ends))
+    b_normals = normalized(np.cross(b_starts, b_ends))
+
+    # Segments meet where the ends of each do not lie on the same side of the other's great circle, ends within
+    # the tolerance of it count as on both sides (see `core.polygon_boolean` for why signs and not angle sums)
+    limit = np.sin(tolerance)
+    a_sides = np.column_stack((np.einsum("ij,ij->i", a_starts, b_normals), np.einsum("ij,ij->i", a_ends, b_normals)))
+    b_sides = np.column_stack((np.einsum("ij,ij->i", b_starts, a_normals), np.einsum("ij,ij->i", b_ends, a_normals)))
+    collinear = (np.abs(a_sides) <= limit).all(axis=1) | (np.abs(b_sides) <= limit).all(axis=1)
+    hit = (
+        (a_sides.min(axis=1) <= limit) & (a_sides.max(axis=1) >= -limit)
+        & (b_sides.min(axis=1) <= limit) & (b_sides.max(axis=1) >= -limit)
+        & ~collinear
+    )
+
+    # The crossing of the great circles on the side of the line segment, which has to be the side of the rift
+    # segment as well (segments on opposite sides of the sphere pass the sign tests too)
+    points = normalized(np.cross(a_normals, b_normals))
+    points *= np.where(np.einsum("ij,ij->i", points, a_starts + a_ends) < 0.0, -1.0, 1.0)[:, None]
+    hit &= np.einsum("ij,ij->i", points, b_starts + b_ends) > 0.0
+
+    segments = edges[hit]
+    distances = np.minimum(angular_distances(a_starts[hit], points[hit]), angular_distances(a_starts[hit], a_ends[hit]))
+    lengths = angular_distances(a_starts[hit], a_ends[hit])
+
+    # Cuts next to the end of a segment move onto the start of the next one
+    at_end = lengths - distances <= tolerance
+    segments = segments + at_end
+    distances = np.where(at_end | (distances <= tolerance), 0.0, distances)
+    profiling.count("line cuts", len(segments))
+
+    order = np.lexsort((distances, segments))
+    segments = segments[order]; distances = distances[order]
+    offsets = np.concatenate([[0], np.cumsum([len(line) for line in lines])])
+    line_of_cut = np.searchsorted(offsets, segments, side="right") - 1
+
+    for i in np.unique(line_of_cut).tolist():
+        mine = line_of_cut == i
+        local = np.column_stack((segments[mine] - offsets[i], distances[mine]))
+        # Cuts at the first or past the last point of a line cut nothing off
+        local = local[(local[:, 0] != 0) | (local[:, 1] != 0.0)]
+        local = local[local[:, 0] < len(lines[i]) - 1]
+        if len(local) != 0:
+            # Several rift segments meeting the line at one point (e.g. at a rift vertex) make one cut
+            separate = np.ones(len(local), dtype=bool)
+            separate[1:] = (local[1:, 0] != local[:-1, 0]) | (local[1:, 1] - local[:-1, 1] > tolerance)
+            local = local[separate]
+        cuts[i] = local
+
+    return cuts
+
+def cut_line(points: np.ndarray, cuts: np.ndarray) -> list[np.ndarray]:
+    """Cuts a line (an (n, 3) unit vector array) at the positions returned by `line_cuts`.
+
+    Neighbouring pieces share the point of the cut between them.
+    """
+    pieces = []
+    piece = [points[:1]]
+    next_vertex = 1
+    for segment, distance in cuts.tolist():
+        segment = int(segment)
+        piece.append(points[next_vertex:segment + 1])
+        next_vertex = segment + 1
+        if distance == 0.0:
+            end = points[segment]
+        else:
+            # The point `distance` along the great circle from the segment's start
+            start = points[segment]
+            direction = points[segment + 1] - np.dot(points[segment + 1], start) * start
+            end = np.cos(distance) * start + np.sin(distance) * direction / np.linalg.norm(direction)
+            piece.append(end[None])
+        pieces.append(np.concatenate(piece))
+        piece = [end[None]]
+    piece.append(points[next_vertex:])
+    pieces.append(np.concatenate(piece))
+
+    return pieces
+
+def split_lines_by_rifts(lines: list[PolylineOnSphere], rifts: list[PolylineOnSphere], tolerance: float = DEFAULT_TOLERANCE) -> list[list[PolylineOnSphere]]:
+    """Splits every line wherever one of the rifts crosses it (see `line_cuts`) and returns the pieces of each.
+
+    Lines that are not cut are returned as they are.
+    """
+    line_points = [to_unit_vectors(line) for line in lines]
+    with profiling.phase("find line cuts"):
+        cuts = line_cuts(line_points, [to_unit_vectors(rift) for rift in rifts], tolerance)
+
+    results = []
+    for line, points, line_cut in zip(lines, line_points, cuts):
+        if len(line_cut) == 0:
+            results.append([line])
+        else:
+            results.append([PolylineOnSphere(piece) for piece in cut_line(points, line_cut)])
+    return results
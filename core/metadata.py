@@ -1,6 +1,72 @@
+from math import floor
+
 from pygplates.pygplates import PointOnSphere
 
 class MetaPoint:
     def __init__(self, point: PointOnSphere, is_inside: bool) -> None:
         self.point = point
-        self.is_inside = is_inside
\ No newline at end of file
+        self.is_inside = is_inside
+
+
+class VertexRegistry:
+    """Gives every distinct point an integer id, so points can be compared and looked up in O(1).
+
+    Two points get the same id exactly when they compare equal (pygplates compares points with a small
+    tolerance), which lets the splitter use sets and dicts where it would otherwise scan lists with `in`.
+    Points are bucketed in a grid over their xyz coordinates; a lookup only has to check the neighbouring
+    cells when the point lies closer to a cell border than the equality tolerance.
+    """
+
+    # Grid cell size and an upper bound for the distance (in xyz) at which pygplates still considers points equal
+    CELL_SIZE = 1e-4
+    TOLERANCE = 1e-5
+
+    def __init__(self) -> None:
+        self.points: list[PointOnSphere] = []
+        self._cells: dict[tuple[int, int, int], list[int]] = {}
+
+    def __len__(self) -> int:
+        return len(self.points)
+
+    def _cell_keys(self, point: PointOnSphere) -> tuple[tuple[int, int, int], list[tuple[int, int, int]]]:
+        offsets_per_axis = []
+        home = []
+        for value in point.to_xyz():
+            scaled = value / self.CELL_SIZE
+            cell = floor(scaled)
+            home.append(cell)
+
+            offsets = [cell]
+            fraction = scaled - cell
+            if fraction < self.TOLERANCE / self.CELL_SIZE:
+                offsets.append(cell - 1)
+            elif fraction > 1 - self.TOLERANCE / self.CELL_SIZE:
+                offsets.append(cell + 1)
+            offsets_per_axis.append(offsets)
+
+        keys = [(x, y, z) for x in offsets_per_axis[0] for y in offsets_per_axis[1] for z in offsets_per_axis[2]]
+        return (home[0], home[1], home[2]), keys
+
+    def find(self, point: PointOnSphere) -> int | None:
+        """Returns the id of a registered point equal to `point`, or None."""
+        _, keys = self._cell_keys(point)
+        return self._find(point, keys)
+
+    def _find(self, point: PointOnSphere, keys) -> int | None:
+        found = None
+        for key in keys:
+            for id in self._cells.get(key, ()):
+                if (found is None or id < found) and self.points[id] == point:
+                    found = id
+        return found
+
+    def add(self, point: PointOnSphere) -> int:
+        """Returns the id of `point`, registering it first if no equal point is known yet."""
+        home, keys = self._cell_keys(point)
+        found = self._find(point, keys)
+        if found is not None:
+            return found
+
+        self.points.append(point)
+        self._cells.setdefault(home, []).append(len(self.points) - 1)
+        return len(self.points) - 1
@@ -0,0 +1,300 @@
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+import os
+from typing import Callable
+
+import numpy as np
+from pygplates.pygplates import PolygonOnSphere, PolylineOnSphere
+
+from core import profiling
+from core.arc_geometry import to_unit_vectors
+from core.edge_index import EdgeIndex
+from core.line_splitter import DEFAULT_TOLERANCE, cut_line, line_cuts
+from core.plate_splitter import split_plate_by_line, split_plate_by_lines, split_plate_by_polygon
+from core.polygon_boolean import DEFAULT_TOLERANCE as CUTTER_TOLERANCE, PolygonCutter
+
+
+def default_worker_count() -> int:
+    return os.cpu_count() or 1
+
+
+class SplitCancelled(Exception):
+    """Raised when a split is cancelled (see `split_plate_batches`)."""
+
+
+# The rifts of every batch are the same for all jobs of a pool, so each worker receives them only once when it starts
+_worker_lines: list[list[PolylineOnSphere]] = []
+_worker_line_indexes: list[list[EdgeIndex]] = []
+_worker_profiler: profiling.Profiler | None = None
+
+def _init_worker(lines_xyz: list[list[np.ndarray]], profile: bool = False) -> None:
+    global _worker_lines, _worker_line_indexes, _worker_profiler
+    _worker_lines = [[PolylineOnSphere(xyz) for xyz in batch] for batch in lines_xyz]
+    _worker_line_indexes = [[EdgeIndex(line, closed=False) for line in batch] for batch in _worker_lines]
+    _worker_profiler = profiling.Profiler(enabled=True) if profile else None
+
+def _rings(polygon: PolygonOnSphere) -> list[np.ndarray]:
+    # Plates and pieces can have holes, which one xyz array cannot hold
+    return [to_unit_vectors(polygon.get_exterior_ring_points())] + [to_unit_vectors(polygon.get_interior_ring_points(i)) for i in range(polygon.get_number_of_interior_rings())]
+
+def _from_rings(rings: list[np.ndarray]) -> PolygonOnSphere:
+    return PolygonOnSphere(rings[0], rings[1:]) if len(rings) > 1 else PolygonOnSphere(rings[0])
+
+def _split_worker(job: tuple[int, list[np.ndarray]]) -> tuple[list[list[np.ndarray]], dict | None]:
+    batch, plate_rings = job
+    if _worker_profiler is None:
+        plates = split_plate_by_lines(_from_rings(plate_rings), _worker_lines[batch], _worker_line_indexes[batch])
+        return [_rings(p) for p in plates], None
+
+    # Every job sends back the statistics of its own split only
+    _worker_profiler.reset()
+    with _worker_profiler.activate(), profiling.phase("split plate"):
+        plates = split_plate_by_lines(_from_rings(plate_rings), _worker_lines[batch], _worker_line_indexes[batch])
+    return [_rings(p) for p in plates], _worker_profiler.to_dict()
+
+
+# Spawning the workers (which import pygplates) takes about a second, while splitting serially takes some 10
+# microseconds per plate vertex, so below this many plate vertices starting a pool takes longer than the split
+PARALLEL_PLATE_VERTICES = 100000
+
+def split_plate_batches(batches: list[tuple[list[PolygonOnSphere], list[PolylineOnSphere]]], workers: int = 1, progress: Callable[[int, int], None] | None = None, is_cancelled: Callable[[], bool] | None = None) -> list[list[list[PolygonOnSphere]]]:
+    """Splits several batches of plates, each by its own lines (see `split_plate_by_lines`), e.g. the same plates
+    and rift reconstructed to a series of times. Returns the pieces of each plate of each batch, in order.
+
+    With more than one worker and at least `PARALLEL_PLATE_VERTICES` plate vertices, all plates of all batches
+    are split in one process pool. Plates and pieces travel to and from the workers as xyz coordinate arrays of
+    their rings, which pygplates turns back into exactly the same points and holes, so the result is identical to splitting serially.
+
+    `progress` is called with the number of plates done and the total after every plate. `is_cancelled` is
+    checked as often; once it returns True the split stops with `SplitCancelled`.
+    """
+    plate_count = sum(len(plates) for plates, _ in batches)
+    profiling.count("plates", plate_count)
+    done = 0
+
+    def plate_done():
+        nonlocal done
+        done += 1
+        if progress is not None:
+            progress(done, plate_count)
+        if is_cancelled is not None and is_cancelled():
+            raise SplitCancelled()
+
+    if workers <= 1 or plate_count <= 1 or sum(len(plate) for plates, _ in batches for plate in plates) < PARALLEL_PLATE_VERTICES:
+        results = []
+        for plates, lines in batches:
+            line_indexes = [EdgeIndex(line, closed=False) for line in lines]
+            batch_results = []
+            for plate in plates:
+                with profiling.phase("split plate"):
+                    batch_results.append(split_plate_by_lines(plate, lines, line_indexes))
+                plate_done()
+            results.append(batch_results)
+        profiling.count("pieces", sum(len(pieces) for batch_results in results for pieces in batch_results))
+        return results
+
+    workers = min(workers, plate_count)
+    jobs = [(b, _rings(plate)) for b, (plates, _) in enumerate(batches) for plate in plates]
+    # Small enough chunks that progress is reported and a cancel takes effect without long waits
+    chunksize = max(1, min(32, len(jobs) // (workers * 4)))
+    lines_xyz = [[line.to_xyz_array() for line in lines] for _, lines in batches]
+    profiler = profiling.active_profiler()
+
+    # Forking a process that runs Qt (or any other) threads is not safe, so the workers are always spawned
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_worker, initargs=(lines_xyz, profiler is not None)) as pool:
+        try:
+            results = []
+            outputs = iter(pool.map(_split_worker, jobs, chunksize=chunksize))
+            for plates, _ in batches:
+                batch_results = []
+                for _ in plates:
+                    pieces_rings, stats = next(outputs)
+                    batch_results.append([_from_rings(rings) for rings in pieces_rings])
+                    if profiler is not None and stats is not None:
+                        profiler.merge(stats, " (workers)")
+                    plate_done()
+                results.append(batch_results)
+        except SplitCancelled:
+            # Chunks that were not started yet are dropped, leaving the pool only waits for the running ones
+            pool.shutdown(wait=False, cancel_futures=True)
+            raise
+        profiling.count("pieces", sum(len(pieces) for batch_results in results for pieces in batch_results))
+        return results
+
+def split_plates_by_lines(plates: list[PolygonOnSphere], lines: list[PolylineOnSphere], workers: int = 1) -> list[list[PolygonOnSphere]]:
+    """Splits every plate by the same lines, see `split_plate_batches`."""
+    return split_plate_batches([(plates, lines)], workers)[0]
+
+def split_plates_by_line(plates: list[PolygonOnSphere], line: PolylineOnSphere, workers: int = 1) -> list[list[PolygonOnSphere]]:
+    """Splits every plate by the same line, see `split_plates_by_lines`."""
+    if workers <= 1 or len(plates) <= 1:
+        return [split_plate_by_line(plate, line) for plate in plates]
+    return split_plates_by_lines(plates, [line], workers)
+
+
+# Finding the cuts of lines is a few vectorized passes, so below this many line vertices starting a pool takes
+# longer than the whole split
+PARALLEL_LINE_VERTICES = 200000
+# Lines per batched pass, small enough that progress is reported and a cancel takes effect without long waits
+LINES_PER_PASS = 256
+
+_worker_rifts: list[list[np.ndarray]] = []
+
+def _init_line_worker(rifts_xyz: list[list[np.ndarray]], profile: bool = False) -> None:
+    global _worker_rifts, _worker_profiler
+    _worker_rifts = rifts_xyz
+    _worker_profiler = profiling.Profiler(enabled=True) if profile else None
+
+def _cut_lines(lines_xyz: list[np.ndarray], rifts_xyz: list[np.ndarray], tolerance: float) -> list[list[np.ndarray]]:
+    with profiling.phase("find line cuts"):
+        cuts = line_cuts(lines_xyz, rifts_xyz, tolerance)
+    return [cut_line(xyz, line_cut) if len(line_cut) != 0 else [xyz] for xyz, line_cut in zip(lines_xyz, cuts)]
+
+def _split_lines_worker(job: tuple[int, list[np.ndarray], float]) -> tuple[list[list[np.ndarray]], dict | None]:
+    batch, lines_xyz, tolerance = job
+    if _worker_profiler is None:
+        return _cut_lines(lines_xyz, _worker_rifts[batch], tolerance), None
+
+    _worker_profiler.reset()
+    with _worker_profiler.activate():
+        pieces = _cut_lines(lines_xyz, _worker_rifts[batch], tolerance)
+    return pieces, _worker_profiler.to_dict()
+
+
+def split_line_batches(batches: list[tuple[list[PolylineOnSphere], list[PolylineOnSphere]]], workers: int = 1, progress: Callable[[int, int], None] | None = None, is_cancelled: Callable[[], bool] | None = None, tolerance: float = DEFAULT_TOLERANCE) -> list[list[list[PolylineOnSphere]]]:
+    """Splits several batches of lines (e.g. subduction zones), each by its own rifts, wherever a rift crosses
+    a line (see `core.line_splitter.line_cuts`). Returns the pieces of each line of each batch, in order; lines
+    that are not cut are returned as they are.
+
+    The cuts of up to `LINES_PER_PASS` lines are found in one batched pass. Only batches with more than
+    `PARALLEL_LINE_VERTICES` line vertices in total are worth a process pool, smaller ones are split serially
+    whatever `workers` is. `progress` and `is_cancelled` work as in `split_plate_batches`, counting lines.
+    """
+    line_count = sum(len(lines) for lines, _ in batches)
+    profiling.count("lines", line_count)
+    done = 0
+
+    def lines_done(count: int):
+        nonlocal done
+        done += count
+        if progress is not None:
+            progress(done, line_count)
+        if is_cancelled is not None and is_cancelled():
+            raise SplitCancelled()
+
+    def to_lines(lines: list[PolylineOnSphere], pieces_xyz: list[list[np.ndarray]]) -> list[list[PolylineOnSphere]]:
+        return [[line] if len(pieces) == 1 else [PolylineOnSphere(xyz) for xyz in pieces] for line, pieces in zip(lines, pieces_xyz)]
+
+    lines_xyz = [[to_unit_vectors(line) for line in lines] for lines, _ in batches]
+    rifts_xyz = [[to_unit_vectors(rift) for rift in rifts] for _, rifts in batches]
+    vertex_count = sum(len(xyz) for batch in lines_xyz for xyz in batch)
+    chunks = [(b, start) for b, batch in enumerate(lines_xyz) for start in range(0, len(batch), LINES_PER_PASS)]
+
+    if workers <= 1 or len(chunks) <= 1 or vertex_count <= PARALLEL_LINE_VERTICES:
+        results = [[] for _ in batches]
+        for b, start in chunks:
+            lines = batches[b][0][start:start + LINES_PER_PASS]
+            results[b].extend(to_lines(lines, _cut_lines(lines_xyz[b][start:start + LINES_PER_PASS], rifts_xyz[b], tolerance)))
+            lines_done(len(lines))
+        profiling.count("line pieces", sum(len(pieces) for batch_results in results for pieces in batch_results))
+        return results
+
+    workers = min(workers, len(chunks))
+    jobs = [(b, lines_xyz[b][start:start + LINES_PER_PASS], tolerance) for b, start in chunks]
+    profiler = profiling.active_profiler()
+
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_line_worker, initargs=(rifts_xyz, profiler is not None)) as pool:
+        try:
+            results = [[] for _ in batches]
+            for (b, start), (pieces_xyz, stats) in zip(chunks, pool.map(_split_lines_worker, jobs)):
+                lines = batches[b][0][start:start + LINES_PER_PASS]
+                results[b].extend(to_lines(lines, pieces_xyz))
+                if profiler is not None and stats is not None:
+                    profiler.merge(stats, " (workers)")
+                lines_done(len(lines))
+        except SplitCancelled:
+            pool.shutdown(wait=False, cancel_futures=True)
+            raise
+        profiling.count("line pieces", sum(len(pieces) for batch_results in results for pieces in batch_results))
+        return results
+
+
+# Set by the initializer of every worker
+_worker_cutter: PolygonCutter | None = None
+
+def _init_cutter_worker(cutter_xyz: np.ndarray, tolerance: float, profile: bool = False) -> None:
+    global _worker_cutter, _worker_profiler
+    _worker_cutter = PolygonCutter(cutter_xyz, tolerance)
+    _worker_profiler = profiling.Profiler(enabled=True) if profile else None
+
+def _cut_worker(plate_xyz: np.ndarray) -> tuple[list[list[np.ndarray]], list[list[np.ndarray]], dict | None]:
+    if _worker_profiler is None:
+        inside, outside = split_plate_by_polygon(PolygonOnSphere(plate_xyz), _worker_cutter)
+        return [_rings(p) for p in inside], [_rings(p) for p in outside], None
+
+    _worker_profiler.reset()
+    with _worker_profiler.activate():
+        inside, outside = split_plate_by_polygon(PolygonOnSphere(plate_xyz), _worker_cutter)
+    return [_rings(p) for p in inside], [_rings(p) for p in outside], _worker_profiler.to_dict()
+
+
+def split_plates_by_polygon(plates: list[PolygonOnSphere], cutter: PolygonOnSphere, workers: int = 1, progress: Callable[[int, int], None] | None = None, is_cancelled: Callable[[], bool] | None = None, tolerance: float = CUTTER_TOLERANCE) -> list[tuple[list[PolygonOnSphere], list[PolygonOnSphere]]]:
+    """Splits every plate by the same cutting polygon (see `split_plate_by_polygon`), returning the pieces
+    inside and outside of the cutter for each plate, in order.
+
+    The cutter's `PolygonCutter` is built once, or once per worker when plates are split in a process pool (with
+    more than one worker and at least `PARALLEL_PLATE_VERTICES` plate vertices). `progress` and `is_cancelled`
+    work as in `split_plate_batches`.
+
+    Plates with interior rings cannot be cut (see `PolygonCutter`). They are skipped, with no pieces inside or
+    outside, and counted as "plates with holes skipped" so one of them does not fail the whole collection.
+    """
+    profiling.count("plates", len(plates))
+    holed = [plate.get_number_of_interior_rings() != 0 for plate in plates]
+    profiling.count("plates with holes skipped", sum(holed))
+    done = 0
+
+    def plate_done():
+        nonlocal done
+        done += 1
+        if progress is not None:
+            progress(done, len(plates))
+        if is_cancelled is not None and is_cancelled():
+            raise SplitCancelled()
+
+    if workers <= 1 or len(plates) <= 1 or sum(len(plate) for plate in plates) < PARALLEL_PLATE_VERTICES:
+        with profiling.phase("build cutter"):
+            polygon_cutter = PolygonCutter(cutter, tolerance)
+        results = []
+        for plate, has_holes in zip(plates, holed):
+            results.append(([], []) if has_holes else split_plate_by_polygon(plate, polygon_cutter))
+            plate_done()
+        return results
+
+    if cutter.get_number_of_interior_rings() != 0:
+        raise ValueError("Polygons with interior rings are not supported")
+
+    workers = min(workers, len(plates))
+    chunksize = max(1, min(32, len(plates) // (workers * 4)))
+    profiler = profiling.active_profiler()
+
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_cutter_worker, initargs=(to_unit_vectors(cutter), tolerance, profiler is not None)) as pool:
+        try:
+            results = []
+            outputs = iter(pool.map(_cut_worker, [plate.to_xyz_array() for plate, has_holes in zip(plates, holed) if not has_holes], chunksize=chunksize))
+            for has_holes in holed:
+                if has_holes:
+                    results.append(([], []))
+                else:
+                    inside, outside, stats = next(outputs)
+                    results.append(([_from_rings(rings) for rings in inside], [_from_rings(rings) for rings in outside]))
+                    if profiler is not None and stats is not None:
+                        profiler.merge(stats, " (workers)")
+                plate_done()
+        except SplitCancelled:
+            pool.shutdown(wait=False, cancel_futures=True)
+            raise
+        return results
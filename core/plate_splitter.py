@@ -1,110 +1,240 @@
 from pygplates.pygplates import PolygonOnSphere, PolylineOnSphere, PointOnSphere
-from core.arc_geometry import get_arc_intersection
-from core.metadata import MetaPoint
+from core import profiling
+from core.arc_geometry import to_unit_vectors, unit_vectors_to_lat_lon
+from core.edge_index import EdgeIndex
+from core.metadata import MetaPoint, VertexRegistry
+from core.polygon_boolean import PolygonContainment, PolygonCutter
 
-def split_plate_by_line(plate: PolygonOnSphere, line: PolylineOnSphere)-> list[PolygonOnSphere]:
+def split_plate_by_line(plate: PolygonOnSphere, line: PolylineOnSphere, edge_index: EdgeIndex | None = None, epsilon=0.001)-> list[PolygonOnSphere]:
+    """Splits a plate polygon along a rift line.
+
+    `edge_index` may be passed in when the same polygon is split by several lines, otherwise it is built here.
+    `epsilon` is the tolerance of the intersection test (see `is_point_on_arc`). Rift vertices are classified
+    all at once (see `PolygonContainment`), those on the plate's outline count as inside.
+    """
     plate_points = plate.get_points()
     line_points = line.get_points()
     meta_points = []
-    intersections = []
 
-    for point in line_points:
-        in_plate = plate.is_point_in_polygon(point)
-        meta_points.append(MetaPoint(point, in_plate))
-        if in_plate:
-            if point in plate:
-                intersections.append(point)
+    # Every point is handled by its registry id from here on, so that membership tests, lookups and splicing
+    # do not have to scan lists of points
+    registry = VertexRegistry()
+    ring_ids = [registry.add(point) for point in plate_points]
+    plate_vertex_ids = set(ring_ids)
+    line_ids = [registry.add(point) for point in line_points]
 
-    new_plate_points: list[PointOnSphere] = plate_points[:]
-    
-    if plate.is_point_in_polygon(meta_points[0].point):
-        if not meta_points[0].point in plate:
+    intersections: set[int] = set()
+
+    profiling.count("plate vertices", len(plate_points))
+    profiling.count("rift vertices", len(line_points))
+
+    if edge_index is None:
+        edge_index = EdgeIndex.from_polygon(plate)
+    # Converted once for both the classification and the intersection step
+    line_xyz = to_unit_vectors(line)
+
+    with profiling.phase("classify rift vertices"):
+        inside, on_outline = PolygonContainment(plate, edge_index).classify_path(line_xyz)
+        for i, point in enumerate(line_points):
+            meta_points.append(MetaPoint(point, bool(inside[i])))
+            # Only vertices on the outline can be vertices of the plate
+            if on_outline[i] and line_ids[i] in plate_vertex_ids:
+                intersections.add(line_ids[i])
+
+    if meta_points[0].is_inside:
+        if not line_ids[0] in plate_vertex_ids:
             return [plate]
     
-    if plate.is_point_in_polygon(meta_points[-1].point):
-        if not meta_points[-1].point in plate:
+    if meta_points[-1].is_inside:
+        if not line_ids[-1] in plate_vertex_ids:
             return [plate]
 
-    splitting_lines = []
-    current_split_line = []
+    splitting_lines: list[list[int]] = []
+    current_split_line: list[int] = []
+
+    # Intersections are spliced in after the (first occurrence of the) start vertex of the edge they lie on,
+    # in the order they are found
+    spliced: dict[int, list[int]] = {}
+
+    # Every segment that can reach the intersection step below (inside state changes and neither end touches
+    # the boundary) is tested in one batched pass against the plate edges near it
+    crossing_segments = [
+        i for i in range(len(meta_points))
+        if meta_points[i].is_inside != meta_points[(i + 1) % len(meta_points)].is_inside
+        and not line_ids[i] in intersections
+        and not line_ids[(i + 1) % len(meta_points)] in intersections
+    ]
+    with profiling.phase("intersect edges"):
+        segment_hits, edge_hits, hit_points = edge_index.intersect(line_xyz, crossing_segments, epsilon=epsilon)
+        hit_lat_lons = unit_vectors_to_lat_lon(hit_points)
+    profiling.count("intersections", len(segment_hits))
 
-    # NOTE: This is a really rough fix
-    points_with_intersection = []
+    hits_per_segment: dict[int, list[tuple[int, PointOnSphere]]] = {}
+    for segment, edge, (lat, lon) in zip(segment_hits.tolist(), edge_hits.tolist(), hit_lat_lons.tolist()):
+        hits_per_segment.setdefault(segment, []).append((edge, PointOnSphere(lat, lon)))
 
     for i in range(len(meta_points)):
         m1 = meta_points[i]
         m2 = meta_points[(i + 1) % len(meta_points)]
+        m1_id = line_ids[i]
+        m2_id = line_ids[(i + 1) % len(meta_points)]
 
         if m1.is_inside:
-            current_split_line.append(m1.point)
+            current_split_line.append(m1_id)
 
-        if m1.point in intersections:
+        if m1_id in intersections:
             pass
-        elif m2.point in intersections:
+        elif m2_id in intersections:
             if len(current_split_line) >= 1:
-                current_split_line.append(m2.point)
+                current_split_line.append(m2_id)
                 splitting_lines.append(current_split_line)
                 current_split_line = []
         elif m1.is_inside != m2.is_inside:
-            for j in range(len(plate_points)):
-                p1 = plate_points[j]
-                p2 = plate_points[(j+1) % len(plate_points)]
-                intersect = get_arc_intersection(
-                    m1.point.to_lat_lon_point(),
-                    m2.point.to_lat_lon_point(),
-                    p1.to_lat_lon_point(),
-                    p2.to_lat_lon_point()
-                )
-                if intersect:
-                    offset = points_with_intersection.count(p1)
-                    points_with_intersection.append(p1)
-
-                    new_plate_points.insert(new_plate_points.index(p1) + 1 + offset, intersect.to_point_on_sphere())
-                    current_split_line.append(intersect.to_point_on_sphere())
-                    if len(current_split_line) > 1:
-                        splitting_lines.append(current_split_line)
-                        current_split_line = []
-                    intersections.append(intersect.to_point_on_sphere())
+            for j, intersect in hits_per_segment.get(i, []):
+                intersect_id = registry.add(intersect)
+                spliced.setdefault(ring_ids[j], []).append(intersect_id)
+
+                current_split_line.append(intersect_id)
+                if len(current_split_line) > 1:
+                    splitting_lines.append(current_split_line)
+                    current_split_line = []
+                intersections.add(intersect_id)
     
     if len(intersections) == 0:
         return [plate]
 
-    points_traversed = []
-    
-    finished_plates = []
-    plates_in_progress = []
-    current_plate = []
-    
     if len(current_split_line) != 0:
         splitting_lines.append(current_split_line)
+
+    # The first splitting line that contains each point
+    line_of_point: dict[int, int] = {}
+    for line_index, splitting_line in enumerate(splitting_lines):
+        for id in splitting_line:
+            line_of_point.setdefault(id, line_index)
+
+    new_plate_ids: list[int] = []
+    seen_vertices: set[int] = set()
+    for id in ring_ids:
+        new_plate_ids.append(id)
+        if id not in seen_vertices:
+            seen_vertices.add(id)
+            new_plate_ids.extend(spliced.get(id, []))
+
+    points_traversed: set[int] = set()
+    
+    finished_plates: list[list[int]] = []
+    current_plate: list[int] = []
+
+    # Plates still waiting to be closed, in the order they were put aside, and the keys of those plates by
+    # their last point so the plate to continue with is found without scanning
+    plates_in_progress: dict[int, list[int]] = {}
+    plates_by_last_point: dict[int, list[int]] = {}
+    next_key = 0
     
-    for point in new_plate_points:
-        if point in intersections:
-            splitting_line = next(filter(lambda l: point in l, splitting_lines))
-            if point == splitting_line[0]:
+    for id in new_plate_ids:
+        if id in intersections:
+            splitting_line = splitting_lines[line_of_point[id]]
+            if id == splitting_line[0]:
                 current_plate.extend(splitting_line)
             else:
                 current_plate.extend(reversed(splitting_line))
-            points_traversed.extend(splitting_line)
+            points_traversed.update(splitting_line)
 
             # Change to another plate
             if current_plate[0] != current_plate[-1]:
-                plates_in_progress.append(current_plate)
+                plates_in_progress[next_key] = current_plate
+                plates_by_last_point.setdefault(current_plate[-1], []).append(next_key)
+                next_key += 1
             else:
                 finished_plates.append(current_plate)
-            current_plate = next(filter(lambda plate: plate[-1] == point, plates_in_progress), [ point ])
-            if current_plate in plates_in_progress:
-                plates_in_progress.remove(current_plate)
-        elif not point in points_traversed:
-            current_plate.append(point)
-            points_traversed.append(point)
+
+            waiting = plates_by_last_point.get(id)
+            if waiting:
+                current_plate = plates_in_progress.pop(waiting.pop(0))
+            else:
+                current_plate = [ id ]
+        elif not id in points_traversed:
+            current_plate.append(id)
+            points_traversed.add(id)
     finished_plates.append(current_plate)
 
-    for p in plates_in_progress:
-        finished_plates.append(p)
+    finished_plates.extend(plates_in_progress.values())
 
     output_plates = []
-    for plate in finished_plates:
-        output_plates.append(PolygonOnSphere(plate))
+    for plate_ids in finished_plates:
+        output_plates.append(PolygonOnSphere([registry.points[id] for id in plate_ids]))
+
+    return output_plates
+
+# Intersection tolerance for splitting by several lines. Where rifts cross each other, lines pass right next to
+# the vertices of pieces cut by other lines, and the default tolerance would also report hits slightly past the
+# ends of the neighbouring edges (which produces slivers or invalid pieces)
+NETWORK_EPSILON = 1e-6
+
+def _without_repeated_points(polygon: PolygonOnSphere) -> PolygonOnSphere:
+    # Split pieces end with their first point again, which the splitting of the next line cannot handle
+    points = polygon.get_points()
+    kept = [point for i, point in enumerate(points) if point != points[i - 1]]
+    if len(kept) == len(points) or len(kept) < 3:
+        return polygon
+    return PolygonOnSphere(kept)
+
+def split_plate_by_lines(plate: PolygonOnSphere, lines: list[PolylineOnSphere], line_indexes: list[EdgeIndex] | None = None) -> list[PolygonOnSphere]:
+    """Splits a plate polygon along several rift lines (e.g. a rift network) in one go.
+
+    Every line splits all pieces it crosses. A line that ends on another line (which only becomes part of a
+    piece boundary once that line has split the plate) is retried after the other lines, so the order of
+    `lines` does not matter for such networks. Pieces and lines whose bounding caps do not overlap are never
+    tested against each other, and the edge index of every piece is built only once.
+
+    `line_indexes` may be passed in when the same lines split several plates. A single line is split exactly
+    like `split_plate_by_line` does, several lines use the tighter `NETWORK_EPSILON`.
+    """
+    if len(lines) == 1:
+        return split_plate_by_line(plate, lines[0])
+
+    if line_indexes is None:
+        line_indexes = [EdgeIndex(line, closed=False) for line in lines]
+
+    pieces = [(plate, EdgeIndex.from_polygon(plate))]
+    remaining = list(range(len(lines)))
+
+    while len(remaining) != 0:
+        unused = []
+        for i in remaining:
+            split_any = False
+            new_pieces = []
+            for piece, piece_index in pieces:
+                # The kernel accepts points up to its epsilon (in radians) past the ends of arcs
+                if not piece_index.may_overlap(line_indexes[i], tolerance=NETWORK_EPSILON):
+                    new_pieces.append((piece, piece_index))
+                    continue
+
+                result = split_plate_by_line(piece, lines[i], piece_index, NETWORK_EPSILON)
+                if len(result) == 1 and result[0] is piece:
+                    new_pieces.append((piece, piece_index))
+                else:
+                    split_any = True
+                    new_pieces.extend((p, EdgeIndex.from_polygon(p)) for p in map(_without_repeated_points, result))
+            pieces = new_pieces
+
+            if not split_any:
+                unused.append(i)
+
+        # Lines that split nothing are only worth retrying if other lines changed the pieces since
+        if len(unused) == len(remaining):
+            break
+        remaining = unused
+
+    return [piece for piece, _ in pieces]
+
+def split_plate_by_polygon(plate: PolygonOnSphere, cutter: PolygonOnSphere | PolygonCutter) -> tuple[list[PolygonOnSphere], list[PolygonOnSphere]]:
+    """Splits a plate polygon by a cutting polygon, returning the pieces inside and the pieces outside of it.
 
-    return output_plates
\ No newline at end of file
+    `cutter` may be passed in as a `PolygonCutter` when the same polygon cuts several plates, otherwise it is
+    built here.
+    """
+    if not isinstance(cutter, PolygonCutter):
+        cutter = PolygonCutter(cutter)
+    with profiling.phase("cut plate"):
+        return cutter.cut(plate)
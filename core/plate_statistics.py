@@ -0,0 +1,273 @@
+from typing import TYPE_CHECKING
+
+import numpy as np
+import pygplates
+
+from core import profiling
+from core.arc_geometry import angular_distances, left_areas, ring_sizes
+
+if TYPE_CHECKING:
+    from core.session import LoadedFeatureCollection, Session
+
+
+# Areas are in steradians and lengths in radians, multiply by this (squared for areas) for kilometres
+EARTH_RADIUS_KM = pygplates.Earth.mean_radius_in_kms
+
+
+def sequence_metrics(coordinates: np.ndarray, offsets: np.ndarray, closed: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Returns the area and arc length of many point sequences at once (laid out like in `duplicate_point_mask`).
+
+    Closed sequences (polygon rings) get the area of the smaller of the two regions they bound, like pygplates
+    does, and their closing edge counts towards the length. Open sequences (polylines) have no area.
+    """
+    sizes = np.diff(offsets)
+    areas = np.zeros(len(sizes))
+    lengths = np.zeros(len(sizes))
+    nonempty = sizes > 0
+    if not nonempty.any():
+        return areas, lengths
+
+    starts = offsets[:-1][nonempty]
+    sequence = np.repeat(np.arange(len(sizes)), sizes)
+    is_last = np.zeros(len(coordinates), dtype=bool)
+    is_last[offsets[1:][nonempty] - 1] = True
+    following = np.where(is_last, offsets[:-1][sequence], np.arange(1, len(coordinates) + 1))
+    following = np.minimum(following, len(coordinates) - 1)
+
+    edge_lengths = angular_distances(coordinates, coordinates[following])
+    edge_lengths[is_last & ~closed[sequence]] = 0.0
+    lengths[nonempty] = np.add.reduceat(edge_lengths, starts)
+
+    left = left_areas(coordinates, offsets)
+    areas = np.where(closed & (sizes >= 3), np.minimum(left, 4 * np.pi - left), 0.0)
+    return areas, lengths
+
+
+class FeatureStatistics:
+    """Per feature columns (in collection order) of the attributes statistics are grouped by and the measures of
+    the feature's geometries: vertex count, area (polygons, holes subtracted) and arc length (polygon rings
+    including holes, and polylines)."""
+
+    COLUMNS = ("plate_id", "feature_type", "start_time", "end_time", "vertices", "area", "perimeter")
+
+    def __init__(self, feature_ids: list[str], revisions: dict[str, str], columns: dict[str, np.ndarray]) -> None:
+        self.feature_ids = feature_ids
+        self.revisions = revisions
+        self.columns = columns
+
+    def __len__(self) -> int:
+        return len(self.feature_ids)
+
+    @classmethod
+    def _from_rings(cls, feature_ids, revisions, attributes: dict[str, np.ndarray], coordinates, ring_offsets, ring_features, ring_closed, ring_interior) -> "FeatureStatistics":
+        areas, lengths = sequence_metrics(coordinates, ring_offsets, ring_closed)
+        count = len(feature_ids)
+        columns = dict(attributes)
+        columns["vertices"] = np.bincount(ring_features, weights=np.diff(ring_offsets), minlength=count).astype(np.int64)
+        columns["area"] = np.bincount(ring_features, weights=np.where(ring_interior, -areas, areas), minlength=count)
+        columns["perimeter"] = np.bincount(ring_features, weights=lengths, minlength=count)
+        return cls(feature_ids, revisions, columns)
+
+    @classmethod
+    def from_cache_entry(cls, entry, feature_ids: list[str], revisions: dict[str, str]) -> "FeatureStatistics":
+        """Computes the statistics of a collection from its feature cache entry, without parsing anything."""
+        ring_geometries = np.asarray(entry.array("ring_geometries"))
+        kinds = np.asarray(entry.array("geometry_kinds"))
+        polygon = np.array([name == "PolygonOnSphere" for name in entry.geometry_types], dtype=bool)
+        ring_closed = polygon[kinds[ring_geometries]] if len(polygon) != 0 else np.zeros(0, dtype=bool)
+        # Every ring after the first of its geometry is a hole
+        ring_interior = np.zeros(len(ring_geometries), dtype=bool)
+        ring_interior[1:] = ring_geometries[1:] == ring_geometries[:-1]
+
+        attributes = {
+            "plate_id": np.asarray(entry.array("plate_ids")),
+            "feature_type": np.array(entry.feature_types, dtype=np.str_)[np.asarray(entry.array("feature_type_codes"))] if entry.count != 0 else np.empty(0, dtype=np.str_),
+            "start_time": np.asarray(entry.array("start_times")),
+            "end_time": np.asarray(entry.array("end_times")),
+        }
+        ring_features = np.asarray(entry.array("geometry_rows"))[ring_geometries]
+        return cls._from_rings(feature_ids, revisions, attributes, np.asarray(entry.array("coordinates")), np.asarray(entry.array("ring_offsets")), ring_features, ring_closed, ring_interior)
+
+    @classmethod
+    def from_features(cls, features: list[pygplates.Feature], revisions: dict[str, str]) -> "FeatureStatistics":
+        """Computes the statistics of parsed features (all geometries of a feature count)."""
+        feature_ids = []
+        plate_ids = []
+        feature_types = []
+        start_times = []
+        end_times = []
+        arrays = []
+        ring_offsets = [0]
+        ring_features = []
+        ring_closed = []
+        ring_interior = []
+        for row, feature in enumerate(features):
+            feature_ids.append(feature.get_feature_id().get_string())
+            plate_ids.append(feature.get_reconstruction_plate_id())
+            feature_types.append(feature.get_feature_type().get_name())
+            start_time, end_time = feature.get_valid_time()
+            start_times.append(start_time)
+            end_times.append(end_time)
+
+            for geometry in feature.get_all_geometries():
+                xyz = np.asarray(geometry.to_xyz_array(), dtype=np.float64).reshape(-1, 3)
+                arrays.append(xyz)
+                for ring, size in enumerate(ring_sizes(geometry) or [len(xyz)]):
+                    ring_offsets.append(ring_offsets[-1] + size)
+                    ring_features.append(row)
+                    ring_closed.append(isinstance(geometry, pygplates.PolygonOnSphere))
+                    ring_interior.append(ring != 0)
+
+        attributes = {
+            "plate_id": np.array(plate_ids, dtype=np.int64),
+            "feature_type": np.array(feature_types, dtype=np.str_),
+            "start_time": np.array(start_times, dtype=np.float64),
+            "end_time": np.array(end_times, dtype=np.float64),
+        }
+        coordinates = np.concatenate(arrays) if len(arrays) != 0 else np.empty((0, 3))
+        return cls._from_rings(
+            feature_ids, revisions, attributes, coordinates, np.array(ring_offsets, dtype=np.int64),
+            np.array(ring_features, dtype=np.intp), np.array(ring_closed, dtype=bool), np.array(ring_interior, dtype=bool),
+        )
+
+
+class PlateStatistics:
+    """Feature counts, vertex counts, areas and perimeters of the loaded feature collections, grouped by plate
+    ID, feature type, collection and/or valid time window.
+
+    The measures of every collection are computed in one vectorized pass, from its feature cache entry when that
+    matches the loaded features (so nothing has to be parsed), and kept until the collection changes. Loading,
+    unloading or reloading a collection only recomputes that collection, and features whose revision did not
+    change are not measured again. Aggregated results are memoized until anything changes.
+    """
+
+    GROUPS = ("plate_id", "feature_type", "collection", "time_window")
+
+    def __init__(self, session: "Session") -> None:
+        self.session = session
+        self._collections: dict[str, FeatureStatistics] = {}
+        self._table: dict[str, np.ndarray] | None = None
+        self._results: dict[tuple, dict[str, np.ndarray]] = {}
+
+    def refresh(self) -> bool:
+        """Brings the statistics up to date with the loaded collections, returns whether anything changed."""
+        loaded = {lfc.path: lfc for lfc in self.session.loaded_feature_collections}
+        changed = False
+
+        for path in list(self._collections):
+            if path not in loaded:
+                del self._collections[path]
+                changed = True
+
+        for path, lfc in loaded.items():
+            previous = self._collections.get(path)
+            if previous is not None and previous.feature_ids == lfc.feature_ids and previous.revisions == lfc.feature_revisions:
+                continue
+
+            with profiling.phase("measure features"):
+                self._collections[path] = self._measure(lfc, previous)
+            changed = True
+
+        if changed:
+            self._table = None
+            self._results.clear()
+        return changed
+
+    def _measure(self, lfc: "LoadedFeatureCollection", previous: FeatureStatistics | None) -> FeatureStatistics:
+        revisions = dict(lfc.feature_revisions)
+        cache = self.session.feature_cache
+        if cache is not None:
+            entry = cache.lookup(lfc.path)
+            if entry is not None and entry.array("feature_ids").tolist() == lfc.feature_ids and entry.array("revisions").tolist() == [revisions.get(i) for i in lfc.feature_ids]:
+                return FeatureStatistics.from_cache_entry(entry, list(lfc.feature_ids), revisions)
+
+        # Features that are loaded as measured before keep their measures, only the others are read
+        kept: dict[str, int] = {}
+        if previous is not None:
+            kept = {feature_id: row for row, feature_id in enumerate(previous.feature_ids) if previous.revisions.get(feature_id) == revisions.get(feature_id)}
+
+        new_positions = [position for position, feature_id in enumerate(lfc.feature_ids) if feature_id not in kept]
+        features = [lfc.get_feature(lfc.feature_ids[position]) for position in new_positions]
+        if previous is None or len(kept) == 0 or any(feature is None for feature in features):
+            return FeatureStatistics.from_features(list(lfc.feature_collection), revisions)
+
+        # No feature is None from here on (checked above)
+        measured = FeatureStatistics.from_features(features, revisions)
+        kept_positions = [position for position, feature_id in enumerate(lfc.feature_ids) if feature_id in kept]
+        kept_rows = np.array([kept[lfc.feature_ids[position]] for position in kept_positions], dtype=np.intp)
+        columns = {}
+        for name, column in previous.columns.items():
+            merged = np.empty(len(lfc.feature_ids), dtype=np.result_type(column, measured.columns[name]))
+            merged[kept_positions] = column[kept_rows]
+            merged[new_positions] = measured.columns[name]
+            columns[name] = merged
+        return FeatureStatistics(list(lfc.feature_ids), revisions, columns)
+
+    def features(self) -> dict[str, np.ndarray]:
+        """Returns the per feature columns (see `FeatureStatistics`) of all loaded collections, plus a
+        "collection" column with their short names."""
+        self.refresh()
+        if self._table is None:
+            parts = [(lfc.shortname, self._collections[lfc.path]) for lfc in self.session.loaded_feature_collections if lfc.path in self._collections]
+            table = {}
+            for name in FeatureStatistics.COLUMNS:
+                columns = [statistics.columns[name] for _, statistics in parts]
+                table[name] = np.concatenate(columns) if len(columns) != 0 else np.empty(0)
+            table["collection"] = np.repeat(np.array([shortname for shortname, _ in parts], dtype=np.str_), [len(statistics) for _, statistics in parts])
+            self._table = table
+        return self._table
+
+    def aggregate(self, by: tuple[str, ...] = ("plate_id",), time: float | None = None, time_window: float = 10.0, feature_types: list[str] | None = None, plate_ids: list[int] | None = None) -> dict[str, np.ndarray]:
+        """Returns the number of features, vertices, total area and perimeter of every group of features.
+
+        `by` names the columns to group by (any of `GROUPS`, none gives one total). "time_window" groups by the
+        time features begin, in windows of `time_window` Myr (each named by its younger end, features that
+        exist since the distant past fall into the window `inf`). With `time` only features that exist at that
+        time count, `feature_types` and `plate_ids` restrict the features further. Returns a column per group
+        key and per measure, sorted by the group keys.
+        """
+        unknown = [name for name in by if name not in self.GROUPS]
+        if len(unknown) != 0:
+            raise ValueError(f"Cannot group by {', '.join(unknown)}")
+
+        table = self.features()
+        key = (tuple(by), time, time_window, None if feature_types is None else tuple(sorted(feature_types)), None if plate_ids is None else tuple(sorted(plate_ids)))
+        cached = self._results.get(key)
+        if cached is not None:
+            return cached
+
+        mask = np.ones(len(table["plate_id"]), dtype=bool)
+        if time is not None:
+            mask &= (table["start_time"] >= time) & (time >= table["end_time"])
+        if feature_types is not None:
+            mask &= np.isin(table["feature_type"], list(feature_types))
+        if plate_ids is not None:
+            mask &= np.isin(table["plate_id"], list(plate_ids))
+
+        keys = []
+        for name in by:
+            if name == "time_window":
+                start = table["start_time"][mask]
+                values = np.where(np.isfinite(start), np.floor(np.where(np.isfinite(start), start, 0.0) / time_window) * time_window, np.inf)
+            else:
+                values = table[name][mask]
+            keys.append(np.unique(values, return_inverse=True))
+
+        count = int(np.count_nonzero(mask))
+        if len(keys) != 0 and count != 0:
+            combined = np.ravel_multi_index([inverse.reshape(-1) for _, inverse in keys], [len(uniques) for uniques, _ in keys])
+            groups, first, group = np.unique(combined, return_index=True, return_inverse=True)
+            group = group.reshape(-1)
+        else:
+            groups = np.zeros(min(count, 1), dtype=np.int64)
+            first = np.zeros(len(groups), dtype=np.intp)
+            group = np.zeros(count, dtype=np.intp)
+
+        result = {name: uniques[inverse.reshape(-1)[first]] for name, (uniques, inverse) in zip(by, keys)}
+        result["features"] = np.bincount(group, minlength=len(groups))
+        result["vertices"] = np.bincount(group, weights=table["vertices"][mask], minlength=len(groups)).astype(np.int64)
+        result["area"] = np.bincount(group, weights=table["area"][mask], minlength=len(groups))
+        result["perimeter"] = np.bincount(group, weights=table["perimeter"][mask], minlength=len(groups))
+
+        self._results[key] = result
+        return result
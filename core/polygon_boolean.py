@@ -0,0 +1,647 @@
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+
+import numpy as np
+from pygplates.pygplates import PointOnSphere, PolygonOnSphere
+
+from core import profiling
+from core.arc_geometry import angular_distances, left_area, normalized, ring_sizes, to_unit_vectors
+from core.duplicate_points import duplicate_point_mask
+from core.edge_index import EdgeIndex
+
+
+# Points closer than this (in radians, about 6 mm on Earth) are the same point, and a vertex closer than this to
+# an edge of the other polygon lies on that edge
+DEFAULT_TOLERANCE = 1e-9
+
+UNION = "union"
+INTERSECTION = "intersection"
+DIFFERENCE = "difference"
+
+# pygplates counts points this close (in radians, about 9 m on Earth, where 1 - cos of the distance reaches 1e-12)
+# to the outline of a polygon as inside it
+OUTLINE_TOLERANCE = float(np.arccos(1.0 - 1e-12))
+
+# Upper bound for the number of (point, edge) pairs tested at once by the point-in-polygon test
+_MAX_PAIRS_PER_CHUNK = 1 << 22
+
+
+def oriented_ring(ring: np.ndarray) -> np.ndarray:
+    """Returns the ring going counter-clockwise around the smaller of the two regions it bounds."""
+    return ring[::-1].copy() if left_area(ring) > 2 * np.pi else ring
+
+class RingContainment:
+    """Point-in-polygon test against one ring, for many points at once.
+
+    Counts the crossings of the arc from every point to a point outside the ring (the antipode of the ring's
+    centroid, like pygplates uses). Edge vertices exactly on such an arc count as lying on one side of it, so
+    every crossing is counted exactly once. Everything that only depends on the ring is computed once, so the
+    same ring can be tested against any number of points.
+    """
+
+    def __init__(self, ring: np.ndarray) -> None:
+        self.ring = ring
+        self.outside = -normalized(ring.sum(axis=0))
+        self.starts = ring
+        self.ends = np.roll(ring, -1, axis=0)
+        self.edge_normals = np.cross(self.starts, self.ends)
+        self.outside_side = self.edge_normals @ self.outside
+
+    def contains(self, points) -> np.ndarray:
+        """Tests which points lie inside the ring (the smaller region it bounds)."""
+        points = to_unit_vectors(points)
+        inside = np.zeros(len(points), dtype=bool)
+        if len(points) == 0 or len(self.ring) < 3:
+            return inside
+
+        chunk = max(1, _MAX_PAIRS_PER_CHUNK // len(self.ring))
+        for offset in range(0, len(points), chunk):
+            query = points[offset:offset + chunk]
+            normals = np.cross(query, self.outside)
+            start_side = np.where(normals @ self.starts.T >= 0.0, 1.0, -1.0)
+            end_side = np.where(normals @ self.ends.T >= 0.0, 1.0, -1.0)
+
+            # The edge ends lie on both sides of the arc's great circle, and the arc ends on both sides of the edge's
+            crossings = (start_side != end_side) & (start_side * self.outside_side > 0.0) & (start_side * (query @ self.edge_normals.T) < 0.0)
+            inside[offset:offset + chunk] = np.count_nonzero(crossings, axis=1) % 2 == 1
+
+        return inside
+
+def points_in_ring(points: np.ndarray, ring: np.ndarray) -> np.ndarray:
+    """Tests which points lie inside a ring (the smaller region it bounds), see `RingContainment`."""
+    return RingContainment(ring).contains(points)
+
+
+class PolygonContainment:
+    """Point-in-polygon test against a polygon with its holes, for all vertices of a path (e.g. a rift) at once.
+
+    Only the first vertex of the path, and every vertex right after one on the outline, is tested on its own
+    (with `is_point_in_polygon`). Every other vertex is inside exactly if the one before it is, unless the
+    segment between them crosses the outline an odd number of times. The crossings are counted for all segments
+    in one pass over the candidate edges an `EdgeIndex` per ring finds, with the conventions of
+    `RingContainment` for edges that touch a segment.
+
+    Vertices within `tolerance` of the outline are reported as such and count as inside, like pygplates counts
+    them (which it does not do for every vertex of the polygon itself). The `edge_index` of a polygon without
+    holes may be passed in.
+    """
+
+    def __init__(self, polygon: PolygonOnSphere, edge_index: EdgeIndex | None = None, tolerance: float = OUTLINE_TOLERANCE) -> None:
+        self.polygon = polygon
+        self.tolerance = tolerance
+        if edge_index is not None and polygon.get_number_of_interior_rings() == 0:
+            self.indexes = [edge_index]
+        else:
+            points = to_unit_vectors(polygon)
+            sizes = ring_sizes(polygon) or [len(points)]
+            self.indexes = [EdgeIndex(ring, closed=True) for ring in np.split(points, np.cumsum(sizes)[:-1])]
+
+    def on_outline(self, points) -> np.ndarray:
+        """Tests which points lie within the tolerance of the outline."""
+        points = to_unit_vectors(points)
+        on_outline = np.zeros(len(points), dtype=bool)
+        for index in self.indexes:
+            queries, _, on_start, on_end, on_edge = _vertices_on_edges(points, index, self.tolerance)
+            on_outline[queries[on_start | on_end | on_edge]] = True
+        return on_outline
+
+    def contains(self, points) -> np.ndarray:
+        """Tests which points lie inside the polygon (points on the outline included), one point at a time."""
+        points = to_unit_vectors(points)
+        inside = np.array([self.polygon.is_point_in_polygon(PointOnSphere(*point)) for point in points.tolist()], dtype=bool).reshape(-1)
+        return inside | self.on_outline(points)
+
+    def _segments(self, points: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        # The number of edges every segment of the path crosses and which vertices lie on the outline, from one
+        # query per ring. Edge vertices on a segment's great circle count as lying on its positive side and
+        # segment ends on an edge's great circle as not crossing it, like `RingContainment.contains` does
+        starts, ends = points[:-1], points[1:]
+        crossings = np.zeros(len(starts), dtype=np.intp)
+        on_outline = np.zeros(len(points), dtype=bool)
+        for index in self.indexes:
+            queries, edges = index.query_arcs(starts, ends, tolerance=self.tolerance)
+            edge_starts = index.edge_starts[edges]
+            edge_ends = index.edge_ends[edges]
+            segment_starts = starts[queries]
+            segment_ends = ends[queries]
+            edge_normals = np.cross(edge_starts, edge_ends)
+            start_heights = np.einsum("ij,ij->i", edge_normals, segment_starts)
+            end_heights = np.einsum("ij,ij->i", edge_normals, segment_ends)
+
+            # Every vertex but the last starts a segment, the last one ends the last segment. Only vertices next to
+            # the great circle of an edge can lie on the edge
+            limit = np.sin(self.tolerance) * np.linalg.norm(edge_normals, axis=1)
+            near = np.flatnonzero(np.abs(start_heights) <= limit)
+            near = near[np.any(_on_edges(segment_starts[near], edge_starts[near], edge_ends[near], self.tolerance), axis=0)]
+            on_outline[queries[near]] = True
+            last = np.flatnonzero((queries == len(starts) - 1) & (np.abs(end_heights) <= limit))
+            on_outline[-1] |= bool(np.any(_on_edges(segment_ends[last], edge_starts[last], edge_ends[last], self.tolerance)))
+
+            segment_normals = np.cross(segment_starts, segment_ends)
+            start_side = np.where(np.einsum("ij,ij->i", segment_normals, edge_starts) >= 0.0, 1.0, -1.0)
+            end_side = np.where(np.einsum("ij,ij->i", segment_normals, edge_ends) >= 0.0, 1.0, -1.0)
+            crossed = (start_side != end_side) & (start_side * end_heights > 0.0) & (start_side * start_heights < 0.0)
+            crossings += np.bincount(queries[crossed], minlength=len(starts))
+        return crossings, on_outline
+
+    def classify_path(self, points) -> tuple[np.ndarray, np.ndarray]:
+        """Returns which vertices of the path lie inside the polygon (those on the outline included) and which
+        lie on its outline."""
+        points = to_unit_vectors(points)
+        if len(points) < 2:
+            return self.contains(points), self.on_outline(points)
+
+        crossings, on_outline = self._segments(points)
+        # Segments starting on the outline are not followed, the vertex after one is tested on its own instead
+        is_anchor = np.zeros(len(points), dtype=bool)
+        is_anchor[0] = True
+        is_anchor[1:] = on_outline[:-1]
+        anchors = np.flatnonzero(is_anchor)
+        profiling.count("rift vertices tested on their own", len(anchors))
+
+        flips = np.concatenate(([0], np.cumsum(crossings % 2)))
+        anchor_of = np.maximum.accumulate(np.where(is_anchor, np.arange(len(points)), 0))
+        anchor_inside = np.zeros(len(points), dtype=bool)
+        anchor_inside[anchors] = [self.polygon.is_point_in_polygon(PointOnSphere(*point)) for point in points[anchors].tolist()]
+
+        inside = anchor_inside[anchor_of] ^ ((flips - flips[anchor_of]) % 2 == 1)
+        return inside | on_outline, on_outline
+
+
+class _Arrangement:
+    """The edges of both rings split at every point where the rings meet, with shared vertex ids.
+
+    Vertex ids index `points`. The vertices of `a` come first, vertices of `b` that coincide with one of `a`
+    take its id, and the crossing points of edges come last. `a_starts`/`a_ends` and `b_starts`/`b_ends` are
+    the ids of the split edges, in order along the rings.
+
+    Only the `b_edges` of b take part (all of them by default), which lets a large ring that is arranged with
+    many small ones (see `PolygonCutter`) use just the edges near each of them. The edge indexes of both rings
+    and the points where b touches itself (as `_vertex_breaks` returns them) may be passed in as well.
+    """
+
+    def __init__(self, a: np.ndarray, b: np.ndarray, tolerance: float, a_index: EdgeIndex | None = None, b_index: EdgeIndex | None = None, b_edges: np.ndarray | None = None, b_self_breaks: tuple[np.ndarray, np.ndarray, np.ndarray] | None = None) -> None:
+        if a_index is None:
+            a_index = EdgeIndex(a, closed=True)
+        if b_index is None:
+            b_index = EdgeIndex(b, closed=True)
+        if b_edges is None:
+            b_edges = np.arange(len(b))
+        in_window = np.zeros(len(b), dtype=bool)
+        in_window[b_edges] = True
+        b_vertices = np.unique(np.concatenate((b_edges, (b_edges + 1) % len(b))))
+
+        a_ids = np.arange(len(a))
+        b_ids = np.arange(len(a), len(a) + len(b))
+        points = [a, b]
+
+        # (edge, distance from the edge start, vertex id) of every point that has to be inserted into an edge
+        a_breaks: list[tuple[np.ndarray, np.ndarray, np.ndarray]] = []
+        b_breaks: list[tuple[np.ndarray, np.ndarray, np.ndarray]] = []
+
+        # Vertices of a that coincide with vertices of b give them their ids
+        vertices, edges, on_start, on_end, _ = _vertices_on_edges(a, b_index, tolerance)
+        merged_b = np.concatenate((edges[on_start], (edges[on_end] + 1) % len(b)))
+        merged_a = np.concatenate((vertices[on_start], vertices[on_end]))
+        # Several vertices of a may be close to the same vertex of b, the first one wins
+        order = np.lexsort((merged_a, merged_b))
+        merged_b = merged_b[order]; merged_a = merged_a[order]
+        first = np.concatenate(([True], merged_b[1:] != merged_b[:-1])) if len(merged_b) else np.zeros(0, dtype=bool)
+        b_ids[merged_b[first]] = a_ids[merged_a[first]]
+
+        # Vertices on the inside of edges, of the other ring or of their own (rings of split plates can touch
+        # themselves in slivers), are inserted into those edges
+        if b_self_breaks is None:
+            b_self_breaks = _vertex_breaks(b, b_index, tolerance, b_vertices)
+        for ring, ids, vertex_subset, index, breaks in (
+            (a, a_ids, None, b_index, b_breaks),
+            (a, a_ids, None, a_index, a_breaks),
+            (b, b_ids, b_vertices, a_index, a_breaks),
+        ):
+            edges, distances, vertices = _vertex_breaks(ring, index, tolerance, vertex_subset)
+            breaks.append((edges, distances, ids[vertices]))
+        edges, distances, vertices = b_self_breaks
+        b_breaks.append((edges, distances, b_ids[vertices]))
+
+        # Proper crossings of edges, away from the vertices of both (those cases are handled above)
+        a_edges, b_edges_hit = b_index.query_arcs(a_index.edge_starts, a_index.edge_ends, tolerance=tolerance)
+        if len(a_edges) != 0:
+            a_starts = a_index.edge_starts[a_edges]; a_ends = a_index.edge_ends[a_edges]
+            b_starts = b_index.edge_starts[b_edges_hit]; b_ends = b_index.edge_ends[b_edges_hit]
+            a_normals = normalized(np.cross(a_starts, a_ends))
+            b_normals = normalized(np.cross(b_starts, b_ends))
+
+            # Edges cross where the ends of each lie on both sides of the other's great circle. Deciding this by
+            # signs stays exact for the tiny tolerances here, where the angle sums of `are_points_on_arcs` do not
+            a_sides = np.column_stack((np.einsum("ij,ij->i", a_starts, b_normals), np.einsum("ij,ij->i", a_ends, b_normals)))
+            b_sides = np.column_stack((np.einsum("ij,ij->i", b_starts, a_normals), np.einsum("ij,ij->i", b_ends, a_normals)))
+            limit = np.sin(tolerance)
+            # Edges running along each other only meet where vertices lie on edges
+            collinear = (np.abs(a_sides) <= limit).all(axis=1) | (np.abs(b_sides) <= limit).all(axis=1)
+            hit = (a_sides[:, 0] * a_sides[:, 1] < 0.0) & (b_sides[:, 0] * b_sides[:, 1] < 0.0) & ~collinear
+
+            # The crossing of the great circles (see `get_arc_pair_intersections`), on the side of the edges
+            crossings = normalized(np.cross(a_normals, b_normals))
+            crossings *= np.where(np.einsum("ij,ij->i", crossings, a_starts + a_ends) < 0.0, -1.0, 1.0)[:, None]
+            for ends in (a_starts, a_ends, b_starts, b_ends):
+                hit &= angular_distances(crossings, ends) > tolerance
+
+            crossing_ids = np.arange(len(a) + len(b), len(a) + len(b) + np.count_nonzero(hit))
+            points.append(crossings[hit])
+            a_breaks.append((a_edges[hit], angular_distances(a_starts[hit], crossings[hit]), crossing_ids))
+            b_breaks.append((b_edges_hit[hit], angular_distances(b_starts[hit], crossings[hit]), crossing_ids))
+
+        # Edges of b outside the window can only be hit where a comes near them, which the window includes
+        b_breaks = [(edges[in_window[edges]], distances[in_window[edges]], ids[in_window[edges]]) for edges, distances, ids in b_breaks]
+
+        self.points = np.concatenate(points)
+        self.a_starts, self.a_ends = self._split(a_ids, np.arange(len(a)), a_breaks)
+        self.b_starts, self.b_ends = self._split(b_ids, b_edges, b_breaks)
+
+    @staticmethod
+    def _split(ids: np.ndarray, edges: np.ndarray, breaks: list[tuple[np.ndarray, np.ndarray, np.ndarray]]) -> tuple[np.ndarray, np.ndarray]:
+        # The start and end ids of the pieces of the edges between their ends and the break points, ordered
+        # along the ring
+        ends = (edges + 1) % len(ids)
+        edge = np.concatenate([edges, edges] + [edge for edge, _, _ in breaks])
+        distance = np.concatenate([np.full(len(edges), -1.0), np.full(len(edges), np.inf)] + [distance for _, distance, _ in breaks])
+        vertex = np.concatenate([ids[edges], ids[ends]] + [vertex_id for _, _, vertex_id in breaks])
+
+        order = np.lexsort((distance, edge))
+        edge = edge[order]; vertex = vertex[order]
+        piece = (edge[1:] == edge[:-1]) & (vertex[1:] != vertex[:-1])
+        return vertex[:-1][piece], vertex[1:][piece]
+
+
+def _on_edges(points: np.ndarray, starts: np.ndarray, ends: np.ndarray, tolerance: float) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    # Which of the points lie on the start, the end or the inside of the edge they are paired with
+    to_start = angular_distances(points, starts)
+    to_end = angular_distances(points, ends)
+    on_start = to_start <= tolerance
+    on_end = ~on_start & (to_end <= tolerance)
+    normals = normalized(np.cross(starts, ends))
+    on_edge = (
+        ~on_start & ~on_end
+        & (np.abs(np.einsum("ij,ij->i", points, normals)) <= np.sin(tolerance))
+        & (to_start + to_end - angular_distances(starts, ends) <= tolerance)
+    )
+    return on_start, on_end, on_edge
+
+def _vertices_on_edges(vertices: np.ndarray, index: EdgeIndex, tolerance: float):
+    # Pairs of a vertex and an indexed edge it lies on, split by where on the edge it lies
+    queries, edges = index.query_caps(vertices, np.zeros(len(vertices)), tolerance=tolerance)
+    on_start, on_end, on_edge = _on_edges(vertices[queries], index.edge_starts[edges], index.edge_ends[edges], tolerance)
+    return queries, edges, on_start, on_end, on_edge
+
+def _vertex_breaks(ring: np.ndarray, index: EdgeIndex, tolerance: float, vertices: np.ndarray | None = None) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    # (edge, distance from the edge start, vertex) of the vertices of the ring (or of `vertices` of it) that lie
+    # on the inside of the indexed edges
+    if vertices is None:
+        vertices = np.arange(len(ring))
+    queries, edges, _, _, on_edge = _vertices_on_edges(ring[vertices], index, tolerance)
+    vertices = vertices[queries[on_edge]]; edges = edges[on_edge]
+    return edges, angular_distances(index.edge_starts[edges], ring[vertices]), vertices
+
+def _classify(starts: np.ndarray, ends: np.ndarray, other_starts: np.ndarray, other_ends: np.ndarray, other: RingContainment, points: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Returns which of the edges (start and end ids) lie inside the `other` ring, on a shared edge going the
+    same way and on a shared edge going the opposite way. `other_starts`/`other_ends` are the other's edges."""
+    # Edges are encoded as single integers to look them up with vectorized set operations
+    scale = len(points)
+    other_edges = other_starts.astype(np.int64) * scale + other_ends
+    same = np.isin(starts.astype(np.int64) * scale + ends, other_edges)
+    opposite = np.isin(ends.astype(np.int64) * scale + starts, other_edges)
+    shared = same | opposite
+
+    # Whether an edge lies inside can only change where the ring meets the other one (or where the edges of a
+    # part of a ring stop), so every run of edges between two such points needs only one point-in-polygon test
+    boundary = np.isin(starts, np.concatenate((other_starts, other_ends))) | (starts != np.roll(ends, 1))
+    run = np.cumsum(boundary)
+    if boundary.any():
+        # The edges before the first meeting point belong to the last run
+        run[:np.argmax(boundary)] = run[-1]
+
+    inside = np.zeros(len(starts), dtype=bool)
+    candidates = np.flatnonzero(~shared)
+    if len(candidates) != 0:
+        runs, first = np.unique(run[candidates], return_index=True)
+        tested = candidates[first]
+        midpoints = normalized(points[starts[tested]] + points[ends[tested]])
+        run_inside = other.contains(midpoints)
+        inside = np.zeros(run.max() + 1, dtype=bool)
+        inside[runs] = run_inside
+        inside = inside[run] & ~shared
+
+    return inside, same, opposite
+
+def _stitch(starts: np.ndarray, ends: np.ndarray, points: np.ndarray) -> list[np.ndarray]:
+    # Joins directed edges into closed rings. Where several edges leave a vertex, the walk turns as far left as
+    # possible, which separates rings that only touch in a point
+    outgoing: dict[int, list[int]] = {}
+    for edge, start in enumerate(starts.tolist()):
+        outgoing.setdefault(start, []).append(edge)
+
+    ends_list = ends.tolist()
+    starts_list = starts.tolist()
+    used = np.zeros(len(starts), dtype=bool)
+    rings = []
+    chains = []
+
+    for first in range(len(starts)):
+        if used[first]:
+            continue
+
+        ring = []
+        edge = first
+        while True:
+            used[edge] = True
+            ring.append(starts_list[edge])
+            choices = [e for e in outgoing.get(ends_list[edge], ()) if not used[e]]
+            if len(choices) == 0:
+                break
+            if len(choices) == 1:
+                edge = choices[0]
+                continue
+
+            u = points[starts_list[edge]]; v = points[ends_list[edge]]
+            d_in = normalized(np.cross(np.cross(u, v), v))
+            w = points[[ends_list[e] for e in choices]]
+            d_out = normalized(np.cross(np.cross(v, w), v))
+            turns = np.arctan2(np.cross(d_in, d_out) @ v, d_out @ d_in)
+            edge = choices[int(np.argmax(turns))]
+
+        if ends_list[edge] == ring[0]:
+            rings.append(ring)
+        else:
+            chains.append(ring + [ends_list[edge]])
+
+    # Self-overlapping input rings (e.g. twisted slivers left by splitting) can leave chains that do not close,
+    # those are joined end to nearest start
+    if len(chains) != 0:
+        profiling.count("open boolean chains", len(chains))
+    while len(chains) != 0:
+        chain = chains.pop()
+        while len(chains) != 0:
+            gaps = angular_distances(points[[c[0] for c in chains]], points[chain[-1]][None])
+            nearest = int(np.argmin(gaps))
+            if gaps[nearest] >= angular_distances(points[chain[0]][None], points[chain[-1]][None])[0]:
+                break
+            following = chains.pop(nearest)
+            chain = chain + (following[1:] if following[0] == chain[-1] else following)
+        rings.append(chain[:-1] if chain[-1] == chain[0] else chain)
+
+    return [points[ring] for ring in rings if len(ring) >= 3]
+
+def _prepared_ring(ring, tolerance: float) -> np.ndarray:
+    # The ring without duplicate points, counter-clockwise
+    ring = to_unit_vectors(ring)
+    ring = ring[duplicate_point_mask(ring, np.array([0, len(ring)]), np.array([True]), tolerance)]
+    if len(ring) < 3:
+        raise ValueError("Polygons need at least three distinct vertices")
+    return oriented_ring(ring)
+
+def _combine(arrangement: _Arrangement, a_classes: tuple, b_classes: tuple, operation: str) -> list[tuple[np.ndarray, list[np.ndarray]]]:
+    # Joins the edges the operation keeps into the result polygons
+    a_inside, a_same, a_opposite = a_classes
+    b_inside, b_same, b_opposite = b_classes
+    a_outside = ~a_inside & ~a_same & ~a_opposite
+    b_outside = ~b_inside & ~b_same & ~b_opposite
+    a_starts, a_ends = arrangement.a_starts, arrangement.a_ends
+    b_starts, b_ends = arrangement.b_starts, arrangement.b_ends
+
+    # Edges shared by both rings are taken from a only
+    if operation == UNION:
+        starts = np.concatenate((a_starts[a_outside | a_same], b_starts[b_outside]))
+        ends = np.concatenate((a_ends[a_outside | a_same], b_ends[b_outside]))
+    elif operation == INTERSECTION:
+        starts = np.concatenate((a_starts[a_inside | a_same], b_starts[b_inside]))
+        ends = np.concatenate((a_ends[a_inside | a_same], b_ends[b_inside]))
+    else:
+        # b's edges inside a bound the remaining region the other way round
+        starts = np.concatenate((a_starts[a_outside | a_opposite], b_ends[b_inside]))
+        ends = np.concatenate((a_ends[a_outside | a_opposite], b_starts[b_inside]))
+
+    with profiling.phase("stitch rings"):
+        result_rings = _stitch(starts, ends, arrangement.points)
+
+    # Rings around more than half of the sphere are holes of the region around them
+    exteriors = [ring for ring in result_rings if left_area(ring) <= 2 * np.pi]
+    holes = [ring for ring in result_rings if left_area(ring) > 2 * np.pi]
+
+    polygons: list[tuple[np.ndarray, list[np.ndarray]]] = [(ring, []) for ring in exteriors]
+    for hole in holes:
+        for exterior, interiors in polygons:
+            if points_in_ring(hole[:1], exterior)[0]:
+                interiors.append(hole[::-1].copy())
+                break
+
+    return polygons
+
+def boolean_rings(a, b, operation: str, tolerance: float = DEFAULT_TOLERANCE) -> list[tuple[np.ndarray, list[np.ndarray]]]:
+    """Combines two polygons given as rings of unit vectors (or anything `to_unit_vectors` accepts).
+
+    `operation` is UNION, INTERSECTION or DIFFERENCE (a without b). Both rings are split wherever they cross
+    or touch, each piece of edge is classified as inside, outside or shared with the other polygon, and the
+    pieces the operation keeps are joined into the result rings. Shared edges (e.g. the common boundary of two
+    pieces of a split plate) are handled exactly, so neighbouring pieces union without slivers.
+
+    Returns the result polygons as (exterior ring, interior rings), exterior rings going counter-clockwise.
+    Polygons are taken to be the smaller of the two regions bounded by their ring.
+    """
+    if operation not in (UNION, INTERSECTION, DIFFERENCE):
+        raise ValueError(f"Unknown boolean operation '{operation}'")
+
+    a = _prepared_ring(a, tolerance)
+    b = _prepared_ring(b, tolerance)
+
+    with profiling.phase("arrange polygons"):
+        arrangement = _Arrangement(a, b, tolerance)
+    points = arrangement.points
+
+    with profiling.phase("classify edges"):
+        a_classes = _classify(arrangement.a_starts, arrangement.a_ends, arrangement.b_starts, arrangement.b_ends, RingContainment(b), points)
+        b_classes = _classify(arrangement.b_starts, arrangement.b_ends, arrangement.a_starts, arrangement.a_ends, RingContainment(a), points)
+
+    return _combine(arrangement, a_classes, b_classes, operation)
+
+
+def _to_polygons(polygons: list[tuple[np.ndarray, list[np.ndarray]]]) -> list[PolygonOnSphere]:
+    return [PolygonOnSphere(exterior, interiors) if len(interiors) != 0 else PolygonOnSphere(exterior) for exterior, interiors in polygons]
+
+def _exterior(polygon) -> np.ndarray:
+    if isinstance(polygon, PolygonOnSphere):
+        if polygon.get_number_of_interior_rings() != 0:
+            raise ValueError("Polygons with interior rings are not supported")
+    return to_unit_vectors(polygon)
+
+def polygon_union(a, b, tolerance: float = DEFAULT_TOLERANCE) -> list[PolygonOnSphere]:
+    """Returns the union of two polygons (one polygon, or several if they do not overlap), see `boolean_rings`."""
+    return _to_polygons(boolean_rings(_exterior(a), _exterior(b), UNION, tolerance))
+
+def polygon_intersection(a, b, tolerance: float = DEFAULT_TOLERANCE) -> list[PolygonOnSphere]:
+    """Returns the regions covered by both polygons, see `boolean_rings`."""
+    return _to_polygons(boolean_rings(_exterior(a), _exterior(b), INTERSECTION, tolerance))
+
+def polygon_difference(a, b, tolerance: float = DEFAULT_TOLERANCE) -> list[PolygonOnSphere]:
+    """Returns the regions of `a` not covered by `b`, see `boolean_rings`."""
+    return _to_polygons(boolean_rings(_exterior(a), _exterior(b), DIFFERENCE, tolerance))
+
+def _merged(a: tuple[np.ndarray, list[np.ndarray]], b: tuple[np.ndarray, list[np.ndarray]], tolerance: float) -> tuple[np.ndarray, list[np.ndarray]] | None:
+    # The union of two polygons given as (exterior, holes) if it is one polygon, else None. The holes of the
+    # result are the holes between the exteriors and what is left of the holes of each after taking away the
+    # other polygon (its exterior, except where that has holes itself)
+    (a_exterior, a_holes), (b_exterior, b_holes) = a, b
+    result = boolean_rings(a_exterior, b_exterior, UNION, tolerance)
+    if len(result) != 1:
+        return None
+    exterior, holes = result[0]
+
+    for hole in a_holes:
+        pieces = boolean_rings(hole, b_exterior, DIFFERENCE, tolerance)
+        if any(len(interiors) != 0 for _, interiors in pieces):
+            # b lies in this hole without touching a
+            return None
+        holes.extend(ring for ring, _ in pieces)
+        for other_hole in b_holes:
+            holes.extend(ring for ring, _ in boolean_rings(hole, other_hole, INTERSECTION, tolerance))
+    for hole in b_holes:
+        pieces = boolean_rings(hole, a_exterior, DIFFERENCE, tolerance)
+        if any(len(interiors) != 0 for _, interiors in pieces):
+            return None
+        holes.extend(ring for ring, _ in pieces)
+
+    return exterior, holes
+
+def union_all(polygons: list, tolerance: float = DEFAULT_TOLERANCE) -> list[PolygonOnSphere]:
+    """Unions any number of polygons (e.g. all pieces of one plate ID) into as few polygons as possible.
+
+    Polygons are merged one at a time into the ones merged so far; pairs whose bounding caps do not touch are
+    never combined. Merged polygons keep their holes (e.g. where pieces enclose a gap) and go on merging, later
+    polygons covering part of a hole shrink it, so the result does not depend on the order of `polygons`.
+    """
+    merged: list[tuple[np.ndarray, list[np.ndarray], EdgeIndex]] = []
+
+    for polygon in polygons:
+        ring = oriented_ring(_exterior(polygon))
+        holes: list[np.ndarray] = []
+        index = EdgeIndex(ring, closed=True)
+
+        # Keep merging with overlapping polygons until nothing overlaps any more
+        changed = True
+        while changed:
+            changed = False
+            for i, (other, other_holes, other_index) in enumerate(merged):
+                if not index.may_overlap(other_index, tolerance=tolerance):
+                    continue
+
+                result = _merged((ring, holes), (other, other_holes), tolerance)
+                if result is not None:
+                    del merged[i]
+                    ring, holes = result
+                    index = EdgeIndex(ring, closed=True)
+                    changed = True
+                    break
+
+        merged.append((ring, holes, index))
+
+    return _to_polygons([(ring, holes) for ring, holes, _ in merged])
+
+
+class PolygonCutter:
+    """One polygon that cuts many others into their parts inside and outside of it (e.g. a subduction region
+    cutting the ocean crust features of a whole collection).
+
+    The cutter's edge index, containment structure (see `RingContainment`) and the points where it touches
+    itself are built once and reused for every target. Each target is only arranged with the cutter edges
+    whose bounding caps overlap its own, so cutting a small target costs about the same however large the
+    cutter is, and targets nowhere near the cutter are not arranged at all. Neither the cutter nor the targets
+    may have interior rings.
+    """
+
+    def __init__(self, cutter, tolerance: float = DEFAULT_TOLERANCE) -> None:
+        self.tolerance = tolerance
+        self.ring = _prepared_ring(_exterior(cutter), tolerance)
+        self.index = EdgeIndex(self.ring, closed=True)
+        self.containment = RingContainment(self.ring)
+        self._self_breaks = _vertex_breaks(self.ring, self.index, tolerance)
+
+    def cut_rings(self, target) -> tuple[list[tuple[np.ndarray, list[np.ndarray]]], list[tuple[np.ndarray, list[np.ndarray]]]]:
+        """Returns the parts of the target inside and outside of the cutter, as `boolean_rings` does (the
+        INTERSECTION and DIFFERENCE of target and cutter from one arrangement)."""
+        ring = _prepared_ring(_exterior(target), self.tolerance)
+        index = EdgeIndex(ring, closed=True)
+        if not index.may_overlap(self.index, tolerance=self.tolerance):
+            return [], [(ring, [])]
+
+        center, radius = index.bounding_cap()
+        _, edges = self.index.query_caps(center[None], np.array([radius]), tolerance=self.tolerance)
+        profiling.count("cutter edges near targets", len(edges))
+
+        with profiling.phase("arrange polygons"):
+            arrangement = _Arrangement(ring, self.ring, self.tolerance, index, self.index, edges, self._self_breaks)
+        points = arrangement.points
+
+        with profiling.phase("classify edges"):
+            a_classes = _classify(arrangement.a_starts, arrangement.a_ends, arrangement.b_starts, arrangement.b_ends, self.containment, points)
+            b_classes = _classify(arrangement.b_starts, arrangement.b_ends, arrangement.a_starts, arrangement.a_ends, RingContainment(ring), points)
+
+        return _combine(arrangement, a_classes, b_classes, INTERSECTION), _combine(arrangement, a_classes, b_classes, DIFFERENCE)
+
+    def cut(self, target) -> tuple[list[PolygonOnSphere], list[PolygonOnSphere]]:
+        """Returns the polygons of the target inside and outside of the cutter, see `cut_rings`."""
+        inside, outside = self.cut_rings(target)
+        return _to_polygons(inside), _to_polygons(outside)
+
+
+def _boolean_worker(job: tuple[np.ndarray, np.ndarray, str, float]) -> list[tuple[np.ndarray, list[np.ndarray]]]:
+    return boolean_rings(*job)
+
+def _union_worker(job: tuple[list[np.ndarray], float]) -> list[list[np.ndarray]]:
+    # Polygons with holes cannot travel as one xyz array, so they go back as their exterior and interior rings
+    return [
+        [to_unit_vectors(polygon.get_exterior_ring_points())] + [to_unit_vectors(polygon.get_interior_ring_points(i)) for i in range(polygon.get_number_of_interior_rings())]
+        for polygon in union_all(*job)
+    ]
+
+def _chunksize(jobs: int, workers: int) -> int:
+    return max(1, min(32, jobs // (workers * 4)))
+
+def boolean_batch(pairs: list[tuple], operation: str, workers: int = 1, tolerance: float = DEFAULT_TOLERANCE) -> list[list[PolygonOnSphere]]:
+    """Applies the operation to many pairs of polygons (e.g. every ocean crust feature with every continent
+    it may overlap), in parallel with more than one worker.
+
+    Like the splitting workers (see `split_plate_batches`), polygons travel to the workers as xyz arrays.
+    Returns the result polygons of every pair, in order.
+    """
+    jobs = [(_exterior(a), _exterior(b), operation, tolerance) for a, b in pairs]
+
+    if workers <= 1 or len(jobs) <= 1:
+        return [_to_polygons(boolean_rings(*job)) for job in jobs]
+
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=min(workers, len(jobs)), mp_context=context) as pool:
+        return [_to_polygons(result) for result in pool.map(_boolean_worker, jobs, chunksize=_chunksize(len(jobs), workers))]
+
+def union_batch(groups: list[list], workers: int = 1, tolerance: float = DEFAULT_TOLERANCE) -> list[list[PolygonOnSphere]]:
+    """Unions the polygons of every group (see `union_all`), in parallel with more than one worker."""
+    jobs = [([_exterior(polygon) for polygon in group], tolerance) for group in groups]
+
+    if workers <= 1 or len(jobs) <= 1:
+        return [union_all(*job) for job in jobs]
+
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=min(workers, len(jobs)), mp_context=context) as pool:
+        return [
+            [PolygonOnSphere(rings[0], rings[1:]) if len(rings) > 1 else PolygonOnSphere(rings[0]) for rings in result]
+            for result in pool.map(_union_worker, jobs, chunksize=_chunksize(len(jobs), workers))
+        ]
+
+def union_by_plate_id(features, workers: int = 1, tolerance: float = DEFAULT_TOLERANCE) -> dict[int, list[PolygonOnSphere]]:
+    """Unions the polygons of all features with the same reconstruction plate ID, e.g. to put the pieces of a
+    split plate back together. Returns the merged polygons by plate ID."""
+    groups: dict[int, list[PolygonOnSphere]] = {}
+    for feature in features:
+        polygons = [geometry for geometry in feature.get_geometries() if isinstance(geometry, PolygonOnSphere)]
+        if len(polygons) != 0:
+            groups.setdefault(feature.get_reconstruction_plate_id(), []).extend(polygons)
+
+    return dict(zip(groups, union_batch(list(groups.values()), workers, tolerance)))
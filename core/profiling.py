@@ -0,0 +1,221 @@
+import contextlib
+import json
+import os
+import sys
+import threading
+import time
+
+
+# Setting this environment variable (to anything but 0/false/no/off) turns profiling on at start
+PROFILE_VARIABLE = "GPLATES_UTILITIES_PROFILE"
+
+def profiling_requested() -> bool:
+    return os.environ.get(PROFILE_VARIABLE, "").strip().lower() not in ("", "0", "false", "no", "off")
+
+def peak_memory(children: bool = False) -> int | None:
+    """Returns the peak resident memory of this process (or the largest of its finished child processes) in
+    bytes, None where it cannot be read."""
+    try:
+        import resource
+    except ImportError:
+        return None if children else _windows_peak_memory()
+
+    peak = resource.getrusage(resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+def _windows_peak_memory() -> int | None:
+    try:
+        import ctypes
+        from ctypes import wintypes
+
+        class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+            _fields_ = [
+                ("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD),
+                ("PeakWorkingSetSize", ctypes.c_size_t), ("WorkingSetSize", ctypes.c_size_t),
+                ("QuotaPeakPagedPoolUsage", ctypes.c_size_t), ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t), ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                ("PagefileUsage", ctypes.c_size_t), ("PeakPagefileUsage", ctypes.c_size_t),
+            ]
+
+        counters = PROCESS_MEMORY_COUNTERS()
+        counters.cb = ctypes.sizeof(counters)
+        process = ctypes.windll.kernel32.GetCurrentProcess()  # type: ignore | Only exists on Windows
+        if not ctypes.windll.psapi.GetProcessMemoryInfo(process, ctypes.byref(counters), counters.cb):  # type: ignore | Only exists on Windows
+            return None
+        return counters.PeakWorkingSetSize
+    except (ImportError, AttributeError, OSError):
+        return None
+
+
+class PhaseStats:
+    def __init__(self) -> None:
+        self.calls = 0
+        self.total = 0.0
+        self.longest = 0.0
+        # Largest rise of the process' peak memory during one call, i.e. how far the phase pushed the peak up
+        self.memory_growth = 0
+
+    def to_dict(self) -> dict:
+        return {"calls": self.calls, "total_s": self.total, "longest_s": self.longest, "memory_growth_bytes": self.memory_growth}
+
+
+class Profiler:
+    """Records wall time, call counts and peak memory of named phases, together with counters (vertices,
+    intersections, ...).
+
+    Core code reports to the active profiler through the module functions `phase` and `count`, which do nothing
+    while no profiler is active, so the hot paths only pay for a lookup when profiling is off. A profiler only
+    becomes active (see `activate`) when it is enabled, and only on the thread that activated it. A profiler is
+    not thread-safe: work on other threads records into a profiler of its own, which is merged afterwards (see
+    `merge_profile`).
+    """
+
+    # Phase calls kept for the Chrome trace, later ones only count towards the statistics
+    MAX_EVENTS = 100000
+
+    def __init__(self, enabled: bool = False) -> None:
+        self.enabled = enabled
+        self.reset()
+
+    def reset(self) -> None:
+        self.phases: dict[str, PhaseStats] = {}
+        self.counters: dict[str, int] = {}
+        # (name, start, duration, thread ID) in seconds since the reset
+        self.events: list[tuple[str, float, float, int]] = []
+        self._origin = time.perf_counter()
+
+    @contextlib.contextmanager
+    def activate(self):
+        """Makes this profiler the one `phase` and `count` on the current thread report to (if it is enabled)."""
+        if not self.enabled:
+            yield self
+            return
+
+        previous = getattr(_state, "active", None)
+        _state.active = self
+        try:
+            yield self
+        finally:
+            _state.active = previous
+
+    @contextlib.contextmanager
+    def phase(self, name: str):
+        memory_before = peak_memory()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            duration = time.perf_counter() - start
+            memory_after = peak_memory()
+
+            stats = self.phases.get(name)
+            if stats is None:
+                stats = self.phases[name] = PhaseStats()
+            stats.calls += 1
+            stats.total += duration
+            stats.longest = max(stats.longest, duration)
+            if memory_before is not None and memory_after is not None:
+                stats.memory_growth = max(stats.memory_growth, memory_after - memory_before)
+
+            if len(self.events) < self.MAX_EVENTS:
+                self.events.append((name, start - self._origin, duration, threading.get_ident()))
+
+    def count(self, name: str, value: int = 1) -> None:
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def merge(self, stats: dict, suffix: str = "") -> None:
+        """Adds statistics (see `to_dict`) recorded elsewhere, e.g. in a worker process.
+
+        Phase names get the suffix appended, as time spent in parallel workers does not add up to wall time.
+        """
+        for name, phase_stats in stats["phases"].items():
+            merged = self.phases.setdefault(name + suffix, PhaseStats())
+            merged.calls += phase_stats["calls"]
+            merged.total += phase_stats["total_s"]
+            merged.longest = max(merged.longest, phase_stats["longest_s"])
+            merged.memory_growth = max(merged.memory_growth, phase_stats["memory_growth_bytes"])
+        for name, value in stats["counters"].items():
+            self.count(name, value)
+
+    def merge_profile(self, other: "Profiler") -> None:
+        """Adds everything another profiler recorded (e.g. one of a task on another thread), its phase calls
+        included at the times they happened."""
+        self.merge(other.to_dict())
+        shift = other._origin - self._origin
+        room = self.MAX_EVENTS - len(self.events)
+        self.events.extend((name, start + shift, duration, tid) for name, start, duration, tid in other.events[:max(room, 0)])
+
+    def to_dict(self) -> dict:
+        return {
+            "phases": {name: stats.to_dict() for name, stats in self.phases.items()},
+            "counters": dict(self.counters),
+            "peak_memory_bytes": peak_memory(),
+            "worker_peak_memory_bytes": peak_memory(children=True),
+        }
+
+    def summary(self) -> str:
+        """Returns a plain text table of the phases (longest total first), counters and peak memory."""
+        lines = [f"{'Phase':<36}{'Calls':>8}{'Total':>12}{'Longest':>12}{'Memory':>12}"]
+        for name, stats in sorted(self.phases.items(), key=lambda item: -item[1].total):
+            lines.append(f"{name:<36}{stats.calls:>8}{stats.total * 1000:>9.1f} ms{stats.longest * 1000:>9.1f} ms{_format_bytes(stats.memory_growth):>12}")
+
+        if len(self.counters) != 0:
+            lines.append("")
+            lines.extend(f"{name:<36}{value:>8}" for name, value in sorted(self.counters.items()))
+
+        data = self.to_dict()
+        lines.append("")
+        lines.append(f"{'Peak memory':<36}{_format_bytes(data['peak_memory_bytes']):>8}")
+        if any(name.endswith(" (workers)") for name in self.phases):
+            lines.append(f"{'Peak memory (workers)':<36}{_format_bytes(data['worker_peak_memory_bytes']):>8}")
+        return "\n".join(lines)
+
+    def write_json(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=2)
+            f.write("\n")
+
+    def write_chrome_trace(self, path: str) -> None:
+        """Writes the recorded phase calls in the Trace Event format (chrome://tracing, Perfetto)."""
+        pid = os.getpid()
+        events = [
+            {"name": name, "ph": "X", "ts": start * 1e6, "dur": duration * 1e6, "pid": pid, "tid": tid}
+            for name, start, duration, tid in self.events
+        ]
+        # Counters are totals of the whole profile, so they are shown once at its end
+        end = max((start + duration for _, start, duration, _ in self.events), default=0.0)
+        if len(self.counters) != 0:
+            events.append({"name": "counters", "ph": "C", "ts": end * 1e6, "pid": pid, "args": dict(self.counters)})
+
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms", "otherData": self.to_dict()}, f)
+
+
+def _format_bytes(size: int | None) -> str:
+    if size is None:
+        return "-"
+    for unit in ("B", "KiB", "MiB"):
+        if size < 1024:
+            return f"{size:.0f} {unit}"
+        size /= 1024  # type: ignore | Becomes a float from here on
+    return f"{size:.1f} GiB"
+
+
+# The active profiler of every thread (splits may run on a worker thread while the GUI thread loads files)
+_state = threading.local()
+_NO_PHASE = contextlib.nullcontext()
+
+def active_profiler() -> Profiler | None:
+    return getattr(_state, "active", None)
+
+def phase(name: str):
+    """Times the enclosed block as a call of the named phase of the active profiler."""
+    active = getattr(_state, "active", None)
+    return active.phase(name) if active is not None else _NO_PHASE
+
+def count(name: str, value: int = 1) -> None:
+    """Adds to the named counter of the active profiler."""
+    active = getattr(_state, "active", None)
+    if active is not None:
+        active.count(name, value)
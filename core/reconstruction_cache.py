@@ -0,0 +1,99 @@
+from collections import OrderedDict
+import threading
+from typing import Callable
+
+import pygplates
+
+from core import profiling
+from core.feature_loading import feature_revision
+
+
+class ReconstructionCache:
+    """Least recently used cache of reconstructed feature geometries.
+
+    Entries are keyed by reconstruction time, feature ID and feature revision, and belong to one rotation
+    model: reconstructing with a different rotation model object drops all of them. Reconstructing the same
+    features at the same time again (e.g. splitting again after changing the selection) only reconstructs the
+    features that are not cached yet.
+
+    The cache may be used from a splitting thread while the GUI thread discards entries of reloaded features.
+    """
+
+    def __init__(self, max_entries: int = 20000, revision_of: Callable[[pygplates.Feature], str] = feature_revision) -> None:
+        self.max_entries = max_entries
+        self._revision_of = revision_of
+
+        self._rotation_model: pygplates.RotationModel | None = None
+        self._entries: OrderedDict[tuple[float, str, str], list[pygplates.ReconstructedFeatureGeometry]] = OrderedDict()
+        self._keys_by_feature_id: dict[str, set[tuple[float, str, str]]] = {}
+        self._lock = threading.RLock()
+
+        # Number of features looked up and reconstructed, for statistics
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_feature_id.clear()
+
+    def discard(self, feature_ids) -> None:
+        """Drops all cached geometries of the given features."""
+        with self._lock:
+            for feature_id in feature_ids:
+                for key in self._keys_by_feature_id.pop(feature_id, ()):
+                    del self._entries[key]
+
+    def _store(self, key: tuple[float, str, str], geometries: list[pygplates.ReconstructedFeatureGeometry]) -> None:
+        self._entries[key] = geometries
+        self._keys_by_feature_id.setdefault(key[1], set()).add(key)
+
+        while len(self._entries) > self.max_entries:
+            old_key, _ = self._entries.popitem(last=False)
+            keys = self._keys_by_feature_id[old_key[1]]
+            keys.discard(old_key)
+            if len(keys) == 0:
+                del self._keys_by_feature_id[old_key[1]]
+
+    def reconstruct(self, features: list[pygplates.Feature], rotation_model: pygplates.RotationModel, time: float) -> list[pygplates.ReconstructedFeatureGeometry]:
+        """Returns the reconstructed geometries of the features at the time, in the order of `features`."""
+        keys = [(float(time), feature.get_feature_id().get_string(), self._revision_of(feature)) for feature in features]
+
+        found: dict[tuple[float, str, str], list[pygplates.ReconstructedFeatureGeometry]] = {}
+        missing: dict[tuple[float, str, str], pygplates.Feature] = {}
+        with self._lock:
+            if rotation_model is not self._rotation_model:
+                self.clear()
+                self._rotation_model = rotation_model
+
+            for key, feature in zip(keys, features):
+                if key in self._entries:
+                    self._entries.move_to_end(key)
+                    found[key] = self._entries[key]
+                else:
+                    missing.setdefault(key, feature)
+
+            self.hits += len(features) - len(missing)
+            self.misses += len(missing)
+        profiling.count("reconstruction cache hits", len(features) - len(missing))
+        profiling.count("reconstruction cache misses", len(missing))
+
+        if len(missing) != 0:
+            # Reconstructing is the slow part, so it does not hold the lock
+            snapshot = pygplates.ReconstructSnapshot(pygplates.FeatureCollection(list(missing.values())), rotation_model, time)
+
+            by_feature_id: dict[str, list[pygplates.ReconstructedFeatureGeometry]] = {}
+            for geometry in snapshot.get_reconstructed_geometries():
+                by_feature_id.setdefault(geometry.get_feature().get_feature_id().get_string(), []).append(geometry)
+
+            # Features that do not exist at the time are cached too (without geometries)
+            with self._lock:
+                for key in missing:
+                    found[key] = by_feature_id.get(key[1], [])
+                    if rotation_model is self._rotation_model:
+                        self._store(key, found[key])
+
+        return [geometry for key in keys for geometry in found[key]]
@@ -1,18 +1,264 @@
+from concurrent.futures import ProcessPoolExecutor
+import itertools
+import multiprocessing
 import os
-from typing import Sequence
-
-from PySide6.QtCore import QStringListModel, Qt
-from PySide6.QtGui import QStandardItem, QStandardItemModel
+import threading
+from PySide6.QtCore import QFileSystemWatcher, QStringListModel, QThread, QTimer, Signal
 from PySide6.QtWidgets import QMessageBox, QWidget
 import pygplates
 
+from core import profiling
+from core.duplicate_points import DEFAULT_TOLERANCE, remove_duplicate_points
+from core.feature_cache import FeatureCache
+from core.feature_loading import FileSignature, feature_revision, read_feature_collection, read_feature_rows
+from core.feature_table_model import FeatureTableModel
+from core.parallel_splitting import SplitCancelled, default_worker_count
+from core.plate_statistics import PlateStatistics
+from core.profiling import Profiler, profiling_requested
+from core.reconstruction_cache import ReconstructionCache
+from core.simplification import LevelOfDetailCache
+from core.splitting_engine import PREVIEW_VERTICES, preview_split, split_features, write_feature_collection
+
 
 class LoadedFeatureCollection():
-    def __init__(self, path, feature_collection) -> None:
+    def __init__(self, path, feature_collection: pygplates.FeatureCollection | None = None, signature: FileSignature | None = None) -> None:
         self.path = path
-        self.feature_collection = feature_collection
+        self._feature_collection: pygplates.FeatureCollection | None = feature_collection
         self.shortname = os.path.basename(path)
 
+        # State of the file when it was (last) read, to tell whether a reload has to re-read it
+        self.signature = signature
+        self.feature_revisions: dict[str, str] = {}
+
+        # IDs of the features in this collection (in file order, and as a set) and, once the features are parsed,
+        # the features by ID
+        self.feature_ids: list[str] = []
+        self.feature_id_set: set[str] = set()
+        self._features_by_id: dict[str, pygplates.Feature] | None = None
+        # Features are parsed by whichever thread needs them first (e.g. a split and a preview at the same time)
+        self._parse_lock = threading.Lock()
+
+    @property
+    def feature_collection(self) -> pygplates.FeatureCollection:
+        # Collections loaded in the background or from the feature cache only have their table rows, the
+        # features themselves are parsed the first time they are needed (to split or save them), see `SplitTask`
+        with self._parse_lock:
+            if self._feature_collection is None:
+                with profiling.phase("parse feature collection"):
+                    self._feature_collection = pygplates.FeatureCollection(self.path)
+            return self._feature_collection
+
+    @feature_collection.setter
+    def feature_collection(self, feature_collection: pygplates.FeatureCollection | None) -> None:
+        self._feature_collection = feature_collection
+        self._features_by_id = None
+
+    def get_feature(self, feature_id: str) -> pygplates.Feature | None:
+        feature_collection = self.feature_collection
+        with self._parse_lock:
+            if self._features_by_id is None:
+                # The first of several features with the same ID wins, as it does across collections
+                self._features_by_id = {}
+                for f in feature_collection:
+                    self._features_by_id.setdefault(f.get_feature_id().get_string(), f)
+            return self._features_by_id.get(feature_id)
+
+
+class FeatureCollectionLoadTask(QThread):
+    """Parses feature collection files in worker processes, off the GUI thread.
+
+    `fileLoaded` is emitted in the order of `paths` (a file that finishes early waits for the ones before it),
+    so collections always end up in the session in the order they were selected.
+    """
+
+    fileLoaded = Signal(str, object)    # path, (file signature, feature table rows)
+    fileFailed = Signal(str, str)       # path, error message
+    progress = Signal(int, int, str)    # files done, files total, path of the last file done
+
+    def __init__(self, paths: list[str], workers: int, cache: FeatureCache | None = None) -> None:
+        super().__init__()
+        self.paths = paths
+        self.workers = workers
+        self.cache = cache
+        self._cancelled = False
+
+    def cancel(self) -> None:
+        self._cancelled = True
+
+    def is_cancelled(self) -> bool:
+        return self._cancelled
+
+    def run(self) -> None:
+        # Forking a process that runs Qt threads is not safe, so the workers are always spawned
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=max(1, min(self.workers, len(self.paths))), mp_context=context) as pool:
+            futures = [pool.submit(read_feature_rows, path, os.path.basename(path), self.cache) for path in self.paths]
+
+            for done, (path, future) in enumerate(zip(self.paths, futures), 1):
+                if self._cancelled:
+                    for f in futures:
+                        f.cancel()
+                    return
+
+                try:
+                    result = future.result()
+                except Exception as e:
+                    self.fileFailed.emit(path, str(e))
+                else:
+                    if self._cancelled:
+                        return
+                    self.fileLoaded.emit(path, result)
+
+                self.progress.emit(done, len(self.paths), path)
+
+
+class SplitTask(QThread):
+    """Splits plates by rifts and saves the result, off the GUI thread.
+
+    Plates and rifts are given as (feature ID, collection shortname) pairs, see `Session.get_features`. They are
+    looked up when the task runs, so collections that were not parsed yet are parsed on this thread too.
+
+    `progress` is emitted after every split plate. Cancelling stops the split at the next plate (or before the
+    file is replaced when it is already writing); the output file is only ever replaced by a complete one, see
+    `write_feature_collection`. Once the thread finishes, exactly one of `saved`, `failed` and `cancelled` has
+    been emitted.
+    """
+
+    progress = Signal(int, int, str)    # plates done, plates total, stage
+    saved = Signal(str, int)            # output path, number of features written
+    failed = Signal(str)                # error message
+    cancelled = Signal()
+
+    def __init__(self, session: "Session", plates: list[tuple[str, str]], rifts: list[tuple[str, str]], rifting_time: float, output_path: str) -> None:
+        super().__init__()
+        self.session = session
+        self.plates = plates
+        self.rifts = rifts
+        self.rifting_time = rifting_time
+        self.output_path = output_path
+
+        # Settings are read now, so changing them while the task runs does not affect it
+        self.rotation_model = session._rotationModel
+        self.workers = session.split_workers
+        self.reconstruction_cache = session.reconstruction_cache
+        # Recorded on its own, see `Session.split_async`
+        self.profiler = Profiler(session.profiler.enabled)
+        self._cancelled = False
+        self._plate_count = 0
+
+    def cancel(self) -> None:
+        self._cancelled = True
+
+    def is_cancelled(self) -> bool:
+        return self._cancelled
+
+    def _on_plate_done(self, done: int, total: int) -> None:
+        self._plate_count = total
+        self.progress.emit(done, total, "Splitting")
+
+    def run(self) -> None:
+        try:
+            with self.profiler.activate():
+                with profiling.phase("find features"):
+                    plates = self.session.get_features(self.plates)
+                    rifts = self.session.get_features(self.rifts)
+                fc = split_features(plates, rifts, self.rifting_time, self.rotation_model, self.workers, self.reconstruction_cache, self._on_plate_done, self.is_cancelled)
+                self.progress.emit(self._plate_count, self._plate_count, "Saving")
+                write_feature_collection(fc, self.output_path, self.is_cancelled)
+        except SplitCancelled:
+            self.cancelled.emit()
+        except Exception as e:
+            self.failed.emit(str(e))
+        else:
+            self.saved.emit(self.output_path, len(fc))
+
+
+class PreviewTask(QThread):
+    """Splits simplified plates by simplified rifts for a preview (see `preview_split`), off the GUI thread.
+
+    Plates and rifts are given as in `SplitTask`. Once the thread finishes, exactly one of `previewed` (with the
+    result of `preview_split`) and `failed` has been emitted.
+    """
+
+    previewed = Signal(object)      # (plates and their pieces, rift lines)
+    failed = Signal(str)            # error message
+
+    def __init__(self, session: "Session", plates: list[tuple[str, str]], rifts: list[tuple[str, str]], rifting_time: float, vertices: int = PREVIEW_VERTICES) -> None:
+        super().__init__()
+        self.session = session
+        self.plates = plates
+        self.rifts = rifts
+        self.rifting_time = rifting_time
+        self.vertices = vertices
+
+        self.rotation_model = session._rotationModel
+        self.level_of_detail_cache = session.level_of_detail_cache
+
+    def run(self) -> None:
+        try:
+            plates = self.session.get_features(self.plates)
+            rifts = self.session.get_features(self.rifts)
+            result = preview_split(plates, rifts, self.rifting_time, self.rotation_model, self.level_of_detail_cache, self.vertices)
+        except Exception as e:
+            self.failed.emit(str(e))
+        else:
+            self.previewed.emit(result)
+
+
+def _remove_duplicate_points(lfc: LoadedFeatureCollection, tolerance: float) -> tuple[dict[str, int], dict[str, str]]:
+    # Removes the duplicate points of one collection's features in place, returns the removed vertices and the
+    # new revision of every changed feature
+    with profiling.phase("remove duplicate points"):
+        removed = remove_duplicate_points(lfc.feature_collection, tolerance)
+    revisions = {}
+    for feature_id in removed:
+        feature = lfc.get_feature(feature_id)
+        if feature is not None:
+            revisions[feature_id] = feature_revision(feature)
+    return removed, revisions
+
+
+class DuplicatePointsTask(QThread):
+    """Removes duplicate points from loaded feature collections (see `Session.remove_duplicate_points`), off the
+    GUI thread, so collections that were not parsed yet are parsed on this thread too.
+
+    `progress` is emitted after every collection. Cancelling stops before the next collection, the ones already
+    done keep their changes. `failed` is emitted if a collection could not be processed. Either way, `removed` is
+    emitted last with the changes of the collections done; the session applies them to its state and fills in
+    `report` (see `Session.remove_duplicate_points`) before the task's other slots see them.
+    """
+
+    progress = Signal(int, int, str)    # collections done, collections total, shortname of the last one done
+    removed = Signal(object)            # [(collection, removed vertices by feature ID, new revisions by feature ID)]
+    failed = Signal(str)                # error message
+
+    def __init__(self, collections: list[LoadedFeatureCollection], tolerance: float, profile: bool = False) -> None:
+        super().__init__()
+        self.collections = collections
+        self.tolerance = tolerance
+        self.profiler = Profiler(profile)
+        self.report: dict[str, tuple[int, int]] = {}
+        self._cancelled = False
+
+    def cancel(self) -> None:
+        self._cancelled = True
+
+    def run(self) -> None:
+        results = []
+        try:
+            with self.profiler.activate():
+                for done, lfc in enumerate(self.collections, 1):
+                    if self._cancelled:
+                        break
+                    removed, revisions = _remove_duplicate_points(lfc, self.tolerance)
+                    if len(removed) != 0:
+                        results.append((lfc, removed, revisions))
+                    self.progress.emit(done, len(self.collections), lfc.shortname)
+        except Exception as e:
+            self.failed.emit(str(e))
+        # Features changed in place even when a later collection failed, so the session has to know about them
+        self.removed.emit(results)
+
 
 class Session:
     def __init__(self) -> None:
@@ -20,12 +266,54 @@ class Session:
         self.windows: list[QWidget] = []
 
         self._feature_collection_names = QStringListModel()
-        self._feature_model = QStandardItemModel()
-        self._feature_model.setColumnCount(7)
-        self._feature_model.setHorizontalHeaderLabels(["Feature Name", "Feature Type", "Geometry Type", "Plate ID", "Start Time", "End Time", "Feature ID", "Feature Collection"])
+        self._feature_model = FeatureTableModel()
+
+        # Loaded collection of every feature by feature ID (see find_feature)
+        self._collection_by_feature_id: dict[str, LoadedFeatureCollection] = {}
 
         self._rotationModel_path: str = ""
         self._rotationModel: pygplates.RotationModel = None
+
+        # Reconstructed geometries of split plates and rifts, dropped when the rotation model or features change
+        self.reconstruction_cache = ReconstructionCache(revision_of=self._feature_revision)
+        # Simplified geometries for split previews, keyed by feature revision so changed features are simplified again
+        self.level_of_detail_cache = LevelOfDetailCache(revision_of=self._feature_revision)
+
+        # Number of worker processes used to split plates (1 splits serially on the splitting thread)
+        self.split_workers: int = default_worker_count()
+        self._split_tasks: list[SplitTask] = []
+        self._preview_tasks: list[PreviewTask] = []
+        self._duplicate_tasks: list[DuplicatePointsTask] = []
+
+        # Number of worker processes used to parse feature collections in the background
+        self.load_workers: int = default_worker_count()
+        self._load_tasks: list[FeatureCollectionLoadTask] = []
+
+        # Parsed files are cached on disk so they load quickly next time (None disables the cache)
+        self.feature_cache: FeatureCache | None = FeatureCache()
+
+        # Phase timings of loading and splitting, off unless switched on (see the splitting window) or requested
+        # by the environment
+        self.profiler = Profiler(profiling_requested())
+
+        # Areas, perimeters and vertex counts of the loaded features, kept up to date as collections change
+        self.statistics = PlateStatistics(self)
+
+        # Rows of background loads that still have to be added to the feature model, added a batch at a time
+        self._pending_rows: list[tuple[str, tuple]] = []     # (path, row)
+        self._row_timer = QTimer()
+        self._row_timer.setInterval(0)
+        self._row_timer.timeout.connect(self._commit_row_batch)
+
+        # Optional automatic reload of changed files; bursts of change notifications (editors tend to write a
+        # file in several steps) are collapsed into one reload
+        self._watcher = QFileSystemWatcher()
+        self._watcher.fileChanged.connect(self._on_file_changed)
+        self._watch_timer = QTimer()
+        self._watch_timer.setSingleShot(True)
+        self._watch_timer.setInterval(self.WATCH_DEBOUNCE_MS)
+        self._watch_timer.timeout.connect(self._on_watched_files_changed)
+        self._watching = False
     
     def load_rotation_model(self, path):
         self._rotationModel_path = path
@@ -37,6 +325,7 @@ class Session:
             return
         
         self._rotationModel = pygplates.RotationModel(self._rotationModel_path)
+        self.reconstruction_cache.clear()
 
     
     def get_feature_collection_model(self):
@@ -45,31 +334,180 @@ class Session:
     def get_feature_model(self):
         return self._feature_model
     
+    def find_feature(self, feature_id: str, shortname: str | None = None) -> tuple[LoadedFeatureCollection, pygplates.Feature] | None:
+        """Looks up a loaded feature by its feature ID, returning it together with its collection.
+
+        Should an ID exist in several collections, `shortname` picks the collection, otherwise the collection
+        loaded first is used.
+        """
+        if shortname is None:
+            lfc = self._collection_by_feature_id.get(feature_id)
+        else:
+            lfc = next(filter(lambda x: x.shortname == shortname, self.loaded_feature_collections), None)
+        if lfc is None:
+            return None
+        
+        feature = lfc.get_feature(feature_id)
+        if feature is None:
+            return None
+        
+        return lfc, feature
+    
+    def get_feature(self, feature_id: str, shortname: str | None = None) -> pygplates.Feature | None:
+        found = self.find_feature(feature_id, shortname)
+        return found[1] if found else None
+
+    def has_feature(self, feature_id: str, shortname: str) -> bool:
+        """Whether the named collection is loaded and has the feature, without parsing the collection."""
+        lfc = next(filter(lambda x: x.shortname == shortname, self.loaded_feature_collections), None)
+        return lfc is not None and feature_id in lfc.feature_id_set
+
+    def get_features(self, keys: list[tuple[str, str]]) -> list[pygplates.Feature]:
+        """Looks up features by (feature ID, collection shortname), parsing the collections on the calling thread
+        if they were not parsed yet. Raises ValueError if a feature is not loaded (any more)."""
+        features = []
+        for feature_id, shortname in keys:
+            feature = self.get_feature(feature_id, shortname)
+            if feature is None:
+                raise ValueError(f"Feature {feature_id} of {shortname} is not loaded")
+            features.append(feature)
+        return features
+    
+    def _feature_revision(self, feature: pygplates.Feature) -> str:
+        # Revisions of loaded features are known from loading them, others have to be computed
+        feature_id = feature.get_feature_id().get_string()
+        lfc = self._collection_by_feature_id.get(feature_id)
+        if lfc is not None and feature_id in lfc.feature_revisions and lfc.get_feature(feature_id) is feature:
+            return lfc.feature_revisions[feature_id]
+        return feature_revision(feature)
+    
+    def _index_collection(self, lfc: LoadedFeatureCollection, rows: list[tuple]) -> None:
+        lfc.feature_ids = [row[6] for row in rows]
+        lfc.feature_id_set = set(lfc.feature_ids)
+        lfc.feature_revisions = {row[6]: row[8] for row in rows}
+
+        # Should an ID exist in several collections, the collection loaded first wins (also when a collection
+        # loaded earlier is indexed again after a reload)
+        order = {id(x): i for i, x in enumerate(self.loaded_feature_collections)}
+        position = order.get(id(lfc), len(order))
+        for feature_id in lfc.feature_ids:
+            current = self._collection_by_feature_id.get(feature_id)
+            if current is None or order.get(id(current), len(order)) > position:
+                self._collection_by_feature_id[feature_id] = lfc
+    
+    def _unindex_collection(self, lfc: LoadedFeatureCollection) -> None:
+        # IDs the collection shares with other loaded collections go to the first of those
+        others = [x for x in self.loaded_feature_collections if x is not lfc]
+        for feature_id in lfc.feature_ids:
+            if self._collection_by_feature_id.get(feature_id) is lfc:
+                other = next((x for x in others if feature_id in x.feature_id_set), None)
+                if other is None:
+                    del self._collection_by_feature_id[feature_id]
+                else:
+                    self._collection_by_feature_id[feature_id] = other
+    
+    def _new_paths(self, paths: list[str]) -> list[str]:
+        return [p for p in paths if len([lfc for lfc in self.loaded_feature_collections if lfc.path == p]) == 0]
+
     def load_feature_collections(self, paths: list[str]) -> None:
-        new_paths = [p for p in paths if len([lfc for lfc in self.loaded_feature_collections if lfc.path == p]) == 0]
+        new_paths = self._new_paths(paths)
 
         if len(new_paths) == 0:
             return
         
         for path in new_paths:
-            lfc = LoadedFeatureCollection(path, pygplates.FeatureCollection(path))
+            with self.profiler.activate(), profiling.phase("load feature collection"):
+                signature, rows, feature_collection = read_feature_collection(path, os.path.basename(path), self.feature_cache)
+            lfc = LoadedFeatureCollection(path, feature_collection, signature)
             self.loaded_feature_collections.append(lfc)
-            for feature in lfc.feature_collection:
-                feature_item: Sequence[QStandardItem] = []
+            self._watch(lfc.path)
+            self._index_collection(lfc, rows)
+            self._feature_model.append_rows(rows, lfc.path)
 
-                feature_item.append(QStandardItem(feature.get_name()))                          # Feature Name
-                feature_item.append(QStandardItem(feature.get_feature_type().get_name()))       # Feature Type
-                feature_item.append(QStandardItem(type(feature.get_geometry()).__name__))       # Geometry Type
-                feature_item.append(QStandardItem(str(feature.get_reconstruction_plate_id())))  # Plate ID
-                feature_item.append(QStandardItem(str(feature.get_valid_time()[0])))            # Start Time
-                feature_item.append(QStandardItem(str(feature.get_valid_time()[1])))            # End Time
-                feature_item.append(QStandardItem(feature.get_feature_id().get_string()))       # Feature ID
-                feature_item.append(QStandardItem(lfc.shortname))                               # Feature Collection (shortname)
+        # Completely update our names model
+        self._feature_collection_names.setStringList([x.shortname for x in self.loaded_feature_collections])
 
-                self._feature_model.appendRow(feature_item)
+    # Number of rows added to the feature model per event loop iteration while loading in the background
+    ROW_BATCH_SIZE = 2000
 
-        # Completely update our names model
+    def load_feature_collections_async(self, paths: list[str]) -> FeatureCollectionLoadTask | None:
+        """Loads feature collections in the background and returns the task (None if nothing is new) without
+        starting it (see `split_async`).
+
+        Each file is added to the session as soon as it (and every file before it) has been parsed, its rows
+        are then added to the feature model in batches so the GUI stays responsive. Cancelling the task keeps
+        the files that were already added.
+        """
+        new_paths = self._new_paths(paths)
+
+        if len(new_paths) == 0:
+            return None
+
+        task = FeatureCollectionLoadTask(new_paths, self.load_workers, self.feature_cache)
+        task.fileLoaded.connect(self._on_file_loaded)
+        task.finished.connect(lambda: self._load_tasks.remove(task))
+        self._load_tasks.append(task)
+
+        return task
+
+    def split_async(self, plates: list[tuple[str, str]], rifts: list[tuple[str, str]], rifting_time: float, output_path: str) -> SplitTask:
+        """Splits the plates by the rifts (both given as (feature ID, collection shortname) pairs) and saves the new
+        features in the background. Returns the task without starting it, so the caller can connect to its
+        signals before calling `start()` (a quick failure would otherwise be emitted before anyone listens)."""
+        task = SplitTask(self, plates, rifts, rifting_time, output_path)
+        # The task records its phases into a profiler of its own, which is added to the session's on this thread
+        # (before the caller's slots see the result) once the task is done
+        for done in (task.saved, task.failed, task.cancelled):
+            done.connect(lambda *_: self.profiler.merge_profile(task.profiler))
+        task.finished.connect(lambda: self._split_tasks.remove(task))
+        self._split_tasks.append(task)
+
+        return task
+
+    def preview_split(self, plates: list[pygplates.Feature], rifts: list[pygplates.Feature], rifting_time: float, vertices: int = PREVIEW_VERTICES):
+        """Splits simplified plates by simplified rifts for a quick preview (see `preview_split`), on the calling thread."""
+        return preview_split(plates, rifts, rifting_time, self._rotationModel, self.level_of_detail_cache, vertices)
+
+    def preview_split_async(self, plates: list[tuple[str, str]], rifts: list[tuple[str, str]], rifting_time: float, vertices: int = PREVIEW_VERTICES) -> PreviewTask:
+        """Previews the split of the plates by the rifts (both given as in `split_async`) in the background, returns
+        the task without starting it (see `split_async`)."""
+        task = PreviewTask(self, plates, rifts, rifting_time, vertices)
+        task.finished.connect(lambda: self._preview_tasks.remove(task))
+        self._preview_tasks.append(task)
+
+        return task
+
+    def _on_file_loaded(self, path: str, result: tuple[FileSignature, list[tuple]]) -> None:
+        if len(self._new_paths([path])) == 0:
+            return
+
+        signature, rows = result
+        lfc = LoadedFeatureCollection(path, signature=signature)
+        self.loaded_feature_collections.append(lfc)
+        self._watch(lfc.path)
+        self._index_collection(lfc, rows)
         self._feature_collection_names.setStringList([x.shortname for x in self.loaded_feature_collections])
+
+        self._pending_rows.extend((path, row) for row in rows)
+        if not self._row_timer.isActive():
+            self._row_timer.start()
+
+    def _commit_row_batch(self) -> None:
+        batch = self._pending_rows[:self.ROW_BATCH_SIZE]
+        del self._pending_rows[:self.ROW_BATCH_SIZE]
+
+        # Rows of collections that were unloaded while waiting are dropped
+        loaded = {lfc.path for lfc in self.loaded_feature_collections}
+        for path, rows in itertools.groupby(batch, key=lambda pending: pending[0]):
+            if path in loaded:
+                self._feature_model.append_rows([row for _, row in rows], path)
+
+        if len(self._pending_rows) == 0:
+            self._row_timer.stop()
+    
+    def _flush_pending_rows(self) -> None:
+        while len(self._pending_rows) != 0:
+            self._commit_row_batch()
     
     def unload_feature_collection(self, shortname):
         lfc = next(filter(lambda x: x.shortname == shortname, self.loaded_feature_collections), None)
@@ -78,34 +516,144 @@ class Session:
             return
         
         self.loaded_feature_collections.remove(lfc)
+        self._unindex_collection(lfc)
+        self.reconstruction_cache.discard(lfc.feature_ids)
+        self.level_of_detail_cache.discard(lfc.feature_ids)
+        if lfc.path in self._watcher.files():
+            self._watcher.removePath(lfc.path)
 
         # Update Feature Collection name model
         index = self._feature_collection_names.stringList().index(shortname)
         self._feature_collection_names.removeRow(index)
 
         # Update Feature Model
-        items = self._feature_model.findItems(shortname, Qt.MatchFlag.MatchFixedString, 7)
-        for i in items:
-            self._feature_model.removeRow(i.row())
+        self._feature_model.remove_collection(lfc.path)
+    
+    def _changed_signature(self, lfc: LoadedFeatureCollection) -> FileSignature | None:
+        # Returns the file's current signature if it changed since it was read (and None if not), so reading it
+        # does not have to hash it again
+        if lfc.signature is not None and lfc.signature.stat_matches(lfc.path):
+            return None
+
+        # Touched but possibly not modified, only the content decides
+        signature = FileSignature.of(lfc.path)
+        if lfc.signature is not None and signature.content_hash == lfc.signature.content_hash:
+            lfc.signature = signature
+            return None
+        return signature
     
     def reload_features(self):
-        self._feature_model.removeRows(0, self._feature_model.rowCount())
-        self._feature_model.setColumnCount(7)
-        self._feature_model.setHorizontalHeaderLabels(["Feature Name", "Feature Type", "Geometry Type", "Plate ID", "Start Time", "End Time", "Feature ID", "Feature Collection"])
+        """Re-reads the loaded feature collections whose files changed since they were read.
+
+        Unchanged files are skipped. For the others the feature model is updated row by row (by feature ID),
+        so filters and selections of unaffected rows survive. Only re-read files get a revision per feature (see
+        `read_feature_collection`), to keep the cached reconstructions of their unchanged features. Returns the
+        names of the re-read collections.
+        """
+        # Rows still waiting from a background load have to be in the model before it can be diffed
+        self._flush_pending_rows()
+        self._row_timer.stop()
+
+        reloaded = []
+        for lfc in self.loaded_feature_collections:
+            if not os.path.exists(lfc.path):
+                continue
+            signature = self._changed_signature(lfc)
+            if signature is None:
+                continue
+
+            with self.profiler.activate(), profiling.phase("reload feature collection"):
+                signature, rows, feature_collection = read_feature_collection(lfc.path, lfc.shortname, self.feature_cache, signature, feature_revisions=True)
+
+            old_revisions = lfc.feature_revisions
+            self._unindex_collection(lfc)
+            lfc.feature_collection = feature_collection
+            lfc.signature = signature
+            self._index_collection(lfc, rows)
+
+            # Reconstructions of features that did not change stay valid
+            self.reconstruction_cache.discard([id for id, revision in old_revisions.items() if lfc.feature_revisions.get(id) != revision])
+            self._feature_model.update_collection(lfc.path, rows)
+
+            reloaded.append(lfc.shortname)
+
+        return reloaded
+
+    def remove_duplicate_points(self, tolerance: float = DEFAULT_TOLERANCE, shortnames: list[str] | None = None) -> dict[str, tuple[int, int]]:
+        """Removes duplicate consecutive vertices from the polygons and polylines of the loaded feature collections
+        (or of the named ones), see `remove_duplicate_points`, on the calling thread.
 
+        Only the loaded features change, the files stay as they are until saved (see `save_feature_collection`).
+        Returns the number of changed features and removed vertices of every collection that changed.
+        """
+        results = []
         for lfc in self.loaded_feature_collections:
-            lfc.feature_collection = pygplates.FeatureCollection(lfc.path)
+            if shortnames is None or lfc.shortname in shortnames:
+                with self.profiler.activate():
+                    removed, revisions = _remove_duplicate_points(lfc, tolerance)
+                if len(removed) != 0:
+                    results.append((lfc, removed, revisions))
+        return self._apply_duplicate_point_removal(results)
 
-            for feature in lfc.feature_collection:
-                feature_item: Sequence[QStandardItem] = []
+    def remove_duplicate_points_async(self, tolerance: float = DEFAULT_TOLERANCE, shortnames: list[str] | None = None) -> DuplicatePointsTask:
+        """Removes duplicate points as `remove_duplicate_points` does, in the background. Returns the task without
+        starting it (see `split_async`); its `report` is filled in once it is done."""
+        collections = [lfc for lfc in self.loaded_feature_collections if shortnames is None or lfc.shortname in shortnames]
+        task = DuplicatePointsTask(collections, tolerance, self.profiler.enabled)
+        task.removed.connect(lambda results: setattr(task, "report", self._apply_duplicate_point_removal(results)))
+        task.removed.connect(lambda _: self.profiler.merge_profile(task.profiler))
+        task.finished.connect(lambda: self._duplicate_tasks.remove(task))
+        self._duplicate_tasks.append(task)
 
-                feature_item.append(QStandardItem(feature.get_name()))                          # Feature Name
-                feature_item.append(QStandardItem(feature.get_feature_type().get_name()))       # Feature Type
-                feature_item.append(QStandardItem(type(feature.get_geometry()).__name__))       # Geometry Type
-                feature_item.append(QStandardItem(str(feature.get_reconstruction_plate_id())))  # Plate ID
-                feature_item.append(QStandardItem(str(feature.get_valid_time()[0])))            # Start Time
-                feature_item.append(QStandardItem(str(feature.get_valid_time()[1])))            # End Time
-                feature_item.append(QStandardItem(feature.get_feature_id().get_string()))       # Feature ID
-                feature_item.append(QStandardItem(lfc.shortname))                               # Feature Collection (shortname)
+        return task
 
-                self._feature_model.appendRow(feature_item)
\ No newline at end of file
+    def _apply_duplicate_point_removal(self, results: list[tuple[LoadedFeatureCollection, dict[str, int], dict[str, str]]]) -> dict[str, tuple[int, int]]:
+        report = {}
+        for lfc, removed, revisions in results:
+            lfc.feature_revisions.update(revisions)
+            self.reconstruction_cache.discard(removed)
+            report[lfc.shortname] = (len(removed), sum(removed.values()))
+        return report
+
+    def save_feature_collection(self, shortname: str) -> None:
+        """Writes a loaded feature collection (with any changes made to its features) back to its file."""
+        lfc = next(filter(lambda x: x.shortname == shortname, self.loaded_feature_collections), None)
+        if not lfc:
+            return
+
+        write_feature_collection(lfc.feature_collection, lfc.path)
+        # The file now matches the loaded features, so it must not count as changed on the next reload
+        lfc.signature = FileSignature.of(lfc.path)
+        self._watch(lfc.path)
+
+    # Time to wait for further change notifications before reloading watched files
+    WATCH_DEBOUNCE_MS = 500
+
+    def is_watching_files(self) -> bool:
+        return self._watching
+
+    def set_watch_files(self, enabled: bool) -> None:
+        """Enables or disables reloading loaded feature collections automatically when their files change."""
+        self._watching = enabled
+
+        if enabled:
+            for lfc in self.loaded_feature_collections:
+                self._watch(lfc.path)
+        else:
+            self._watch_timer.stop()
+            if len(self._watcher.files()) != 0:
+                self._watcher.removePaths(self._watcher.files())
+
+    def _watch(self, path: str) -> None:
+        if self._watching and os.path.exists(path) and path not in self._watcher.files():
+            self._watcher.addPath(path)
+
+    def _on_file_changed(self, path: str) -> None:
+        self._watch_timer.start()
+
+    def _on_watched_files_changed(self) -> None:
+        self.reload_features()
+
+        # Files replaced on save (written to a new file, then renamed) drop out of the watcher
+        for lfc in self.loaded_feature_collections:
+            self._watch(lfc.path)
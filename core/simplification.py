@@ -0,0 +1,181 @@
+from collections import OrderedDict
+import threading
+from typing import Callable
+
+import numpy as np
+import pygplates
+
+from core import profiling
+from core.arc_geometry import angular_distances, normalized, ring_sizes
+from core.feature_loading import feature_revision
+
+
+def arc_distances(points: np.ndarray, starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+    """Great-circle distances (in radians) of points from the arcs between starts and ends, row by row."""
+    normals = normalized(np.cross(starts, ends))
+    heights = np.einsum("ij,ij->i", points, normals)
+
+    # The foot of the perpendicular lies on the arc if it is on the inner side of both ends
+    feet = points - heights[:, None] * normals
+    on_arc = (np.einsum("ij,ij->i", np.cross(starts, feet), normals) >= 0.0) & (np.einsum("ij,ij->i", np.cross(feet, ends), normals) >= 0.0)
+    # Arcs between (nearly) the same points have no great circle, their distance is the one to the end points
+    on_arc &= np.linalg.norm(np.cross(starts, ends), axis=1) > 1e-15
+
+    return np.where(on_arc, np.abs(np.arcsin(np.clip(heights, -1.0, 1.0))), np.minimum(angular_distances(points, starts), angular_distances(points, ends)))
+
+def _chain_importance(points: np.ndarray, importance: np.ndarray, first: int, last: int) -> None:
+    # Douglas-Peucker on the chain points[first..last] (the index `len(points)` stands for point 0 again), all
+    # segments of one depth at a time. Every vertex gets the distance at which it splits its segment, at most
+    # the value of the vertex that split off that segment, so that keeping the vertices above any tolerance
+    # gives exactly the Douglas-Peucker result for that tolerance
+    count = len(points)
+    starts = np.array([first]); ends = np.array([last]); limits = np.array([np.inf])
+
+    while len(starts) != 0:
+        interior = ends - starts - 1
+        active = interior > 0
+        starts = starts[active]; ends = ends[active]; limits = limits[active]; interior = interior[active]
+        if len(starts) == 0:
+            break
+
+        segment = np.repeat(np.arange(len(starts)), interior)
+        offsets = np.concatenate(([0], np.cumsum(interior)[:-1]))
+        indices = starts[segment] + 1 + np.arange(len(segment)) - offsets[segment]
+        distances = arc_distances(points[indices % count], points[starts[segment] % count], points[ends[segment] % count])
+
+        # The farthest vertex of every segment (the first one of equally far vertices)
+        farthest = np.maximum.reduceat(distances, offsets)
+        candidates = np.flatnonzero(distances == farthest[segment])
+        splits = indices[candidates[np.concatenate(([True], segment[candidates][1:] != segment[candidates][:-1]))]]
+
+        values = np.minimum(farthest, limits)
+        importance[splits % count] = values
+        starts, ends, limits = np.concatenate((starts, splits)), np.concatenate((splits, ends)), np.concatenate((values, values))
+
+def vertex_importance(points: np.ndarray, closed: bool) -> np.ndarray:
+    """Returns for every vertex of a line (or ring, if `closed`) the largest Douglas-Peucker tolerance (a
+    great-circle distance in radians) at which it is still kept.
+
+    The ends of lines are always kept (infinite importance). Rings are split into two lines at their first vertex
+    and the vertex farthest from it, which are kept together with the farthest vertex from those two, so a
+    simplified ring keeps at least three vertices.
+    """
+    count = len(points)
+    importance = np.zeros(count)
+    if count <= (3 if closed else 2):
+        importance[:] = np.inf
+        return importance
+
+    if not closed:
+        importance[[0, -1]] = np.inf
+        _chain_importance(points, importance, 0, count - 1)
+        return importance
+
+    opposite = int(np.argmax(angular_distances(points, points[:1])))
+    importance[[0, opposite]] = np.inf
+    _chain_importance(points, importance, 0, opposite)
+    _chain_importance(points, importance, opposite, count)
+    importance[int(np.argmax(np.where(np.isinf(importance), -1.0, importance)))] = np.inf
+    return importance
+
+
+class LevelsOfDetail:
+    """Simplified versions of one polygon or polyline, at any tolerance or vertex budget.
+
+    The vertex importances are computed once (see `vertex_importance`), after which every level of detail is
+    a threshold on them. Levels that were asked for are cached.
+    """
+
+    def __init__(self, geometry: pygplates.GeometryOnSphere) -> None:
+        self.geometry = geometry
+        self.closed = isinstance(geometry, pygplates.PolygonOnSphere)
+        points = np.asarray(geometry.to_xyz_array(), dtype=np.float64).reshape(-1, 3)
+        sizes = ring_sizes(geometry) or [len(points)]
+        self.offsets = np.concatenate(([0], np.cumsum(sizes)))
+        self.points = points
+        self.importance = np.concatenate([vertex_importance(points[start:end], self.closed) for start, end in zip(self.offsets[:-1], self.offsets[1:])])
+        self._levels: dict[tuple[str, float], pygplates.GeometryOnSphere] = {}
+
+    def __len__(self) -> int:
+        return len(self.points)
+
+    def _simplified(self, keep: np.ndarray) -> pygplates.GeometryOnSphere:
+        if keep.all():
+            return self.geometry
+        rings = [self.points[start:end][keep[start:end]] for start, end in zip(self.offsets[:-1], self.offsets[1:])]
+        if not self.closed:
+            return pygplates.PolylineOnSphere(rings[0])
+        return pygplates.PolygonOnSphere(rings[0], rings[1:]) if len(rings) > 1 else pygplates.PolygonOnSphere(rings[0])
+
+    def at_tolerance(self, tolerance: float) -> pygplates.GeometryOnSphere:
+        """Returns the geometry without the vertices that lie within `tolerance` (radians) of the simplified
+        outline, i.e. the Douglas-Peucker simplification of every ring."""
+        key = ("tolerance", float(tolerance))
+        if key not in self._levels:
+            self._levels[key] = self._simplified(self.importance > tolerance)
+        return self._levels[key]
+
+    def with_vertex_budget(self, vertices: int) -> pygplates.GeometryOnSphere:
+        """Returns the most detailed simplification with at most `vertices` vertices (more only if the rings
+        need them to stay rings)."""
+        key = ("vertices", float(vertices))
+        if key not in self._levels:
+            keep = np.zeros(len(self.points), dtype=bool)
+            keep[np.argsort(-self.importance, kind="stable")[:vertices]] = True
+            self._levels[key] = self._simplified(keep | np.isinf(self.importance))
+        return self._levels[key]
+
+
+class LevelOfDetailCache:
+    """Least recently used cache of the `LevelsOfDetail` of feature geometries.
+
+    Entries are keyed by feature ID and revision, so changed features are simplified again. Simplifying does
+    not depend on the position of a geometry, so the levels of the present-day geometries serve every
+    reconstruction time and rotation model.
+    """
+
+    def __init__(self, max_entries: int = 2000, revision_of: Callable[[pygplates.Feature], str] = feature_revision) -> None:
+        self.max_entries = max_entries
+        self._revision_of = revision_of
+        self._entries: OrderedDict[tuple[str, str], list[LevelsOfDetail]] = OrderedDict()
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def discard(self, feature_ids) -> None:
+        """Drops the levels of detail of the given features."""
+        feature_ids = set(feature_ids)
+        with self._lock:
+            for key in [key for key in self._entries if key[0] in feature_ids]:
+                del self._entries[key]
+
+    def levels(self, feature: pygplates.Feature) -> list[LevelsOfDetail]:
+        """Returns the levels of detail of the polygons and polylines of the feature's default geometry property."""
+        key = (feature.get_feature_id().get_string(), self._revision_of(feature))
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                profiling.count("level of detail cache hits", 1)
+                return self._entries[key]
+
+        with profiling.phase("simplify geometries"):
+            levels = [LevelsOfDetail(geometry) for geometry in feature.get_geometries() if ring_sizes(geometry) is not None]
+
+        with self._lock:
+            self._entries[key] = levels
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return levels
+
+    def coarse_feature(self, feature: pygplates.Feature, vertices: int) -> pygplates.Feature:
+        """Returns a copy of the feature whose polygons and polylines have at most `vertices` vertices each."""
+        coarse = feature.clone()
+        levels = self.levels(feature)
+        if len(levels) != 0:
+            coarse.set_geometry([level.with_vertex_budget(vertices) for level in levels])
+        return coarse
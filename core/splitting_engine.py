@@ -0,0 +1,387 @@
+import os
+import tempfile
+from typing import Callable
+
+import pygplates
+
+from core import profiling
+from core.parallel_splitting import SplitCancelled, split_line_batches, split_plate_batches, split_plates_by_polygon
+from core.reconstruction_cache import ReconstructionCache
+from core.simplification import LevelOfDetailCache
+
+
+# Most vertices of every polygon and rift in a split preview
+PREVIEW_VERTICES = 500
+
+
+def _reconstruct(plates, rifts: list[pygplates.Feature], rifting_time: float, rotation_model: pygplates.RotationModel, reconstruction_cache: ReconstructionCache | None):
+    # Returns the reconstructed plate geometries and the rift lines at the rifting time. Raises ValueError if a
+    # rift does not exist at that time, splitting without it would silently leave plates whole
+    with profiling.phase("reconstruct"):
+        if reconstruction_cache is not None:
+            snapshot_features = reconstruction_cache.reconstruct(list(plates), rotation_model, rifting_time)
+            rift_snapshot_features = reconstruction_cache.reconstruct(rifts, rotation_model, rifting_time)
+        else:
+            initial_feature_collection = pygplates.FeatureCollection(plates)
+            snapshot = pygplates.ReconstructSnapshot(initial_feature_collection, rotation_model, rifting_time)
+            rift_snapshot = pygplates.ReconstructSnapshot(pygplates.FeatureCollection(rifts), rotation_model, rifting_time)
+            snapshot_features = snapshot.get_reconstructed_geometries()
+            rift_snapshot_features = rift_snapshot.get_reconstructed_geometries()
+
+    # The first reconstructed geometry of every rift is its rift line
+    rift_lines = {}
+    for rift_feature in rift_snapshot_features:
+        rift_lines.setdefault(rift_feature.get_feature().get_feature_id().get_string(), rift_feature.get_reconstructed_geometry())
+
+    missing = [rift.get_feature_id().get_string() for rift in rifts if rift.get_feature_id().get_string() not in rift_lines]
+    if len(missing) != 0:
+        raise ValueError(f"No geometry of {', '.join(missing)} exists at {rifting_time:g} Ma")
+
+    return snapshot_features, list(rift_lines.values())
+
+def _create_split_features(snapshot_features, split_results, rifting_time: float, rotation_model: pygplates.RotationModel) -> pygplates.FeatureCollection:
+    # Creates the (reverse reconstructed) features of the split plates
+    new_collection = pygplates.FeatureCollection()
+
+    for feature, plates in zip(snapshot_features, split_results):
+        if len(plates) == 0:
+            # Ignore making features if we have no plates
+            continue
+
+        plate_feature = feature.get_feature()
+
+        for new_plate in [
+            pygplates.Feature.create_reconstructable_feature(plate_feature.get_feature_type(), split_plate, f"{plate_feature.get_name()} [{i}]", reconstruction_plate_id=plate_feature.get_reconstruction_plate_id())
+            for i, split_plate in enumerate(plates)
+            ]:
+            new_plate.set_valid_time(rifting_time, float("-inf"))
+            new_collection.add(new_plate)
+    
+    with profiling.phase("reverse reconstruct"):
+        pygplates.reverse_reconstruct(new_collection, rotation_model, rifting_time)
+
+    return new_collection
+
+def split_features(plates, rifts: pygplates.Feature | list[pygplates.Feature], rifting_time: float, rotation_model: pygplates.RotationModel, workers: int = 1, reconstruction_cache: ReconstructionCache | None = None, progress: Callable[[int, int], None] | None = None, is_cancelled: Callable[[], bool] | None = None) -> pygplates.FeatureCollection:
+    """Splits the plate features by the rift(s) at the rifting time and returns the new (reverse reconstructed) features.
+
+    Several rifts (e.g. a rift network) split every plate in one pass, see `split_plate_by_lines`. With a
+    reconstruction cache, only plates and rifts not reconstructed at this time before are reconstructed.
+    `progress` and `is_cancelled` are passed on to `split_plate_batches`. Raises ValueError if a rift does not
+    exist at the rifting time.
+    """
+    return sweep_split_features(plates, rifts, [rifting_time], rotation_model, workers, reconstruction_cache, progress, is_cancelled)[0]
+
+def sweep_split_features(plates, rifts: pygplates.Feature | list[pygplates.Feature], rifting_times: list[float], rotation_model: pygplates.RotationModel, workers: int = 1, reconstruction_cache: ReconstructionCache | None = None, progress: Callable[[int, int], None] | None = None, is_cancelled: Callable[[], bool] | None = None) -> list[pygplates.FeatureCollection]:
+    """Splits the plate features by the rift(s) at each of the rifting times (see `split_features`).
+
+    Everything is reconstructed for all times first, then the plates of all times are split in one (parallel)
+    pass. Plates that do not exist at a time are left out of that time's result. Returns the new features of
+    every time, in the order of `rifting_times`. Raises `SplitCancelled` once `is_cancelled` returns True.
+    """
+    if isinstance(rifts, pygplates.Feature):
+        rifts = [rifts]
+
+    reconstructions = []
+    for time in rifting_times:
+        if is_cancelled is not None and is_cancelled():
+            raise SplitCancelled()
+        reconstructions.append(_reconstruct(plates, rifts, time, rotation_model, reconstruction_cache))
+
+    # Split all reconstructed geometries up front (in parallel if configured), results keep the snapshot order
+    with profiling.phase("split plates"):
+        split_results = split_plate_batches(
+            [([feature.get_reconstructed_geometry() for feature in snapshot_features], rift_lines) for snapshot_features, rift_lines in reconstructions],
+            workers,
+            progress,
+            is_cancelled
+        )
+
+    with profiling.phase("create features"):
+        return [
+            _create_split_features(snapshot_features, results, time, rotation_model)
+            for time, (snapshot_features, _), results in zip(rifting_times, reconstructions, split_results)
+        ]
+
+def preview_split(plates, rifts: pygplates.Feature | list[pygplates.Feature], rifting_time: float, rotation_model: pygplates.RotationModel, level_of_detail_cache: LevelOfDetailCache, vertices: int = PREVIEW_VERTICES) -> tuple[list[tuple[pygplates.GeometryOnSphere, list[pygplates.PolygonOnSphere]]], list[pygplates.PolylineOnSphere]]:
+    """Splits simplified copies of the plates by simplified rifts at the rifting time, fast enough to redraw while
+    the selection or time changes.
+
+    Every polygon and polyline keeps at most `vertices` vertices (see `LevelOfDetailCache.coarse_feature`), so
+    the pieces only approximate those of `split_features`, which always splits at full resolution. Returns the
+    reconstructed coarse geometry and pieces of every plate, and the coarse rift lines, at the rifting time.
+    """
+    if isinstance(rifts, pygplates.Feature):
+        rifts = [rifts]
+
+    with profiling.phase("preview"):
+        coarse_plates = [level_of_detail_cache.coarse_feature(plate, vertices) for plate in plates]
+        coarse_rifts = [level_of_detail_cache.coarse_feature(rift, vertices) for rift in rifts]
+        # The copies are new features every time, not worth caching their reconstructions
+        snapshot_features, rift_lines = _reconstruct(coarse_plates, coarse_rifts, rifting_time, rotation_model, None)
+        geometries = [feature.get_reconstructed_geometry() for feature in snapshot_features]
+
+        split_results = split_plate_batches([(geometries, rift_lines)])[0]
+
+    return list(zip(geometries, split_results)), rift_lines
+
+
+def _create_piece_features(snapshot_features, split_results, rifting_time: float, rotation_model: pygplates.RotationModel, label: str = "") -> pygplates.FeatureCollection:
+    # Every piece is a copy of its feature (with all its properties) that has the piece as its geometry
+    new_collection = pygplates.FeatureCollection()
+
+    for reconstructed, pieces in zip(snapshot_features, split_results):
+        feature = reconstructed.get_feature()
+        property_name = reconstructed.get_property().get_name()
+        _, end_time = feature.get_valid_time()
+
+        for i, piece in enumerate(pieces):
+            new_feature = feature.clone()
+            new_feature.set_geometry(piece, property_name)
+            new_feature.set_name(f"{feature.get_name()} [{label}{i}]")
+            new_feature.set_valid_time(rifting_time, end_time)
+            new_collection.add(new_feature)
+
+    with profiling.phase("reverse reconstruct"):
+        pygplates.reverse_reconstruct(new_collection, rotation_model, rifting_time)
+
+    return new_collection
+
+def split_line_features(lines, rifts: pygplates.Feature | list[pygplates.Feature], rifting_time: float, rotation_model: pygplates.RotationModel, workers: int = 1, reconstruction_cache: ReconstructionCache | None = None, progress: Callable[[int, int], None] | None = None, is_cancelled: Callable[[], bool] | None = None) -> pygplates.FeatureCollection:
+    """Splits line features (e.g. `SubductionZone`s) wherever the rift(s) cross them at the rifting time and
+    returns the new (reverse reconstructed) features.
+
+    Every reconstructed polyline of the features is split in one batched pass (see `split_line_batches`, which
+    also decides whether a process pool is worth it). Every piece keeps all properties of its feature, and
+    exists from the rifting time to the end of the feature's valid time. Lines no rift crosses are copied the
+    same way as a single piece. `progress` and `is_cancelled` are passed on to `split_line_batches`.
+    """
+    if isinstance(rifts, pygplates.Feature):
+        rifts = [rifts]
+
+    snapshot_features, rift_lines = _reconstruct(lines, rifts, rifting_time, rotation_model, reconstruction_cache)
+    snapshot_features = [feature for feature in snapshot_features if isinstance(feature.get_reconstructed_geometry(), pygplates.PolylineOnSphere)]
+
+    with profiling.phase("split lines"):
+        split_results = split_line_batches(
+            [([feature.get_reconstructed_geometry() for feature in snapshot_features], rift_lines)],
+            workers,
+            progress,
+            is_cancelled
+        )[0]
+
+    with profiling.phase("create features"):
+        return _create_piece_features(snapshot_features, split_results, rifting_time, rotation_model)
+
+def split_features_by_polygon(plates, cutter: pygplates.Feature, rifting_time: float, rotation_model: pygplates.RotationModel, workers: int = 1, reconstruction_cache: ReconstructionCache | None = None, progress: Callable[[int, int], None] | None = None, is_cancelled: Callable[[], bool] | None = None) -> tuple[pygplates.FeatureCollection, pygplates.FeatureCollection]:
+    """Splits polygon features (e.g. `OceanCrust`) by the polygon of the cutter feature at the rifting time and
+    returns the new (reverse reconstructed) features inside and outside of the cutter.
+
+    The cutter is prepared once for all plates (see `split_plates_by_polygon`). Pieces are copies of their
+    features like those of `split_line_features`, named "[in i]" and "[out i]". Plates with holes are skipped
+    and get no pieces. `progress` and `is_cancelled` are passed on to `split_plates_by_polygon`.
+    """
+    snapshot_features, cutter_geometries = _reconstruct(plates, [cutter], rifting_time, rotation_model, reconstruction_cache)
+    if not isinstance(cutter_geometries[0], pygplates.PolygonOnSphere):
+        raise ValueError(f"The cutter {cutter.get_feature_id().get_string()} has no polygon at {rifting_time:g} Ma")
+    snapshot_features = [feature for feature in snapshot_features if isinstance(feature.get_reconstructed_geometry(), pygplates.PolygonOnSphere)]
+
+    with profiling.phase("split plates"):
+        split_results = split_plates_by_polygon([feature.get_reconstructed_geometry() for feature in snapshot_features], cutter_geometries[0], workers, progress, is_cancelled)
+
+    with profiling.phase("create features"):
+        return (
+            _create_piece_features(snapshot_features, [inside for inside, _ in split_results], rifting_time, rotation_model, "in "),
+            _create_piece_features(snapshot_features, [outside for _, outside in split_results], rifting_time, rotation_model, "out ")
+        )
+
+
+def combine_by_time(collections: list[pygplates.FeatureCollection], rifting_times: list[float]) -> pygplates.FeatureCollection:
+    """Merges the results of a sweep into one collection, tagging every feature with its rifting time.
+
+    The time is stored in the RIFT_TIME shapefile attribute, which GPlates shows (and can filter by) as well.
+    """
+    combined = pygplates.FeatureCollection()
+    for collection, time in zip(collections, rifting_times):
+        for feature in collection:
+            feature.set_shapefile_attribute("RIFT_TIME", float(time))
+            combined.add(feature)
+    return combined
+
+
+def _new_file_mode() -> int:
+    umask = os.umask(0)
+    os.umask(umask)
+    return 0o666 & ~umask
+
+def write_feature_collection(feature_collection: pygplates.FeatureCollection, path: str, is_cancelled: Callable[[], bool] | None = None) -> None:
+    """Writes a feature collection so that the file at `path` is either the old or the complete new one.
+
+    The collection is written to a temporary file next to `path` first, which then replaces it. A write that
+    fails, or is cancelled (`is_cancelled` is checked once the temporary file is written), removes the temporary
+    file and leaves `path` untouched.
+    """
+    directory, name = os.path.split(os.path.abspath(path))
+    stem, ext = os.path.splitext(name)
+    # pygplates picks the file format by the extension, so the temporary file keeps it
+    handle, temporary_path = tempfile.mkstemp(prefix=f".{stem}-", suffix=ext, dir=directory)
+    os.close(handle)
+
+    try:
+        with profiling.phase("write"):
+            feature_collection.write(temporary_path)
+        if is_cancelled is not None and is_cancelled():
+            raise SplitCancelled()
+        # Temporary files are only readable by their owner, the result gets the permissions of a normal new file
+        # (or of the file it replaces)
+        os.chmod(temporary_path, os.stat(path).st_mode & 0o7777 if os.path.exists(path) else _new_file_mode())
+        os.replace(temporary_path, path)
+    except BaseException:
+        try:
+            os.remove(temporary_path)
+        except OSError:
+            pass
+        raise
+
+
+class SplitJob:
+    def __init__(self, rift_id: str | list[str], rifting_time: float, output_path: str) -> None:
+        self.rift_id = rift_id  # Several IDs split by all of these rifts at once
+        self.rifting_time = rifting_time
+        self.output_path = output_path
+
+
+class SplittingEngine:
+    """Qt-free splitting pipeline for scripts and batch runs.
+
+    The rotation model and the feature collections are loaded once and reused for every job run on the engine.
+    """
+
+    # Number of reconstruction trees (one per time) pygplates keeps cached for a rotation model by default
+    ROTATION_TREE_CACHE_SIZE = 150
+
+    def __init__(self, workers: int = 1) -> None:
+        self.workers = workers
+        self.rotation_model: pygplates.RotationModel | None = None
+        self.feature_collections: list[tuple[str, pygplates.FeatureCollection]] = []
+        self._features_by_id: dict[str, pygplates.Feature] = {}
+
+        # Features never change once loaded into the engine, so their feature IDs alone identify them
+        self.reconstruction_cache = ReconstructionCache(revision_of=lambda feature: "")
+
+        # Phase timings of everything the engine does (off unless enabled or requested by the environment)
+        self.profiler = profiling.Profiler(profiling.profiling_requested())
+
+    def load_rotation_model(self, paths: str | list[str]) -> None:
+        self.rotation_model = pygplates.RotationModel(paths)
+
+    def load_feature_collections(self, paths: list[str]) -> None:
+        for path in paths:
+            if any(p == path for p, _ in self.feature_collections):
+                continue
+
+            with self.profiler.activate(), profiling.phase("load feature collection"):
+                fc = pygplates.FeatureCollection(path)
+            self.feature_collections.append((path, fc))
+            for feature in fc:
+                self._features_by_id.setdefault(feature.get_feature_id().get_string(), feature)
+
+    def get_feature(self, feature_id: str) -> pygplates.Feature | None:
+        """Returns the feature with the given ID. Should several features have it, the one loaded first wins, as
+        in `Session.find_feature`."""
+        return self._features_by_id.get(feature_id)
+
+    def select_plates(self, rifting_time: float | None, feature_ids: list[str] | None = None, plate_ids: list[int] | None = None) -> list[pygplates.Feature]:
+        """Selects polygon features that exist at the rifting time, either by feature ID or by plate ID.
+
+        Without any selector every polygon feature that exists at the rifting time is selected (this matches
+        the filters of the splitting window). Without a rifting time, features of any time are selected.
+        """
+        if feature_ids:
+            candidates = []
+            for feature_id in feature_ids:
+                feature = self.get_feature(feature_id)
+                if feature is None:
+                    raise KeyError(f"Unknown feature ID '{feature_id}'")
+                candidates.append(feature)
+        else:
+            candidates = [f for _, fc in self.feature_collections for f in fc]
+
+        accepted_plate_ids = set(plate_ids) if plate_ids else None
+
+        selected = []
+        for feature in candidates:
+            start_time, end_time = feature.get_valid_time()
+            if not isinstance(feature.get_geometry(), pygplates.PolygonOnSphere):
+                continue
+            if accepted_plate_ids is not None and feature.get_reconstruction_plate_id() not in accepted_plate_ids:
+                continue
+            if rifting_time is not None and not (start_time >= rifting_time >= end_time):
+                continue
+            selected.append(feature)
+
+        return selected
+
+    def _get_rifts(self, rift_id: str | list[str]) -> list[pygplates.Feature]:
+        rifts = []
+        for id in ([rift_id] if isinstance(rift_id, str) else rift_id):
+            rift = self.get_feature(id)
+            if rift is None:
+                raise KeyError(f"Unknown rift feature ID '{id}'")
+            rifts.append(rift)
+        return rifts
+
+    def split(self, plates: list[pygplates.Feature], rift_id: str | list[str], rifting_time: float) -> pygplates.FeatureCollection:
+        return self.sweep(plates, rift_id, [rifting_time])[0]
+
+    def sweep(self, plates: list[pygplates.Feature], rift_id: str | list[str], rifting_times: list[float]) -> list[pygplates.FeatureCollection]:
+        """Splits the plates at every rifting time in one batch, see `sweep_split_features`."""
+        if self.rotation_model is None:
+            raise RuntimeError("No rotation model loaded")
+
+        rotation_model = self.rotation_model
+        if len(set(rifting_times)) > self.ROTATION_TREE_CACHE_SIZE:
+            # Shares the rotation features, but keeps the reconstruction trees of every time of the sweep cached
+            # for the reverse reconstruction
+            rotation_model = pygplates.RotationModel(self.rotation_model, len(set(rifting_times)))
+
+        with self.profiler.activate():
+            return sweep_split_features(plates, self._get_rifts(rift_id), rifting_times, rotation_model, self.workers, self.reconstruction_cache)
+
+    def run(self, jobs: list[SplitJob], feature_ids: list[str] | None = None, plate_ids: list[int] | None = None):
+        """Runs the jobs, writing each result as soon as it is done.
+
+        All times of the same rift(s) are split together as one sweep. Jobs of one rift that share an output
+        path are written to a single collection, tagged by time (see `combine_by_time`).
+
+        Yields every job together with the number of features written for it.
+        """
+        jobs_by_rift: dict[str | tuple[str, ...], list[SplitJob]] = {}
+        for job in jobs:
+            key = job.rift_id if isinstance(job.rift_id, str) else tuple(job.rift_id)
+            jobs_by_rift.setdefault(key, []).append(job)
+
+        for rift_jobs in jobs_by_rift.values():
+            # Plates that do not exist at a time are dropped when reconstructing them to that time
+            with self.profiler.activate(), profiling.phase("select plates"):
+                plates = self.select_plates(None, feature_ids, plate_ids)
+            results = self.sweep(plates, rift_jobs[0].rift_id, [job.rifting_time for job in rift_jobs])
+
+            results_by_path: dict[str, list[tuple[SplitJob, pygplates.FeatureCollection]]] = {}
+            for job, fc in zip(rift_jobs, results):
+                results_by_path.setdefault(job.output_path, []).append((job, fc))
+
+            for output_path, path_results in results_by_path.items():
+                if len(path_results) == 1:
+                    fc = path_results[0][1]
+                else:
+                    fc = combine_by_time([fc for _, fc in path_results], [job.rifting_time for job, _ in path_results])
+
+                directory = os.path.dirname(output_path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                with self.profiler.activate():
+                    write_feature_collection(fc, output_path)
+
+                for job, job_fc in path_results:
+                    yield job, len(job_fc)
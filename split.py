@@ -0,0 +1,89 @@
+import argparse
+import os
+import sys
+
+from core.parallel_splitting import default_worker_count
+from core.splitting_engine import SplitJob, SplittingEngine
+
+
+def build_jobs(rift_ids: list[str], times: list[float], output: str, network: bool = False, combined: bool = False) -> list[SplitJob]:
+    """Creates one job per (rift, time) pair, or with `network` one job per time that splits by all rifts.
+
+    `output` may contain the placeholders {rift} and {time}; if it does not and more than one output is written,
+    the rift ID (or "network") and time are appended to the file name so that jobs do not overwrite each other.
+    With `combined` all times of a rift go to one output ({time} becomes "all").
+    """
+    rifts: list[tuple[str, str | list[str]]] = [("network", rift_ids)] if network else [(id, id) for id in rift_ids]
+    multiple = len(rifts) > 1 if combined else len(rifts) * len(times) > 1
+    templated = "{rift}" in output or "{time}" in output
+    stem, ext = os.path.splitext(output)
+
+    jobs = []
+    for name, rift_id in rifts:
+        for time in times:
+            time_name = "all" if combined else f"{time:g}"
+            if templated:
+                path = output.format(rift=name, time=time_name)
+            elif multiple:
+                path = f"{stem}_{name}{ext}" if combined else f"{stem}_{name}_{time_name}{ext}"
+            else:
+                path = output
+            jobs.append(SplitJob(rift_id, time, path))
+    return jobs
+
+def time_range(start: float, stop: float, step: float) -> list[float]:
+    """Returns the times from start to stop (inclusive) in steps of step."""
+    if step <= 0:
+        raise ValueError("The time step has to be positive")
+    count = int(round(abs(stop - start) / step)) + 1
+    direction = 1 if stop >= start else -1
+    return [start + direction * i * step for i in range(count)]
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Split plate polygons by rifts without the GUI - GPlates Utilities")
+    parser.add_argument("-r", "--rotation", nargs="+", required=True, help="rotation file(s) (.rot)")
+    parser.add_argument("-f", "--features", nargs="+", required=True, help="feature collection(s) (.gpml) containing the plates and rifts")
+    parser.add_argument("--rift", action="append", required=True, dest="rifts", help="feature ID of a rift (repeat for several rifts)")
+    parser.add_argument("--network", action="store_true", help="split by all rifts together (one output per time) instead of by each rift separately")
+    parser.add_argument("-t", "--time", action="append", type=float, default=[], dest="times", help="rifting time in Ma (repeat for several times)")
+    parser.add_argument("--time-range", nargs=3, type=float, metavar=("START", "STOP", "STEP"), help="sweep the rifting time from START to STOP Ma in steps of STEP")
+    parser.add_argument("--combined", action="store_true", help="write all times of a rift into one collection (features tagged with RIFT_TIME)")
+    parser.add_argument("--feature-ids", nargs="+", help="only split these features")
+    parser.add_argument("--plate-ids", type=lambda s: [int(i) for i in s.split(",") if i], help="only split features with these plate IDs (comma separated)")
+    parser.add_argument("-o", "--output", required=True, help="output feature collection (.gpml), may contain {rift} and {time}")
+    parser.add_argument("-w", "--workers", type=int, default=default_worker_count(), help="number of worker processes (default: all cores)")
+    parser.add_argument("--profile", metavar="PATH", help="write phase timings, counts and peak memory as JSON")
+    parser.add_argument("--trace", metavar="PATH", help="write the phase timings as a Chrome trace (chrome://tracing, Perfetto)")
+    args = parser.parse_args(argv)
+
+    times = args.times + (time_range(*args.time_range) if args.time_range else [])
+    if len(times) == 0:
+        parser.error("at least one of -t/--time or --time-range is required")
+
+    engine = SplittingEngine(args.workers)
+    if args.profile or args.trace:
+        engine.profiler.enabled = True
+    engine.load_rotation_model(args.rotation)
+    engine.load_feature_collections(args.features)
+
+    jobs = build_jobs(args.rifts, times, args.output, args.network, args.combined)
+
+    try:
+        for job, count in engine.run(jobs, args.feature_ids, args.plate_ids):
+            rifts = job.rift_id if isinstance(job.rift_id, str) else ", ".join(job.rift_id)
+            print(f"{rifts} @ {job.rifting_time:g} Ma: {count} features -> {os.path.realpath(job.output_path)}")
+    except (KeyError, RuntimeError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+    if engine.profiler.enabled:
+        print(engine.profiler.summary(), file=sys.stderr)
+        if args.profile:
+            engine.profiler.write_json(args.profile)
+        if args.trace:
+            engine.profiler.write_chrome_trace(args.trace)
+
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,60 @@
+import numpy as np
+import pygplates
+import pytest
+
+from core.arc_geometry import to_unit_vectors
+from core.line_splitter import cut_line, line_cuts, split_lines_by_rifts
+
+
+def points(*lat_lons):
+    return to_unit_vectors(pygplates.PolylineOnSphere(lat_lons))
+
+def lat_lons(piece):
+    return np.round([pygplates.PointOnSphere(p).to_lat_lon() for p in piece], 9).tolist()
+
+
+# Along the equator with vertices at longitudes 0, 1 and 2
+LINE = points((0, 0), (0, 1), (0, 2))
+
+
+def test_rift_crossing_a_segment_cuts_it_there():
+    cuts, = line_cuts([LINE], [points((-1, 0.5), (1, 0.5))])
+    assert cuts.tolist() == [[0, pytest.approx(np.radians(0.5))]]
+    assert [lat_lons(piece) for piece in cut_line(LINE, cuts)] == [[[0, 0], [0, 0.5]], [[0, 0.5], [0, 1], [0, 2]]]
+
+def test_rift_crossing_at_a_line_vertex_cuts_it_at_the_vertex():
+    cuts, = line_cuts([LINE], [points((-1, 1), (1, 1))])
+    assert cuts.tolist() == [[1, 0.0]]
+    assert [lat_lons(piece) for piece in cut_line(LINE, cuts)] == [[[0, 0], [0, 1]], [[0, 1], [0, 2]]]
+
+def test_rift_vertex_on_the_line_makes_one_cut():
+    cuts, = line_cuts([LINE], [points((-1, 0.5), (0, 0.5), (1, 0.5))])
+    assert len(cuts) == 1
+    cuts, = line_cuts([LINE], [points((-1, 1), (0, 1), (1, 1))])
+    assert cuts.tolist() == [[1, 0.0]]
+
+def test_rift_ending_on_the_line_cuts_it():
+    cuts, = line_cuts([LINE], [points((1, 1.5), (0, 1.5))])
+    assert cuts.tolist() == [[1, pytest.approx(np.radians(0.5))]]
+
+def test_rifts_at_the_line_ends_cut_nothing():
+    assert line_cuts([LINE], [points((-1, 0), (1, 0)), points((-1, 2), (1, 2)), points((1, 2), (0, 2))])[0].tolist() == []
+
+def test_rifts_along_or_beside_the_line_cut_nothing():
+    assert line_cuts([LINE], [points((0, 0.5), (0, 1.5)), points((1, 0), (1, 2)), points((-1, 10), (1, 10))])[0].tolist() == []
+
+def test_rift_on_the_far_side_of_the_sphere_cuts_nothing():
+    assert line_cuts([LINE], [points((-1, 180.5), (1, 180.5))])[0].tolist() == []
+
+def test_several_lines_are_cut_independently():
+    other = points((-1, 5), (1, 5))
+    cuts = line_cuts([LINE, other, LINE], [points((-1, 0.5), (1, 0.5))])
+    assert [len(c) for c in cuts] == [1, 0, 1]
+
+def test_split_pieces_share_the_cut_points():
+    line = pygplates.PolylineOnSphere([(0, 0), (0, 1), (0, 2), (0, 3)])
+    pieces, = split_lines_by_rifts([line], [pygplates.PolylineOnSphere([(-1, 0.5), (1, 0.5)]), pygplates.PolylineOnSphere([(-1, 2), (1, 2)])])
+    assert len(pieces) == 3
+    for a, b in zip(pieces, pieces[1:]):
+        assert a[-1] == b[0]
+    assert sum(piece.get_arc_length() for piece in pieces) == pytest.approx(line.get_arc_length(), rel=1e-12)
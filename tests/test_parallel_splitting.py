@@ -0,0 +1,31 @@
+import pygplates
+
+from core import parallel_splitting
+from core.parallel_splitting import split_plates_by_lines, split_plates_by_polygon
+
+
+def test_split_plates_by_polygon_skips_plates_with_holes():
+    cutter = pygplates.PolygonOnSphere([(-5, -20), (-5, 20), (5, 20), (5, -20)])
+    plate = pygplates.PolygonOnSphere([(-10, -10), (-10, 10), (10, 10), (10, -10)])
+    holed = pygplates.PolygonOnSphere(plate.get_exterior_ring_points(), [[(-1, -1), (1, -1), (1, 1), (-1, 1)]])
+
+    (inside, outside), skipped = split_plates_by_polygon([plate, holed], cutter)
+    assert len(inside) == 1 and len(outside) == 2
+    assert skipped == ([], [])
+
+
+def test_split_plates_by_lines_keeps_holes_in_a_pool(monkeypatch):
+    rift = pygplates.PolylineOnSphere([(-20, 30), (0, 31), (20, 30)])
+    plate = pygplates.PolygonOnSphere([(-10, -10), (-10, 10), (10, 10), (10, -10)])
+    holed = pygplates.PolygonOnSphere(plate.get_exterior_ring_points(), [[(-1, -1), (1, -1), (1, 1), (-1, 1)]])
+    crossed = pygplates.PolygonOnSphere([(-10, 20), (-10, 40), (10, 40), (10, 20)])
+
+    def summary(results):
+        return [sorted((p.get_number_of_interior_rings(), round(p.get_area(), 12)) for p in pieces) for pieces in results]
+
+    serial = split_plates_by_lines([holed, crossed], [rift])
+    monkeypatch.setattr(parallel_splitting, "PARALLEL_PLATE_VERTICES", 0)
+    pooled = split_plates_by_lines([holed, crossed], [rift], workers=2)
+    assert summary(pooled) == summary(serial)
+    assert [p.get_number_of_interior_rings() for p in pooled[0]] == [1]
+    assert len(pooled[1]) == 2
@@ -0,0 +1,145 @@
+import itertools
+import random
+
+import numpy as np
+import pygplates
+import pytest
+
+from core.polygon_boolean import PolygonContainment, PolygonCutter, polygon_difference, polygon_intersection, polygon_union, union_all
+
+
+def square(lat, lon, size=1.0):
+    return pygplates.PolygonOnSphere([(lat, lon), (lat, lon + size), (lat + size, lon + size), (lat + size, lon)])
+
+def summary(polygons):
+    return sorted((round(p.get_area(), 12), p.get_number_of_interior_rings()) for p in polygons)
+
+def assert_disjoint(polygons):
+    # Outputs without holes must not overlap (an island may lie in another polygon's hole)
+    for a, b in itertools.combinations(polygons, 2):
+        if a.get_number_of_interior_rings() + b.get_number_of_interior_rings() == 0:
+            assert sum(p.get_area() for p in polygon_intersection(a, b)) < 1e-12
+
+
+FRAME = [square(i, j) for i in range(3) for j in range(3) if (i, j) != (1, 1)]
+EXTRAS = {"overlapping": square(0.5, 0.5), "island": square(1.2, 1.2, 0.5), "filling": square(1, 1)}
+
+
+@pytest.mark.parametrize("extra", EXTRAS.values(), ids=EXTRAS.keys())
+def test_union_all_does_not_depend_on_order(extra):
+    expected = summary(union_all(FRAME + [extra]))
+    rng = random.Random(0)
+    for _ in range(10):
+        polygons = FRAME + [extra]
+        rng.shuffle(polygons)
+        result = union_all(polygons)
+        assert summary(result) == expected
+        assert_disjoint(result)
+
+def test_union_all_keeps_merging_polygons_with_holes():
+    result = union_all(FRAME + [EXTRAS["overlapping"]])
+    assert len(result) == 1
+    assert result[0].get_number_of_interior_rings() == 1
+
+def test_union_all_keeps_islands_in_holes_apart():
+    island = EXTRAS["island"]
+    assert summary(union_all([island] + FRAME)) == sorted([(round(island.get_area(), 12), 0), summary(union_all(FRAME))[0]])
+
+
+def area(polygons):
+    # pygplates is less precise for polygons with holes (about 1e-7 relative), so holes are measured on their own
+    total = 0.0
+    for p in polygons:
+        total += pygplates.PolygonOnSphere(p.get_exterior_ring_points()).get_area()
+        total -= sum(pygplates.PolygonOnSphere(p.get_interior_ring_points(i)).get_area() for i in range(p.get_number_of_interior_rings()))
+    return total
+
+def ring(polygon):
+    return polygon.get_exterior_ring_points()
+
+
+OVERLAPPING = {
+    "corner": (square(0, 0, 2), square(1, 1, 2)),
+    "side": (square(0, 0, 2), square(0.5, 1, 1)),
+    "nested": (square(0, 0, 4), square(1, 1, 1)),
+    "crossing": (pygplates.PolygonOnSphere([(0, 0), (0, 4), (4, 4), (4, 0)]), pygplates.PolygonOnSphere([(2, -1), (5, 2), (2, 5), (-1, 2)])),
+}
+
+
+@pytest.mark.parametrize("a, b", OVERLAPPING.values(), ids=OVERLAPPING.keys())
+def test_boolean_areas_add_up(a, b):
+    union = polygon_union(a, b)
+    intersection = polygon_intersection(a, b)
+    difference = polygon_difference(a, b)
+    assert len(union) == 1
+    assert area(union) == pytest.approx(a.get_area() + b.get_area() - area(intersection), rel=1e-9)
+    assert area(difference) == pytest.approx(a.get_area() - area(intersection), rel=1e-9)
+    assert area(intersection) == pytest.approx(b.get_area() - area(polygon_difference(b, a)), rel=1e-9)
+
+def test_intersection_of_nested_polygons_is_the_inner_one():
+    outer, inner = OVERLAPPING["nested"]
+    assert area(polygon_intersection(outer, inner)) == pytest.approx(inner.get_area(), rel=1e-12)
+    assert area(polygon_union(outer, inner)) == pytest.approx(outer.get_area(), rel=1e-12)
+    difference, = polygon_difference(outer, inner)
+    assert difference.get_number_of_interior_rings() == 1
+    assert area([difference]) == pytest.approx(outer.get_area() - inner.get_area(), rel=1e-12)
+
+@pytest.mark.parametrize("b", [square(0, 1), square(0.25, 1, 0.5), square(1, 0), square(1, 1)], ids=["edge", "part of edge", "below", "corner"])
+def test_union_along_shared_edges_has_no_slivers(b):
+    a = square(0, 0)
+    union = polygon_union(a, b)
+    assert area(union) == pytest.approx(a.get_area() + b.get_area(), rel=1e-12)
+    assert area(polygon_intersection(a, b)) < 1e-15
+    assert area(polygon_difference(a, b)) == pytest.approx(a.get_area(), rel=1e-12)
+    # Polygons meeting at one corner only stay apart
+    assert len(union) == (2 if b == square(1, 1) else 1)
+    assert all(p.get_number_of_interior_rings() == 0 for p in union)
+
+def test_union_of_neighbouring_pieces_has_no_holes():
+    pieces = [square(0, 0, 0.5), square(0, 0.5, 0.5), square(0.5, 0, 0.5), square(0.5, 0.5, 0.5)]
+    union, = union_all(pieces)
+    assert union.get_number_of_interior_rings() == 0
+    assert union.get_area() == pytest.approx(area(pieces), rel=1e-12)
+
+
+TARGETS = {
+    "crossing": square(1, 1, 2),
+    "inside": square(0.5, 0.5, 1),
+    "outside": square(10, 10),
+    "sharing an edge": square(0, 2),
+    "covering": square(-1, -1, 4),
+}
+
+
+@pytest.mark.parametrize("target", TARGETS.values(), ids=TARGETS.keys())
+def test_cutter_pieces_make_up_the_target(target):
+    cutter = PolygonCutter(square(0, 0, 2))
+    inside, outside = cutter.cut(target)
+    assert area(inside) + area(outside) == pytest.approx(target.get_area(), rel=1e-9)
+    assert area(inside) == pytest.approx(area(polygon_intersection(target, square(0, 0, 2))), rel=1e-9, abs=1e-15)
+    for piece in inside + outside:
+        if piece.get_number_of_interior_rings() == 0:
+            assert area(polygon_difference(piece, target)) < 1e-15
+
+
+def test_containment_matches_pygplates():
+    polygon = pygplates.PolygonOnSphere(ring(square(0, 0, 4)), [ring(square(1, 1, 2))])
+    containment = PolygonContainment(polygon)
+    rng = np.random.default_rng(0)
+    path = pygplates.PolylineOnSphere([tuple(p) for p in rng.uniform(-1, 5, (500, 2))])
+    expected = [polygon.is_point_in_polygon(point) for point in path]
+
+    inside, on_outline = containment.classify_path(path)
+    assert not on_outline.any()
+    assert inside.tolist() == expected
+    assert containment.contains(path).tolist() == expected
+
+def test_containment_counts_the_outline_as_inside():
+    polygon = pygplates.PolygonOnSphere(ring(square(0, 0, 4)), [ring(square(1, 1, 2))])
+    containment = PolygonContainment(polygon)
+    # Inside, on an exterior vertex, inside, on a hole edge, in the hole, on a hole vertex, outside, on an exterior
+    # edge (edges along meridians, as parallels are not great circles)
+    path = pygplates.PolylineOnSphere([(0.5, 0.5), (0, 0), (0.5, 2), (2, 1), (2, 2), (3, 3), (5, 5), (2, 4)])
+    inside, on_outline = containment.classify_path(path)
+    assert on_outline.tolist() == [False, True, False, True, False, True, False, True]
+    assert inside.tolist() == [True, True, True, True, False, True, False, True]
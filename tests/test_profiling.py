@@ -0,0 +1,28 @@
+import threading
+
+from core import profiling
+from core.profiling import Profiler
+
+
+def test_merge_profile_adds_the_phases_counters_and_events_of_other_threads():
+    profiler = Profiler(enabled=True)
+    task_profilers = [Profiler(enabled=True) for _ in range(4)]
+
+    def record(task_profiler):
+        with task_profiler.activate():
+            for _ in range(100):
+                with profiling.phase("split plate"):
+                    profiling.count("plates")
+
+    threads = [threading.Thread(target=record, args=(p,)) for p in task_profilers]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    for task_profiler in task_profilers:
+        profiler.merge_profile(task_profiler)
+
+    assert profiler.phases["split plate"].calls == 400
+    assert profiler.counters == {"plates": 400}
+    assert len(profiler.events) == 400
+    assert all(start >= 0.0 for _, start, _, _ in profiler.events)
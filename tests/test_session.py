@@ -0,0 +1,101 @@
+import os
+
+import pygplates
+import pytest
+from PySide6.QtCore import QCoreApplication, QEventLoop
+
+from core.session import Session
+from core.splitting_engine import SplittingEngine
+
+
+@pytest.fixture(scope="module", autouse=True)
+def application():
+    # The session's models and timers need a Qt application
+    return QCoreApplication.instance() or QCoreApplication([])
+
+@pytest.fixture
+def session():
+    session = Session()
+    session.feature_cache = None
+    return session
+
+
+def write_collection(path, names):
+    features = []
+    for name in names:
+        feature = pygplates.Feature(pygplates.FeatureType.gpml_unclassified_feature)
+        feature.set_name(name)
+        feature.set_geometry(pygplates.PointOnSphere(0, 0))
+        features.append(feature)
+    pygplates.FeatureCollection(features).write(str(path))
+
+def model_names(session):
+    model = session.get_feature_model()
+    return sorted(model.row_values(row)[model.NAME] for row in range(model.rowCount()))
+
+
+@pytest.fixture
+def same_named(tmp_path):
+    paths = [tmp_path / "a" / "plates.gpml", tmp_path / "b" / "plates.gpml"]
+    for path, names in zip(paths, [["a1", "a2"], ["b1"]]):
+        path.parent.mkdir()
+        write_collection(path, names)
+    return [str(path) for path in paths]
+
+
+def test_same_named_files_keep_their_own_rows(session, same_named):
+    session.load_feature_collections(same_named)
+    model = session.get_feature_model()
+    assert model.collection_range(same_named[0]) == (0, 2)
+    assert model.collection_range(same_named[1]) == (2, 1)
+    assert model_names(session) == ["a1", "a2", "b1"]
+
+    session.unload_feature_collection("plates.gpml")
+    assert model_names(session) == ["b1"]
+
+def test_reloading_one_of_two_same_named_files(session, same_named):
+    session.load_feature_collections(same_named)
+    write_collection(same_named[1], ["b1", "b2"])
+    # Makes the change visible even where modification times are coarse
+    os.utime(same_named[1], ns=(0, 0))
+
+    assert session.reload_features() == ["plates.gpml"]
+    assert model_names(session) == ["a1", "a2", "b1", "b2"]
+    assert session.get_feature_model().collection_range(same_named[1]) == (2, 2)
+
+
+def test_duplicate_points_are_removed_in_the_background(session, tmp_path):
+    path = tmp_path / "lines.gpml"
+    feature = pygplates.Feature()
+    feature.set_geometry(pygplates.PolylineOnSphere([(0, 0), (0, 1), (0, 1), (0, 2)]))
+    pygplates.FeatureCollection([feature]).write(str(path))
+    session.load_feature_collections([str(path)])
+    lfc, = session.loaded_feature_collections
+    feature_id = feature.get_feature_id().get_string()
+    revision = lfc.feature_revisions[feature_id]
+
+    task = session.remove_duplicate_points_async()
+    loop = QEventLoop()
+    task.finished.connect(loop.quit)
+    task.start()
+    loop.exec()
+
+    assert task.report == {"lines.gpml": (1, 1)}
+    assert len(lfc.get_feature(feature_id).get_geometry()) == 3
+    assert lfc.feature_revisions[feature_id] != revision
+
+
+def test_session_and_engine_pick_the_same_feature_for_shared_ids(session, tmp_path):
+    feature_id = pygplates.FeatureId.create_unique_id()
+    paths = [str(tmp_path / "a.gpml"), str(tmp_path / "b.gpml")]
+    for path, names in zip(paths, [["first", "second"], ["third"]]):
+        features = [pygplates.Feature(feature_id=feature_id) for _ in names]
+        for feature, name in zip(features, names):
+            feature.set_name(name)
+        pygplates.FeatureCollection(features).write(path)
+
+    engine = SplittingEngine()
+    engine.load_feature_collections(paths)
+    session.load_feature_collections(paths)
+    assert engine.get_feature(feature_id.get_string()).get_name() == "first"
+    assert session.get_feature(feature_id.get_string()).get_name() == "first"
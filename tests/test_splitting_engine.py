@@ -0,0 +1,34 @@
+import pygplates
+import pytest
+
+from core.splitting_engine import split_features
+
+
+ROTATION_MODEL = pygplates.RotationModel(pygplates.FeatureCollection())
+
+
+def plate():
+    return pygplates.Feature.create_reconstructable_feature(
+        pygplates.FeatureType.gpml_unclassified_feature,
+        pygplates.PolygonOnSphere([(-10, -10), (-10, 10), (10, 10), (10, -10)]),
+        "Plate",
+        valid_time=(200, float("-inf")),
+        reconstruction_plate_id=101
+    )
+
+def rift(begin, end):
+    return pygplates.Feature.create_reconstructable_feature(
+        pygplates.FeatureType.gpml_unclassified_feature,
+        pygplates.PolylineOnSphere([(-20, 0), (0, 1), (20, 0)]),
+        "Rift",
+        valid_time=(begin, end),
+        reconstruction_plate_id=101
+    )
+
+
+def test_split_features_splits_by_a_rift_that_exists():
+    assert len(split_features([plate()], rift(200, 0), 50, ROTATION_MODEL)) == 2
+
+def test_split_features_rejects_a_rift_that_does_not_exist_at_the_time():
+    with pytest.raises(ValueError):
+        split_features([plate()], [rift(200, 0), rift(100, 60)], 50, ROTATION_MODEL)
@@ -1,4 +1,7 @@
-from PySide6.QtWidgets import QAbstractItemView, QFileDialog, QHBoxLayout, QLabel, QListView, QMessageBox, QPushButton, QVBoxLayout, QWidget
+import os
+
+from PySide6.QtCore import Qt
+from PySide6.QtWidgets import QAbstractItemView, QFileDialog, QHBoxLayout, QLabel, QListView, QMessageBox, QProgressDialog, QPushButton, QVBoxLayout, QWidget
 from core.session import Session
 
 class FeatureCollectionLoader(QWidget):
@@ -16,6 +19,10 @@ class FeatureCollectionLoader(QWidget):
         self.remove_button.setEnabled(False)     # Button is disabled until a list item is selected
         self.remove_button.clicked.connect(self.on_remove)
 
+        self.duplicates_button = QPushButton("Remove Duplicate Points")
+        self.duplicates_button.setToolTip("Removes repeated consecutive vertices (e.g. left by topologies) from all loaded polygons and polylines")
+        self.duplicates_button.clicked.connect(self.on_remove_duplicates)
+
         self.fc_list = QListView()
         self.fc_list.setModel(session.get_feature_collection_model())
         self.fc_list.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)      # Do not allow editing the names
@@ -30,6 +37,7 @@ class FeatureCollectionLoader(QWidget):
         v_layout.addWidget(QLabel("Here is a list of all loaded feature collections:"))
         v_layout.addWidget(self.fc_list)
         v_layout.addLayout(button_layout)
+        v_layout.addWidget(self.duplicates_button)
 
         self.setLayout(v_layout)
     
@@ -38,9 +46,75 @@ class FeatureCollectionLoader(QWidget):
         if len(fc_filepaths) == 0:
             return
 
-        self.session.load_feature_collections(fc_filepaths)
+        task = self.session.load_feature_collections_async(fc_filepaths)
+        if task is None:
+            return
+
+        progress = QProgressDialog("Loading feature collections ...", "Cancel", 0, len(task.paths), self)
+        progress.setWindowTitle("Loading Feature Collections")
+        progress.setWindowModality(Qt.WindowModality.WindowModal)
+        progress.setMinimumDuration(0)
+        progress.setValue(0)
+
+        def on_progress(done: int, total: int, path: str):
+            progress.setValue(done)
+            if done < total:
+                progress.setLabelText(f"Loaded '{os.path.basename(path)}' ({done}/{total}) ...")
+
+        task.progress.connect(on_progress)
+        task.fileFailed.connect(lambda path, error: QMessageBox.warning(self, "Error", f"Could not load '{path}':\n{error}"))
+        task.finished.connect(progress.close)
+        progress.canceled.connect(task.cancel)
+        task.start()
         
     
+    def on_remove_duplicates(self):
+        task = self.session.remove_duplicate_points_async()
+
+        progress = QProgressDialog("Removing duplicate points ...", "Cancel", 0, len(task.collections), self)
+        progress.setWindowTitle("Remove Duplicate Points")
+        progress.setWindowModality(Qt.WindowModality.WindowModal)
+        progress.setMinimumDuration(0)
+        progress.setValue(0)
+
+        def on_progress(done: int, total: int, shortname: str):
+            progress.setValue(done)
+            if done < total:
+                progress.setLabelText(f"Checked '{shortname}' ({done}/{total}) ...")
+
+        def on_finished():
+            progress.close()
+            self.duplicates_button.setEnabled(True)
+            self.on_duplicates_removed(task.report)
+
+        task.progress.connect(on_progress)
+        task.failed.connect(lambda error: QMessageBox.warning(self, "Error", f"Could not remove duplicate points:\n{error}"))
+        task.finished.connect(on_finished)
+        progress.canceled.connect(task.cancel)
+        self.duplicates_button.setEnabled(False)
+        task.start()
+
+    def on_duplicates_removed(self, report: dict[str, tuple[int, int]]):
+        if len(report) == 0:
+            QMessageBox.information(self, "Remove Duplicate Points", "No duplicate points found.")
+            return
+
+        lines = [f"{name}: {points} point(s) removed from {features} feature(s)" for name, (features, points) in report.items()]
+        ret = QMessageBox.question(
+            self,
+            "Remove Duplicate Points",
+            "\n".join(lines) + "\n\nSave the changed feature collections? This overwrites their files, otherwise the changes are only kept until they are reloaded.",
+            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
+        )
+        if ret != QMessageBox.StandardButton.Yes:
+            return
+
+        for name in report:
+            try:
+                self.session.save_feature_collection(name)
+            except Exception as e:
+                QMessageBox.warning(self, "Error", f"Could not save '{name}':\n{e}")
+
     def on_selection_changed(self):
         if not self.remove_button.isEnabled():
             self.remove_button.setEnabled(True)
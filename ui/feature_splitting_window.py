@@ -1,61 +1,202 @@
 from os import path
-from PySide6.QtCore import QLocale, QObject, QSortFilterProxyModel
-from PySide6.QtGui import QDoubleValidator, QRegularExpressionValidator, QStandardItemModel
-from PySide6.QtWidgets import QAbstractItemView, QComboBox, QFileDialog, QHBoxLayout, QLabel, QLineEdit, QMessageBox, QPushButton, QStyledItemDelegate, QTreeView, QVBoxLayout, QWidget
-import pygplates
-
-from core.plate_splitter import split_plate_by_line
-from core.session import Session
+from PySide6.QtCore import QAbstractProxyModel, QLocale, QModelIndex, QObject, QPersistentModelIndex, Qt, QTimer
+from PySide6.QtGui import QDoubleValidator, QRegularExpressionValidator
+from PySide6.QtWidgets import QAbstractItemView, QCheckBox, QFileDialog, QHBoxLayout, QLabel, QLineEdit, QListView, QMessageBox, QProgressDialog, QPushButton, QSpinBox, QStyledItemDelegate, QTreeView, QVBoxLayout, QWidget
+import numpy as np
+
+from core import profiling
+from core.feature_table_model import FeatureTableModel
+from core.session import PreviewTask, Session
 from ui.feature_collection_loader import FeatureCollectionLoader
+from ui.split_preview import SplitPreview
+
 
+class MaskFilterModel(QAbstractProxyModel):
+    """Filter proxy over the FeatureTableModel that decides all rows at once.
 
-class RiftFilterModel(QSortFilterProxyModel):
+    Subclasses compute a boolean mask over a range of rows of the typed columns of the source model. The proxy
+    keeps the sorted source rows that pass it, so mapping between the models is an array lookup or a binary
+    search and changing a filter costs a few vectorized operations instead of one Python call per row (which is
+    what a QSortFilterProxyModel would need). Inserted, removed and changed source rows only update their part
+    of the mask.
+    """
     def __init__(self):
         super().__init__()
-        self._time_filter: float = float("inf")
+        self._mask = np.zeros(0, dtype=bool)
+        self._rows = np.zeros(0, dtype=np.intp)
+        self._pending_removal: tuple[int, int] | None = None
+    
+    def computeMask(self, model: FeatureTableModel, start: int, stop: int) -> np.ndarray:
+        """Returns the mask of source rows [start, stop). Subclasses filter, this accepts every row."""
+        return np.ones(stop - start, dtype=bool)
     
     def filterAcceptsRow(self, row_num: int, _) -> bool:
-        # Get the underlying model
-        model: QStandardItemModel = self.sourceModel()  # type: ignore | We know what data we are dealing with
-        
-        geo_type = model.item(row_num, 2).text()
-        feature_type = model.item(row_num, 1).text()
-        start_time = float(model.item(row_num, 4).text())
-        end_time = float(model.item(row_num, 5).text())
-        
-        return geo_type == "PolylineOnSphere" and feature_type in ["ContinentalRift", "SubductionZone"] and (start_time >= self._time_filter >= end_time)
+        return bool(self._mask[row_num])
+    
+    def _recompute(self) -> None:
+        model: FeatureTableModel = self.sourceModel()  # type: ignore | We know what data we are dealing with
+        self._mask = self.computeMask(model, 0, model.rowCount()) if model is not None else np.zeros(0, dtype=bool)
+        self._rows = np.flatnonzero(self._mask)
+    
+    def setSourceModel(self, model: FeatureTableModel) -> None:  # type: ignore | Only used with our model
+        self.beginResetModel()
+        super().setSourceModel(model)
+        model.rowsInserted.connect(self._onRowsInserted)
+        model.rowsAboutToBeRemoved.connect(self._onRowsAboutToBeRemoved)
+        model.rowsRemoved.connect(self._onRowsRemoved)
+        model.modelAboutToBeReset.connect(self.beginResetModel)
+        model.modelReset.connect(self._onModelReset)
+        model.dataChanged.connect(self._onDataChanged)
+        self._recompute()
+        self.endResetModel()
+    
+    def invalidateMask(self) -> None:
+        """Re-applies the filter, keeping persistent indexes (e.g. selections) on rows that stay visible."""
+        self._relayout(self._recompute)
+    
+    def _relayout(self, update) -> None:
+        # Runs `update` (which changes the accepted rows) as a layout change, remapping persistent indexes
+        self.layoutAboutToBeChanged.emit()
+        old_rows = self._rows
+        update()
+
+        old_indexes = self.persistentIndexList()
+        new_indexes = []
+        for index in old_indexes:
+            source_row = old_rows[index.row()]
+            position = int(np.searchsorted(self._rows, source_row))
+            if position < len(self._rows) and self._rows[position] == source_row:
+                new_indexes.append(self.index(position, index.column()))
+            else:
+                new_indexes.append(QModelIndex())
+        self.changePersistentIndexList(old_indexes, new_indexes)
+
+        self.layoutChanged.emit()
+    
+    def _proxyRange(self, first: int, last: int) -> tuple[int, int]:
+        # Proxy rows [start, end) of the accepted source rows in [first, last]
+        return int(np.searchsorted(self._rows, first)), int(np.searchsorted(self._rows, last, side="right"))
+    
+    def _onRowsInserted(self, parent: QModelIndex, first: int, last: int) -> None:
+        model: FeatureTableModel = self.sourceModel()  # type: ignore | We know what data we are dealing with
+        inserted = self.computeMask(model, first, last + 1)
+        count = last - first + 1
+
+        start = int(np.searchsorted(self._rows, first))
+        new_rows = first + np.flatnonzero(inserted)
+
+        # The source rows are already in place, which is fine as views only ask for data after endInsertRows
+        if len(new_rows) != 0:
+            self.beginInsertRows(QModelIndex(), start, start + len(new_rows) - 1)
+        self._mask = np.concatenate((self._mask[:first], inserted, self._mask[first:]))
+        self._rows = np.concatenate((self._rows[:start], new_rows, self._rows[start:] + count))
+        if len(new_rows) != 0:
+            self.endInsertRows()
+    
+    def _onRowsAboutToBeRemoved(self, parent: QModelIndex, first: int, last: int) -> None:
+        start, end = self._proxyRange(first, last)
+        self._pending_removal = (start, end) if start < end else None
+
+        if self._pending_removal:
+            self.beginRemoveRows(QModelIndex(), start, end - 1)
+    
+    def _onRowsRemoved(self, parent: QModelIndex, first: int, last: int) -> None:
+        count = last - first + 1
+        start, end = self._proxyRange(first, last)
+        self._mask = np.concatenate((self._mask[:first], self._mask[last + 1:]))
+        self._rows = np.concatenate((self._rows[:start], self._rows[end:] - count))
+
+        if self._pending_removal:
+            self._pending_removal = None
+            self.endRemoveRows()
+    
+    def _onDataChanged(self, top_left: QModelIndex, bottom_right: QModelIndex) -> None:
+        model: FeatureTableModel = self.sourceModel()  # type: ignore | We know what data we are dealing with
+        first, last = top_left.row(), bottom_right.row()
+        changed = self.computeMask(model, first, last + 1)
+        start, end = self._proxyRange(first, last)
+
+        if np.array_equal(changed, self._mask[first:last + 1]):
+            # Same rows accepted, just pass the change on
+            if start < end:
+                self.dataChanged.emit(self.index(start, 0), self.index(end - 1, self.columnCount() - 1))
+            return
+
+        def update():
+            self._mask[first:last + 1] = changed
+            self._rows = np.concatenate((self._rows[:start], first + np.flatnonzero(changed), self._rows[end:]))
+        self._relayout(update)
+    
+    def _onModelReset(self) -> None:
+        self._recompute()
+        self.endResetModel()
+    
+    def index(self, row: int, column: int, parent: QModelIndex | QPersistentModelIndex = QModelIndex()) -> QModelIndex:
+        if parent.isValid() or row < 0 or row >= len(self._rows) or column < 0 or column >= self.columnCount():
+            return QModelIndex()
+        return self.createIndex(row, column)
+    
+    def parent(self, index: QModelIndex | QPersistentModelIndex = QModelIndex()) -> QModelIndex:  # type: ignore | Item models have no tree here
+        return QModelIndex()
+    
+    def rowCount(self, parent: QModelIndex | QPersistentModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._rows)
+    
+    def columnCount(self, parent: QModelIndex | QPersistentModelIndex = QModelIndex()) -> int:
+        model = self.sourceModel()
+        return 0 if parent.isValid() or model is None else model.columnCount()
+    
+    def hasChildren(self, parent: QModelIndex | QPersistentModelIndex = QModelIndex()) -> bool:
+        return not parent.isValid() and len(self._rows) > 0
+    
+    def mapToSource(self, proxy_index: QModelIndex | QPersistentModelIndex) -> QModelIndex:
+        if not proxy_index.isValid() or proxy_index.row() >= len(self._rows):
+            return QModelIndex()
+        return self.sourceModel().index(int(self._rows[proxy_index.row()]), proxy_index.column())
+    
+    def mapFromSource(self, source_index: QModelIndex | QPersistentModelIndex) -> QModelIndex:
+        if not source_index.isValid():
+            return QModelIndex()
+        position = int(np.searchsorted(self._rows, source_index.row()))
+        if position < len(self._rows) and self._rows[position] == source_index.row():
+            return self.index(position, source_index.column())
+        return QModelIndex()
+
+class RiftFilterModel(MaskFilterModel):
+    def __init__(self):
+        super().__init__()
+        self._time_filter: float = float("inf")
+    
+    def computeMask(self, model: FeatureTableModel, start: int, stop: int) -> np.ndarray:
+        return (
+            model.category_mask(model.GEOMETRY_TYPE, ["PolylineOnSphere"], start, stop)
+            & model.category_mask(model.FEATURE_TYPE, ["ContinentalRift", "SubductionZone"], start, stop)
+            & model.time_mask(self._time_filter, start, stop)
+        )
     
     def setTimeFilter(self, time: float):
-        self.beginFilterChange()
         self._time_filter = time
-        self.invalidateFilter()
+        self.invalidateMask()
 
-class FeatureFilterModel(QSortFilterProxyModel):
+class FeatureFilterModel(MaskFilterModel):
     def __init__(self):
         super().__init__()
         self._time_filter: float = float("inf")
         self._accepted_ids: list[str] = []
     
-    def filterAcceptsRow(self, row_num: int, _) -> bool:
-        # Get the underlying model
-        model: QStandardItemModel = self.sourceModel()  # type: ignore | We know what data we are dealing with
-        
-        geo_type = model.item(row_num, 2).text()
-        plateId = model.item(row_num, 3).text()
-        start_time = float(model.item(row_num, 4).text())
-        end_time = float(model.item(row_num, 5).text())
-
-        return geo_type == "PolygonOnSphere" and (len(self._accepted_ids) == 0 or plateId in self._accepted_ids) and (start_time >= self._time_filter >= end_time)
+    def computeMask(self, model: FeatureTableModel, start: int, stop: int) -> np.ndarray:
+        mask = model.category_mask(model.GEOMETRY_TYPE, ["PolygonOnSphere"], start, stop) & model.time_mask(self._time_filter, start, stop)
+        if len(self._accepted_ids) != 0:
+            mask &= np.isin(model.column(model.PLATE_ID, start, stop), [int(id) for id in self._accepted_ids])
+        return mask
     
     def setTimeFilter(self, time: float):
-        self.beginFilterChange()
         self._time_filter = time
-        self.invalidateFilter()
+        self.invalidateMask()
     
     def setPlateIdFilter(self, ids: list[str]):
-        self.beginFilterChange()
         self._accepted_ids = ids
-        self.invalidateFilter()
+        self.invalidateMask()
 
 class TimeDecoratorDelegate(QStyledItemDelegate):
     def __init__(self, /, parent: QObject | None) -> None:
@@ -70,6 +211,11 @@ class TimeDecoratorDelegate(QStyledItemDelegate):
         return value
 
 class FeatureSplittingWindow(QWidget):
+    # Selection and time changes within this interval redraw the preview only once
+    PREVIEW_DEBOUNCE_MS = 250
+    # Most rifts and features previewed at once, larger selections (e.g. everything) are only split
+    PREVIEW_MAX_FEATURES = 200
+
     def __init__(self, session: Session):
         super().__init__()
 
@@ -82,7 +228,7 @@ class FeatureSplittingWindow(QWidget):
         self.feature_model.setSourceModel(session.get_feature_model())
         
         self.setWindowTitle("Plate Splitting Tool")
-        self.resize(900, 400)
+        self.resize(900, 650)
         
         self.debugwindow = FeatureCollectionLoader(self.session)
 
@@ -96,10 +242,26 @@ class FeatureSplittingWindow(QWidget):
         self.plate_filter.setValidator(QRegularExpressionValidator("\\d+(,\\d*)*"))
         self.plate_filter.editingFinished.connect(self.updatePlateFilter)
         
-        self.rift_selection = QComboBox()
+        workers_label = QLabel("Worker Processes:")
+        self.split_workers = QSpinBox()
+        self.split_workers.setRange(1, 256)
+        self.split_workers.setValue(self.session.split_workers)
+        self.split_workers.valueChanged.connect(self.updateSplitWorkers)
+
+        # Shows where the time of a split went once it is done
+        profile_splits = QCheckBox("Profile Splits")
+        profile_splits.setChecked(self.session.profiler.enabled)
+        profile_splits.toggled.connect(self.updateProfiling)
+
+        # Several rifts (e.g. a rift network) can be selected, plates are then split by all of them at once
+        rift_label = QLabel("Rift(s):")
+        self.rift_selection = QListView()
         self.rift_selection.setModel(self.rift_model)
         self.rift_selection.setModelColumn(0)
-        self.rift_selection.setPlaceholderText("[Load Feature Collections to select Rift]")
+        self.rift_selection.setSelectionMode(QAbstractItemView.SelectionMode.ExtendedSelection)
+        self.rift_selection.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.rift_selection.setMaximumHeight(120)
+        self.rift_selection.selectionModel().selectionChanged.connect(self.schedulePreview)
 
         self.new_feature_view = QTreeView()
         self.new_feature_view.setModel(self.feature_model)
@@ -118,6 +280,21 @@ class FeatureSplittingWindow(QWidget):
                 background-color: rgb(34, 177, 76);
             }
             """)    # Sets 
+        self.new_feature_view.selectionModel().selectionChanged.connect(self.schedulePreview)
+
+        # Splits simplified geometry of the selection whenever it changes, the Split button always splits (and
+        # saves) at full resolution
+        show_preview = QCheckBox("Preview Splits")
+        show_preview.setChecked(True)
+        show_preview.toggled.connect(self.updatePreviewEnabled)
+        self.preview = SplitPreview()
+        self._preview_timer = QTimer(self)
+        self._preview_timer.setSingleShot(True)
+        self._preview_timer.setInterval(self.PREVIEW_DEBOUNCE_MS)
+        self._preview_timer.timeout.connect(self.updatePreview)
+        # Previews run in the background, one at a time (see updatePreview)
+        self._preview_task: PreviewTask | None = None
+        self._preview_outdated = False
         
 
         
@@ -129,6 +306,10 @@ class FeatureSplittingWindow(QWidget):
         button_reload_fcs = QPushButton("Reload Feature Collections")
         button_reload_fcs.clicked.connect(self.session.reload_features)
 
+        watch_fcs = QCheckBox("Reload Changed Files Automatically")
+        watch_fcs.setChecked(self.session.is_watching_files())
+        watch_fcs.toggled.connect(self.session.set_watch_files)
+
         button_rotation_model = QPushButton("Load Rotation Model")
         button_rotation_model.clicked.connect(self.load_rotation_model)
 
@@ -139,8 +320,8 @@ class FeatureSplittingWindow(QWidget):
         button_2.clicked.connect(self.set_save_location)
         self._save_location: str = ""
 
-        split_button = QPushButton("Split")
-        split_button.clicked.connect(self.on_split)
+        self.split_button = QPushButton("Split")
+        self.split_button.clicked.connect(self.on_split)
 
         split_date_layout = QHBoxLayout()
         split_date_layout.addWidget(split_date_label, 0)
@@ -150,23 +331,37 @@ class FeatureSplittingWindow(QWidget):
         plate_filter_layout.addWidget(plate_id_label, 0)
         plate_filter_layout.addWidget(self.plate_filter, 1)
 
+        workers_layout = QHBoxLayout()
+        workers_layout.addWidget(workers_label, 0)
+        workers_layout.addWidget(self.split_workers, 1)
+
         side_layout = QVBoxLayout()
         side_layout.addLayout(split_date_layout)
         side_layout.addLayout(plate_filter_layout)
+        side_layout.addLayout(workers_layout)
+        side_layout.addWidget(profile_splits)
+        side_layout.addWidget(show_preview)
+        side_layout.addWidget(rift_label)
         side_layout.addWidget(self.rift_selection)
         side_layout.addWidget(button_1, 0)
         side_layout.addWidget(button_reload_fcs, 0)
+        side_layout.addWidget(watch_fcs, 0)
         side_layout.addWidget(button_rotation_model, 0)
         side_layout.addWidget(button_rotation_reload, 0)
         side_layout.addWidget(QWidget(), 1)
         side_layout.addWidget(button_2, 0)
-        side_layout.addWidget(split_button, 0)
+        side_layout.addWidget(self.split_button, 0)
         
+        view_layout = QVBoxLayout()
+        view_layout.addWidget(self.new_feature_view, 3)
+        view_layout.addWidget(self.preview, 2)
+
         main_layout = QHBoxLayout()
-        main_layout.addWidget(self.new_feature_view, 1)
+        main_layout.addLayout(view_layout, 1)
         main_layout.addLayout(side_layout, 0)
 
         self.setLayout(main_layout)
+        self.schedulePreview()
     
     def load_feature_collection(self):
         self.debugwindow.show()
@@ -175,51 +370,141 @@ class FeatureSplittingWindow(QWidget):
         file_name, _ = QFileDialog.getOpenFileName(self, "Open Rotation Model", ".", "PLATES4 rotation (*.rot)")
         if file_name:
             self.session.load_rotation_model(file_name)
+            self.schedulePreview()
     
     def set_save_location(self):
         self._save_location, _ = QFileDialog.getSaveFileName(self, "Set Resulting Feature Collection", ".", "GPlates Markup Language (*.gpml)")
 
+    def splitTime(self) -> float | None:
+        # The validator lets incomplete numbers (e.g. "-") through while typing
+        try:
+            return float(self.split_date.text())
+        except ValueError:
+            return None
+
     def updateSplitTime(self):
-        time = float(self.split_date.text())
+        time = self.splitTime()
+        if time is None:
+            return
         self.rift_model.setTimeFilter(time)
         self.feature_model.setTimeFilter(time)
+        self.schedulePreview()
     
     def updatePlateFilter(self):
         filter_text = self.plate_filter.text()
         if filter_text == "":
             self.feature_model.setPlateIdFilter([])
         self.feature_model.setPlateIdFilter([id for id in filter_text.split(",") if len(id) > 0])
+    
+    def updateSplitWorkers(self, workers: int):
+        self.session.split_workers = workers
+
+    def updateProfiling(self, enabled: bool):
+        self.session.profiler.enabled = enabled
+
+    def _selectedFeatures(self, model: MaskFilterModel, rows: list[int], missing: list[str]) -> list[tuple[str, str]]:
+        # Features are identified by ID and the collection of their row, so features with the same ID in several
+        # collections are told apart. Rows whose feature cannot be found are added to `missing`
+        features = []
+        for row in rows:
+            feature_id = model.index(row, FeatureTableModel.FEATURE_ID).data()
+            shortname = model.index(row, FeatureTableModel.COLLECTION).data()
+            if self.session.has_feature(feature_id, shortname):
+                features.append((feature_id, shortname))
+            else:
+                missing.append(f"{feature_id} ({shortname})")
+        return features
+
+    def selectedRiftsAndFeatures(self):
+        """Returns the selected rifts and features as (feature ID, collection shortname) pairs (see
+        `Session.get_features`), and the selected rows whose feature could not be found.
+
+        Nothing is parsed here, collections that were not parsed yet are parsed by the split or preview.
+        """
+        missing: list[str] = []
+        rift_rows = sorted({index.row() for index in self.rift_selection.selectionModel().selectedIndexes()})
+        selected_rifts = self._selectedFeatures(self.rift_model, rift_rows, missing)
+
+        feature_rows = sorted({index.row() for index in self.new_feature_view.selectionModel().selectedIndexes()})
+        selected_features = self._selectedFeatures(self.feature_model, feature_rows, missing)
+        return selected_rifts, selected_features, missing
+
+    def schedulePreview(self):
+        self._preview_timer.start()
+
+    def updatePreviewEnabled(self, enabled: bool):
+        self.preview.setVisible(enabled)
+        if enabled:
+            self.schedulePreview()
+
+    def updatePreview(self):
+        if not self.preview.isVisibleTo(self):
+            return
+
+        # Only one preview runs at a time, a selection made meanwhile is previewed once it is done
+        if self._preview_task is not None:
+            self._preview_outdated = True
+            return
+
+        selected_rifts, selected_features, missing = self.selectedRiftsAndFeatures()
+        split_time = self.splitTime()
+        if len(missing) != 0:
+            self.preview.setMessage("Selected features could not be found:\n" + "\n".join(missing))
+        elif self.split_date.text() == "":
+            self.preview.setMessage("Set a split time to preview the split.")
+        elif split_time is None:
+            self.preview.setMessage("The split time is not a number.")
+        elif not self.session._rotationModel:
+            self.preview.setMessage("Load a rotation model to preview the split.")
+        elif len(selected_rifts) == 0 or len(selected_features) == 0:
+            self.preview.setMessage("Select rifts and features to preview the split.")
+        elif len(selected_rifts) + len(selected_features) > self.PREVIEW_MAX_FEATURES:
+            self.preview.setMessage(f"Select at most {self.PREVIEW_MAX_FEATURES} rifts and features to preview the split.")
+        else:
+            self._preview_task = self.session.preview_split_async(selected_features, selected_rifts, split_time)
+            self._preview_task.previewed.connect(self.onPreviewed)
+            self._preview_task.failed.connect(self.onPreviewFailed)
+            self._preview_task.finished.connect(self.onPreviewFinished)
+            self._preview_task.start()
+
+    def onPreviewed(self, result):
+        if not self._preview_outdated:
+            self.preview.setPreview(*result)
+
+    def onPreviewFailed(self, error: str):
+        if not self._preview_outdated:
+            self.preview.setMessage(f"Could not preview the split:\n{error}")
+
+    def onPreviewFinished(self):
+        self._preview_task = None
+        if self._preview_outdated:
+            self._preview_outdated = False
+            self.updatePreview()
 
     def on_split(self):
-        if self.rift_selection.currentIndex() < 0:
-            QMessageBox.critical(self, "Error", "No rift selected!")
+        profiler = self.session.profiler
+        profiler.reset()
+
+        with profiler.activate(), profiling.phase("find selection"):
+            selected_rifts, selected_features, missing = self.selectedRiftsAndFeatures()
+
+        if len(missing) != 0:
+            QMessageBox.critical(self, "Error", "Selected features could not be found:\n" + "\n".join(missing))
             return
         
-        rift_idx = self.rift_model.index(self.rift_selection.currentIndex(), 6)
-        all_features = [f for lfc in self.session.loaded_feature_collections for f in lfc.feature_collection]
-        selected_rift = next(filter(lambda f: f.get_feature_id().get_string() == self.rift_model.itemData(rift_idx)[0], all_features))
-        
         if self.split_date.text() == "":
             QMessageBox.critical(self, "Error", "No rifting time set!")
             return
 
-        split_date = float(self.split_date.text())
+        split_date = self.splitTime()
+        if split_date is None:
+            QMessageBox.critical(self, "Error", "The rifting time is not a number!")
+            return
 
-        if selected_rift == None:
+        if len(selected_rifts) == 0:
             QMessageBox.critical(self, "Error", "No rift selected!")
             return
         
-        
-        selected_feature_ids = [i.data() for i in self.new_feature_view.selectedIndexes() if i.column() == 6]
-        selected_feature_collections = [i.data() for i in self.new_feature_view.selectedIndexes() if i.column() == 7]
-        
-        selected_features = []
-
-        for i in range(len(selected_feature_ids)):
-            fc = next(filter(lambda x: x.shortname == selected_feature_collections[i],self.session.loaded_feature_collections)).feature_collection
-            feature = fc.get(lambda f: f.get_feature_id().get_string() == selected_feature_ids[i])
-            selected_features.append(feature)
-        
         if len(selected_features) == 0:
             QMessageBox.critical(self, "Error", "No features selected!")
             return
@@ -232,36 +517,62 @@ class FeatureSplittingWindow(QWidget):
             QMessageBox.critical(self, "Error", "No save location set!")
             return
 
-        fc = self.actual_splitting(selected_features, selected_rift, split_date)
-        fc.write(self._save_location)
-        QMessageBox.information(self, "Success", "Successfully saved split features: " + path.realpath(self._save_location))
-
-    def actual_splitting(self, plates, rift, rifting_time) -> pygplates.FeatureCollection:
-        initial_feature_collection = pygplates.FeatureCollection(plates)
-        rotation_model = self.session._rotationModel
-        snapshot = pygplates.ReconstructSnapshot(initial_feature_collection, rotation_model, rifting_time)
-        rift_snapshot = pygplates.ReconstructSnapshot(pygplates.FeatureCollection(rift), rotation_model, rifting_time)
-        snapshot_features = snapshot.get_reconstructed_geometries()
-        rift_snapshot_feature = rift_snapshot.get_reconstructed_geometries()[0]
-
-        new_collection = pygplates.FeatureCollection()
-
-        for feature in snapshot_features:
-            plates = split_plate_by_line(feature.get_reconstructed_geometry(), rift_snapshot_feature.get_reconstructed_geometry())
-
-            if len(plates) == 0:
-                # Ignore making features if we have no plates
-                continue
-
-            plate_feature = feature.get_feature()
-
-            for new_plate in [
-                pygplates.Feature.create_reconstructable_feature(plate_feature.get_feature_type(), split_plate, f"{plate_feature.get_name()} [{i}]", reconstruction_plate_id=plate_feature.get_reconstruction_plate_id())
-                for i, split_plate in enumerate(plates)
-                ]:
-                new_plate.set_valid_time(rifting_time, float("-inf"))
-                new_collection.add(new_plate)
-        
-        pygplates.reverse_reconstruct(new_collection, rotation_model, rifting_time)
+        # The split runs in the background, the window stays usable but only one split runs at a time
+        task = self.session.split_async(selected_features, selected_rifts, split_date, self._save_location)
+        self.split_button.setEnabled(False)
+
+        progress = QProgressDialog("Splitting ...", "Cancel", 0, len(selected_features), self)
+        progress.setWindowTitle("Splitting Plates")
+        progress.setWindowModality(Qt.WindowModality.WindowModal)
+        progress.setMinimumDuration(0)
+        progress.setAutoClose(False)
+        progress.setAutoReset(False)
+        progress.setValue(0)
+
+        def on_progress(done: int, total: int, stage: str):
+            if stage == "Saving":
+                # Writing cannot report its progress
+                progress.setRange(0, 0)
+                progress.setLabelText("Saving ...")
+            else:
+                progress.setRange(0, total)
+                progress.setValue(done)
+                progress.setLabelText(f"{stage} ({done}/{total}) ...")
+
+        def on_finished():
+            progress.close()
+            self.split_button.setEnabled(True)
+
+        task.progress.connect(on_progress)
+        task.saved.connect(self.onSplitSaved)
+        task.failed.connect(lambda error: QMessageBox.critical(self, "Error", f"Could not split the features:\n{error}"))
+        task.finished.connect(on_finished)
+        progress.canceled.connect(task.cancel)
+        task.start()
+
+    def onSplitSaved(self, output_path: str, feature_count: int):
+        message = "Successfully saved split features: " + path.realpath(output_path)
+        if self.session.profiler.enabled:
+            self.showProfile(message)
+        else:
+            QMessageBox.information(self, "Success", message)
+
+    def showProfile(self, message: str):
+        profiler = self.session.profiler
+
+        box = QMessageBox(QMessageBox.Icon.Information, "Success", message, QMessageBox.StandardButton.Ok, self)
+        box.setInformativeText("Time spent per phase is listed in the details.")
+        box.setDetailedText(profiler.summary())
+        save_button = box.addButton("Save Profile...", QMessageBox.ButtonRole.ActionRole)
+        box.exec()
+
+        if box.clickedButton() is not save_button:
+            return
 
-        return new_collection
+        file_name, selected_filter = QFileDialog.getSaveFileName(self, "Save Profile", ".", "Chrome Trace (*.json);;Profile Statistics (*.json)")
+        if not file_name:
+            return
+        if selected_filter.startswith("Chrome"):
+            profiler.write_chrome_trace(file_name)
+        else:
+            profiler.write_json(file_name)
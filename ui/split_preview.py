@@ -0,0 +1,100 @@
+from PySide6.QtCore import QPointF, QRectF, Qt
+from PySide6.QtGui import QColor, QPainter, QPainterPath, QPaintEvent, QPen, QPolygonF
+from PySide6.QtWidgets import QWidget
+import numpy as np
+import pygplates
+
+from core.arc_geometry import ring_sizes
+
+
+def _rings(geometry: pygplates.GeometryOnSphere) -> list[np.ndarray]:
+    # (n, 2) longitude, latitude arrays of the rings (or the line) of a geometry, with longitudes made continuous
+    # across the dateline
+    lat_lon = np.asarray(geometry.to_lat_lon_array(), dtype=np.float64).reshape(-1, 2)
+    sizes = ring_sizes(geometry) or [len(lat_lon)]
+    rings = np.split(lat_lon, np.cumsum(sizes)[:-1])
+    return [np.column_stack((np.unwrap(ring[:, 1], period=360.0), ring[:, 0])) for ring in rings]
+
+
+class SplitPreview(QWidget):
+    """Draws the pieces of a split preview (see `Session.preview_split`) in longitude and latitude.
+
+    Every piece gets its own colour, the outlines of the plates are drawn in grey and the rifts in red. The view
+    fits everything that is shown.
+    """
+
+    MARGIN = 8
+
+    def __init__(self, parent: QWidget | None = None) -> None:
+        super().__init__(parent)
+        self.setMinimumSize(200, 150)
+        self._plates: list[list[np.ndarray]] = []
+        self._pieces: list[list[np.ndarray]] = []
+        self._rifts: list[list[np.ndarray]] = []
+        self._message = ""
+
+    def setPreview(self, plates: list[tuple[pygplates.GeometryOnSphere, list[pygplates.PolygonOnSphere]]], rifts: list[pygplates.PolylineOnSphere]) -> None:
+        self._plates = [_rings(plate) for plate, _ in plates]
+        self._pieces = [_rings(piece) for _, pieces in plates for piece in pieces]
+        self._rifts = [_rings(rift) for rift in rifts]
+        self._message = ""
+        self.update()
+
+    def setMessage(self, message: str) -> None:
+        """Shows the message instead of a preview."""
+        self._plates, self._pieces, self._rifts = [], [], []
+        self._message = message
+        self.update()
+
+    def _transform(self) -> tuple[float, float, float] | None:
+        # Scale and offsets mapping (longitude, latitude) into the widget, with north up and equal degrees
+        points = [ring for shape in self._plates + self._pieces + self._rifts for ring in shape]
+        if len(points) == 0:
+            return None
+        points = np.concatenate(points)
+        minimum, maximum = points.min(axis=0), points.max(axis=0)
+        extent = np.maximum(maximum - minimum, 1e-6)
+
+        width, height = self.width() - 2 * self.MARGIN, self.height() - 2 * self.MARGIN
+        scale = min(width / extent[0], height / extent[1])
+        x_offset = self.MARGIN + (width - scale * extent[0]) / 2 - scale * minimum[0]
+        y_offset = self.MARGIN + (height - scale * extent[1]) / 2 + scale * maximum[1]
+        return scale, x_offset, y_offset
+
+    @staticmethod
+    def _polygon(ring: np.ndarray, scale: float, x_offset: float, y_offset: float) -> QPolygonF:
+        return QPolygonF([QPointF(x_offset + scale * lon, y_offset - scale * lat) for lon, lat in ring.tolist()])
+
+    def paintEvent(self, event: QPaintEvent) -> None:
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        painter.fillRect(self.rect(), self.palette().base())
+
+        transform = self._transform()
+        if transform is None:
+            painter.setPen(self.palette().text().color())
+            painter.drawText(QRectF(self.rect()), Qt.AlignmentFlag.AlignCenter | Qt.TextFlag.TextWordWrap, self._message)
+            return
+        scale, x_offset, y_offset = transform
+
+        # Pieces are filled with holes left open, in colours spread around the hue circle
+        painter.setPen(Qt.PenStyle.NoPen)
+        for i, piece in enumerate(self._pieces):
+            path = QPainterPath()
+            path.setFillRule(Qt.FillRule.OddEvenFill)
+            for ring in piece:
+                path.addPolygon(self._polygon(ring, scale, x_offset, y_offset))
+                path.closeSubpath()
+            painter.setBrush(QColor.fromHsv((i * 137) % 360, 140, 230, 200))
+            painter.drawPath(path)
+
+        painter.setBrush(Qt.BrushStyle.NoBrush)
+        painter.setPen(QPen(QColor(90, 90, 90), 1))
+        for plate in self._plates:
+            for ring in plate:
+                painter.drawPolygon(self._polygon(ring, scale, x_offset, y_offset))
+
+        painter.setPen(QPen(QColor(200, 30, 30), 2))
+        for rift in self._rifts:
+            for line in rift:
+                painter.drawPolyline(self._polygon(line, scale, x_offset, y_offset))